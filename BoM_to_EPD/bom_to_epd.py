@@ -3,14 +3,663 @@ BoM zu EPD Konverter
 
 Dieses Modul enthält die Hauptlogik zum Konvertieren von Bill of Materials (BoM) 
 Excel-Dateien in EPD (Environmental Product Declaration) Format.
+
+pandas, requests und openpyxl werden erst bei der ersten Verwendung importiert, damit die
+GUI schnell startet (siehe warm_up).
 """
 
-import pandas as pd
+from __future__ import annotations
+
+import importlib
+import importlib.util
 import json
-import requests
 from pathlib import Path
+import base64
+import gzip
+import hashlib
+import math
+import os
+import pickle
+import sys
+import threading
+import time
 import uuid
-from typing import Optional, Callable, List, Dict, Any, Union
+from types import ModuleType
+from typing import Optional, Callable, Iterable, Iterator, Sequence, List, Dict, Set, Any, Tuple, Union
+
+from bom_to_epd_events import Instrumentation, default_instrumentation
+
+
+class _LazyModule:
+    """Platzhalter, der das Modul beim ersten Attributzugriff importiert."""
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module: Optional[ModuleType] = None
+
+    def load(self) -> ModuleType:
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self.load(), attr)
+
+
+pd = _LazyModule("pandas")
+np = _LazyModule("numpy")
+requests = _LazyModule("requests")
+
+try:
+    import orjson
+except ImportError:  # optional, beschleunigt die Serialisierung
+    orjson = None
+
+
+# Voreinstellungen (GUI und Batch-Modus)
+DEFAULT_ROOT_REPOSITORY = "https://lca.dev.ditwin.cloud/Playground/Ecoinvent_3_10_EN15804_results2"
+DEFAULT_TARGET_REPOSITORY = "https://lca.dev.ditwin.cloud/Computed/HVDC_Repo"
+DEFAULT_API_URL = "https://olca-epd.dev.ditwin.cloud/run-epd-tree"
+DEFAULT_API_KEY = "develop"
+# Timeout für API-Aufrufe in Sekunden (Verbindungsaufbau, Antwort)
+DEFAULT_API_TIMEOUT = (10.0, 600.0)
+DEFAULT_AUTH_URL = "https://lca.dev.ditwin.cloud"
+DEFAULT_METHOD_URL = "https://lca.dev.ditwin.cloud"
+DEFAULT_METHOD_NAME = "en15804_pef31_indata_lcia_method"
+
+# Namespace für deterministische Komponenten-IDs (uuid5)
+EPD_ID_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_URL, "https://lca.ditwin.cloud/bom_to_epd/component")
+
+# Dateiname des Submission-Ledgers im Output-Verzeichnis
+LEDGER_FILENAME = "submission_ledger.jsonl"
+RUN_MANIFEST_FILENAME = "run_manifest.json"
+RUN_FRAMES_DIRNAME = "runs"
+# Job-Journal (siehe JobJournal) und Ablage der gemappten Frames
+JOURNAL_FILENAME = "job_journal.jsonl"
+JOURNAL_FRAMES_DIRNAME = "journal"
+JOURNAL_STAGES = ("parsed", "payload_written", "submitted", "response_stored")
+
+# Version des Sidecar-Formats; bei Änderungen an load_mapping erhöhen
+MAPPING_CACHE_VERSION = 1
+MAPPING_CACHE_SUFFIX = ".cache.pkl"
+# Dateiendungen, unter denen ein Mapping als SQLite-Datenbank gelesen wird (bom_to_epd_mappingdb)
+MAPPING_DB_SUFFIXES = (".sqlite", ".sqlite3", ".db")
+
+# Zellwerte, die pd.read_excel standardmäßig als NaN interpretiert
+EXCEL_NA_STRINGS = frozenset({
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan",
+    "1.#IND", "1.#QNAN", "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null"
+})
+
+# Alle wie viele BoM-Zeilen Fortschritt gemeldet und auf Abbruch geprüft wird
+PROGRESS_INTERVAL = 2000
+
+# Lese-Backends (siehe resolve_bom_engine): Stichprobe für Kodierung/Trennzeichen einer CSV-Datei
+# und Zeilen je gelesenem Parquet-Block
+CSV_SNIFF_BYTES = 64 * 1024
+PARQUET_BATCH_ROWS = 64 * 1024
+
+# Callback für Fortschrittsmeldungen: (Schritt, erledigt, gesamt oder None)
+ProgressCallback = Callable[[str, int, Optional[int]], None]
+
+
+class OperationCancelled(Exception):
+    """Wird ausgelöst, wenn ein Vorgang über sein cancel_event abgebrochen wurde."""
+
+
+class PayloadValidationError(ValueError):
+    """Der Payload ist ungültig (siehe validate_payload); errors enthält alle gefundenen Probleme."""
+
+    def __init__(self, errors: List[str]):
+        self.errors = errors
+        super().__init__("Ungültiger Payload:\n" + "\n".join(f"  - {error}" for error in errors))
+
+
+def _check_cancelled(cancel_event: Optional[threading.Event]) -> None:
+    if cancel_event is not None and cancel_event.is_set():
+        raise OperationCancelled("Vorgang abgebrochen")
+
+
+# Prozessinterner Speicher für bereits geladene Sidecars (Schlüssel: Pfad, Suffix)
+_mapping_memo: Dict[Tuple[str, str], tuple] = {}
+
+# HTTP-Sessions für send_to_api (Keep-Alive statt neuem TLS-Handshake je Aufruf), eine je Thread:
+# requests.Session ist nicht threadsicher (Worker des Dienstes, GUI-Threads)
+_api_sessions = threading.local()
+
+
+def _file_sha256(path: Path) -> str:
+    """Berechnet den SHA-256-Hash des Dateiinhalts."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def warm_up(mapping_file: Optional[Union[str, Path]] = None) -> None:
+    """
+    Importiert pandas, openpyxl und requests vorab und lädt optional das Mapping.
+
+    Gedacht für einen Hintergrund-Thread, nachdem die GUI angezeigt wird, damit der erste
+    Klick nicht auf die Importe warten muss.
+
+    Args:
+        mapping_file: Optional Pfad zur Mapping-Datei, die vorgeladen werden soll
+    """
+    pd.load()
+    requests.load()
+    importlib.import_module("openpyxl")
+    if mapping_file and Path(mapping_file).exists() and not is_mapping_database(mapping_file):
+        load_mapping(mapping_file)
+
+
+def mapping_cache_path(mapping_file: Union[str, Path], suffix: str = MAPPING_CACHE_SUFFIX) -> Path:
+    """Liefert den Pfad einer kompilierten Sidecar-Datei zu einer Mapping-Datei."""
+    mapping_file = Path(mapping_file)
+    return mapping_file.with_name(mapping_file.name + suffix)
+
+
+def load_compiled_sidecar(
+    source: Union[str, Path],
+    suffix: str,
+    build: Callable[[Path], Any],
+    version: int = MAPPING_CACHE_VERSION
+) -> Any:
+    """
+    Lädt ein aus einer Quelldatei kompiliertes Objekt aus seinem Pickle-Sidecar.
+
+    Der Sidecar liegt neben der Quelle (Dateiname + suffix) und ist über Pfad, mtime und
+    SHA-256 des Inhalts an sie gebunden. Ändert sich die Quelle, wird das Objekt mit build
+    neu erzeugt und der Sidecar ersetzt. Innerhalb eines Prozesses wird das Ergebnis
+    zusätzlich im Speicher gehalten.
+
+    Args:
+        source: Pfad zur Quelldatei
+        suffix: Dateiendung des Sidecars (z.B. ".cache.pkl")
+        build: Funktion, die das Objekt aus der Quelldatei erzeugt
+        version: Formatversion; abweichende Sidecars werden verworfen
+
+    Returns:
+        Das (ggf. aus dem Cache geladene) Objekt; nicht verändern, sondern ggf. kopieren
+    """
+    source = Path(source).resolve()
+    stat = source.stat()
+    key = str(source)
+    memo = _mapping_memo.get((key, suffix))
+    if memo is not None and memo[0] == (version, stat.st_mtime_ns, stat.st_size):
+        return memo[1]
+
+    cache_file = mapping_cache_path(source, suffix)
+    meta = {"version": version, "path": key,
+            "mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+    cached = None
+    try:
+        with open(cache_file, 'rb') as f:
+            cached = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        cached = None
+
+    data = None
+    content_hash = None
+    if isinstance(cached, dict) and cached.get("version") == version \
+            and cached.get("path") == key:
+        if cached.get("mtime_ns") == meta["mtime_ns"] and cached.get("size") == meta["size"]:
+            data = cached["data"]
+        else:
+            # mtime geändert (z.B. Kopie/Checkout) - Inhalt entscheidet
+            content_hash = _file_sha256(source)
+            if cached.get("sha256") == content_hash:
+                data = cached["data"]
+                _write_mapping_cache(cache_file, {**meta, "sha256": content_hash, "data": data})
+
+    if data is None:
+        content_hash = content_hash or _file_sha256(source)
+        data = build(source)
+        _write_mapping_cache(cache_file, {**meta, "sha256": content_hash, "data": data})
+
+    _mapping_memo[(key, suffix)] = ((version, stat.st_mtime_ns, stat.st_size), data)
+    return data
+
+
+def is_mapping_database(mapping_file: Union[str, Path]) -> bool:
+    """True, wenn die Mapping-Datei eine SQLite-Datenbank ist (siehe bom_to_epd_mappingdb)."""
+    return Path(mapping_file).suffix.lower() in MAPPING_DB_SUFFIXES
+
+
+def load_mapping(
+    mapping_file: Union[str, Path],
+    use_cache: bool = True,
+    version: Optional[str] = None
+) -> pd.DataFrame:
+    """
+    Lädt die Mapping-Datei (Materialien zu Ecoinvent-Prozessen) inkl. normalisierter Materialnamen.
+
+    Die Excel-Datei wird nur einmal mit openpyxl gelesen und danach als Pickle-Sidecar
+    neben der Quelle abgelegt. Der Sidecar ist über Pfad, mtime und SHA-256 des Inhalts
+    an die Quelle gebunden und wird automatisch neu erzeugt, sobald sich diese ändert
+    (siehe load_compiled_sidecar). Eine Mapping-Datenbank (siehe is_mapping_database)
+    wird direkt gelesen.
+
+    Args:
+        mapping_file: Pfad zur Mapping-Datei
+        use_cache: Wenn False, wird die Excel-Datei immer neu gelesen
+        version: Nur bei einer Mapping-Datenbank: zu ladende Version (None = neueste)
+
+    Returns:
+        DataFrame des Mappings mit zusätzlicher Spalte 'Material_name_norm'
+    """
+    if is_mapping_database(mapping_file):
+        from bom_to_epd_mappingdb import MappingStore
+
+        with MappingStore(mapping_file) as store:
+            return store.to_frame(version)
+    if not use_cache:
+        return _read_mapping_excel(Path(mapping_file))
+    return load_compiled_sidecar(mapping_file, MAPPING_CACHE_SUFFIX, _read_mapping_excel).copy()
+
+
+def load_mapping_for(
+    df_mat: pd.DataFrame,
+    mapping_file: Union[str, Path],
+    material_overrides: Optional[Dict[str, str]] = None,
+    version: Optional[str] = None
+) -> pd.DataFrame:
+    """
+    Lädt das Mapping für die Materialien einer BoM (Eingabe von map_materials).
+
+    Aus einer Mapping-Datenbank werden nur die Einträge zu den (ggf. umgeleiteten)
+    Materialnamen der BoM abgefragt; eine Excel-Datei wird wie bei load_mapping vollständig
+    geladen.
+
+    Args:
+        df_mat: DataFrame mit der Spalte 'Material' (siehe parse_bom_materials)
+        mapping_file: Pfad zur Mapping-Datei bzw. -Datenbank
+        material_overrides: Optionale Zuordnung BoM-Material -> Material_name im Mapping
+        version: Nur bei einer Mapping-Datenbank: Version (None = neueste)
+
+    Returns:
+        Mapping-DataFrame wie von load_mapping
+    """
+    if not is_mapping_database(mapping_file):
+        return load_mapping(mapping_file)
+    from bom_to_epd_mappingdb import MappingStore
+
+    names = set(df_mat['Material'].astype(str).str.strip().str.lower())
+    if material_overrides:
+        names.update(str(v).strip().lower() for v in material_overrides.values())
+    with MappingStore(mapping_file) as store:
+        return store.lookup(names, version)
+
+
+def _read_mapping_excel(mapping_file: Path) -> pd.DataFrame:
+    """Liest die Mapping-Excel-Datei und ergänzt die normalisierten Materialnamen."""
+    df_map = pd.read_excel(mapping_file, engine='openpyxl')
+    df_map['Material_name_norm'] = df_map['Material_name'].str.strip().str.lower()
+    return df_map
+
+
+def _write_mapping_cache(cache_file: Path, content: Dict[str, Any]) -> None:
+    """Schreibt den Sidecar atomar; ist das Verzeichnis nicht beschreibbar, wird nichts gecacht."""
+    tmp_file = cache_file.with_name(cache_file.name + ".tmp")
+    try:
+        with open(tmp_file, 'wb') as f:
+            pickle.dump(content, f, protocol=pickle.HIGHEST_PROTOCOL)
+        tmp_file.replace(cache_file)
+    except OSError:
+        try:
+            tmp_file.unlink()
+        except OSError:
+            pass
+
+
+def column_letter_to_index(letter: Union[str, int, None]) -> int:
+    """Konvertiert Spaltenbuchstaben (A, B, C, ..., Z, AA, AB, ...) in Index (0, 1, 2, ...)"""
+    if isinstance(letter, int):
+        return letter
+    if not letter:
+        return 0
+    letter = letter.upper().strip()
+    index = 0
+    for char in letter:
+        if not char.isalpha():
+            return 0
+        index = index * 26 + (ord(char) - ord('A') + 1)
+    return index - 1
+
+
+def _excel_cell_value(value: Any) -> Any:
+    """Normalisiert einen openpyxl-Zellwert so, wie pd.read_excel ihn liefern würde."""
+    if value is None:
+        return float('nan')
+    if isinstance(value, str) and value in EXCEL_NA_STRINGS:
+        return float('nan')
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def iter_bom_rows(
+    file_path: Union[str, Path],
+    sheet_name: Union[str, int],
+    start_row_index: int = 0,
+    material_column_index: int = 2,
+    amount_column_index: int = 4,
+    progress_callback: Optional[ProgressCallback] = None,
+    cancel_event: Optional[threading.Event] = None,
+    engine: Optional[str] = None
+) -> Iterator[Tuple[Any, Any]]:
+    """
+    Liest die BoM zeilenweise und liefert nur Material- und Mengenzelle.
+
+    Mit openpyxl (read_only) werden nur die Spalten zwischen Material- und Mengenspalte
+    geparst und keine Zeilen zwischengespeichert; der Speicherbedarf ist damit unabhängig
+    von Breite und Länge des Sheets. Zeilenindizes entsprechen denen von
+    pd.read_excel(header=None), bei allen Backends (siehe resolve_bom_engine).
+
+    Args:
+        file_path: Pfad zur BoM Excel-Datei
+        sheet_name: Name (oder Index) des Excel-Sheets
+        start_row_index: Zeilenindex, ab dem die Materialien beginnen (0 = erste Zeile)
+        material_column_index: Spaltenindex für Materialnamen (0 = A, 1 = B, ...)
+        amount_column_index: Spaltenindex für Mengen (0 = A, 1 = B, ...)
+        progress_callback: Optional, wird alle PROGRESS_INTERVAL Zeilen mit
+            ("BoM lesen", gelesene Zeilen, Zeilen laut Sheet-Dimension oder None) aufgerufen
+        cancel_event: Optional; ist es gesetzt, wird OperationCancelled ausgelöst
+        engine: Lese-Backend (siehe resolve_bom_engine); None = nach Dateiendung
+
+    Yields:
+        Tupel (Material, Amount) mit Zellwerten wie bei pd.read_excel (leere Zellen als NaN)
+    """
+    reader = BOM_READERS[resolve_bom_engine(file_path, engine)]
+    return reader(file_path, sheet_name, start_row_index, (material_column_index, amount_column_index),
+                  progress_callback, cancel_event)
+
+
+def _iter_bom_columns(
+    file_path: Union[str, Path],
+    sheet_name: Union[str, int],
+    start_row_index: int,
+    columns: Sequence[int],
+    progress_callback: Optional[ProgressCallback] = None,
+    cancel_event: Optional[threading.Event] = None
+) -> Iterator[Tuple[Any, ...]]:
+    """Wie iter_bom_rows, liefert aber die Zellen der angegebenen Spalten (in dieser Reihenfolge)."""
+    from openpyxl import load_workbook
+
+    wb = load_workbook(file_path, read_only=True, data_only=True, keep_links=False)
+    try:
+        ws = wb.worksheets[sheet_name] if isinstance(sheet_name, int) else wb[sheet_name]
+        yield from _iter_sheet_rows(ws, start_row_index, columns, progress_callback, cancel_event)
+    finally:
+        wb.close()
+
+
+def _iter_sheet_rows(
+    ws: Any,
+    start_row_index: int,
+    columns: Sequence[int],
+    progress_callback: Optional[ProgressCallback] = None,
+    cancel_event: Optional[threading.Event] = None,
+    step: str = "BoM lesen"
+) -> Iterator[Tuple[Any, ...]]:
+    """Streamt die Zellen der angegebenen Spalten eines geöffneten Worksheets (siehe iter_bom_rows)."""
+    first_col = min(columns)
+    last_col = max(columns)
+    positions = [column - first_col for column in columns]
+
+    total = ws.max_row - start_row_index if ws.max_row else None
+    rows = ws.iter_rows(min_row=start_row_index + 1, min_col=first_col + 1,
+                        max_col=last_col + 1, values_only=True)
+    return _stream_rows(rows, positions, total, progress_callback, cancel_event, step)
+
+
+def _stream_rows(
+    rows: Iterable[Sequence[Any]],
+    positions: Sequence[int],
+    total: Optional[int],
+    progress_callback: Optional[ProgressCallback] = None,
+    cancel_event: Optional[threading.Event] = None,
+    step: str = "BoM lesen"
+) -> Iterator[Tuple[Any, ...]]:
+    """
+    Liefert aus Zeilen (Listen von Zellwerten) die Zellen an positions, normalisiert wie
+    pd.read_excel; fehlende Zellen (kürzere Zeilen) gelten als leer. Meldet alle
+    PROGRESS_INTERVAL Zeilen Fortschritt und prüft auf Abbruch.
+    """
+    read = 0
+    for row in rows:
+        width = len(row)
+        yield tuple(_excel_cell_value(row[pos] if pos < width else None) for pos in positions)
+        read += 1
+        if read % PROGRESS_INTERVAL == 0:
+            _check_cancelled(cancel_event)
+            if progress_callback:
+                progress_callback(step, read, total)
+    if progress_callback:
+        progress_callback(step, read, read)
+
+
+def _rows_to_frame(rows: Iterable[Tuple[Any, ...]], columns: Sequence[int]) -> pd.DataFrame:
+    """Baut aus Zeilentupeln den Roh-Frame (Spaltenbeschriftungen = Spaltenindizes)."""
+    values = list(zip(*rows)) or [()] * len(columns)
+    return pd.DataFrame({column: pd.Series(list(cells), dtype=object)
+                         for column, cells in zip(columns, values)})
+
+
+def _bom_columns(material_column_index: int, amount_column_index: int,
+                 level_column_index: Optional[int] = None) -> Tuple[int, ...]:
+    """Zu lesende Spalten: Material, Menge und ggf. Ebene."""
+    if level_column_index is None:
+        return material_column_index, amount_column_index
+    return material_column_index, amount_column_index, level_column_index
+
+
+def _iter_calamine_columns(
+    file_path: Union[str, Path],
+    sheet_name: Union[str, int],
+    start_row_index: int,
+    columns: Sequence[int],
+    progress_callback: Optional[ProgressCallback] = None,
+    cancel_event: Optional[threading.Event] = None
+) -> Iterator[Tuple[Any, ...]]:
+    """
+    Wie _iter_bom_columns, liest das Sheet aber mit python-calamine (Rust, deutlich schneller).
+
+    Die Zeilen werden einzeln aus dem Iterator von calamine übernommen (keine Liste aller
+    Zeilen in Python); behalten werden nur die Zellen der angegebenen Spalten.
+    """
+    from python_calamine import CalamineWorkbook
+
+    wb = CalamineWorkbook.from_path(str(file_path))
+    name = wb.sheet_names[sheet_name] if isinstance(sheet_name, int) else sheet_name
+    _check_cancelled(cancel_event)
+    return _calamine_sheet_rows(wb.get_sheet_by_name(name), start_row_index, columns,
+                                progress_callback, cancel_event)
+
+
+def _calamine_sheet_rows(
+    sheet: Any,
+    start_row_index: int,
+    columns: Sequence[int],
+    progress_callback: Optional[ProgressCallback] = None,
+    cancel_event: Optional[threading.Event] = None,
+    step: str = "BoM lesen"
+) -> Iterator[Tuple[Any, ...]]:
+    """Streamt die Zellen der angegebenen Spalten eines calamine-Sheets (wie _iter_sheet_rows)."""
+    from itertools import chain, islice, repeat
+
+    # calamine beginnt bei der ersten belegten Spalte; Zeilen und Spalten zählen wie bei openpyxl ab A1
+    first_row, first_col = sheet.start or (0, 0)
+    positions = [column - first_col if column >= first_col else sys.maxsize for column in columns]
+    rows = sheet.iter_rows()
+    first = next(rows, None)
+    rows = chain([first], rows) if first is not None else iter(())
+    # Je nach Version beginnen die Zeilen bei Zeile 1 (leer aufgefüllt) oder bei der ersten belegten
+    # Zeile; diese enthält immer mindestens eine Zelle
+    if first is not None and first_row > 0 and any(cell != "" for cell in first):
+        rows = chain(repeat((), first_row), rows)
+    rows = islice(rows, start_row_index, None)
+    total = max(sheet.end[0] + 1 - start_row_index, 0) if sheet.end else 0
+    return _stream_rows(rows, positions, total, progress_callback, cancel_event, step)
+
+
+def _open_text(file_path: Union[str, Path]) -> Any:
+    """Öffnet eine Textdatei als UTF-8 (mit BOM) bzw. Windows-1252, falls sie kein UTF-8 ist."""
+    with open(file_path, 'rb') as f:
+        sample = f.read(CSV_SNIFF_BYTES)
+    try:
+        sample.decode('utf-8-sig')
+        encoding = 'utf-8-sig'
+    except UnicodeDecodeError as e:
+        # Abgeschnittenes Mehrbyte-Zeichen am Ende der Stichprobe ist kein Fehler
+        encoding = 'utf-8-sig' if e.start >= len(sample) - 3 else 'cp1252'
+    return open(file_path, 'r', encoding=encoding, newline='')
+
+
+def _iter_csv_columns(
+    file_path: Union[str, Path],
+    sheet_name: Union[str, int],
+    start_row_index: int,
+    columns: Sequence[int],
+    progress_callback: Optional[ProgressCallback] = None,
+    cancel_event: Optional[threading.Event] = None
+) -> Iterator[Tuple[Any, ...]]:
+    """
+    Streamt die angegebenen Spalten einer CSV-Datei (sheet_name wird ignoriert).
+
+    Jeder Datensatz entspricht einer Excel-Zeile (auch die Kopfzeile); das Trennzeichen
+    (, ; Tab |) wird aus dem Dateianfang bestimmt. Es wird nur ein Datensatz zur Zeit
+    gehalten, der Speicherbedarf ist unabhängig von der Dateigröße.
+    """
+    import csv
+    from itertools import islice
+
+    with _open_text(file_path) as f:
+        sample = f.read(CSV_SNIFF_BYTES)
+        f.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=",;\t|")
+        except csv.Error:
+            dialect = csv.excel
+        rows = islice(csv.reader(f, dialect), start_row_index, None)
+        yield from _stream_rows(rows, columns, None, progress_callback, cancel_event)
+
+
+def _iter_parquet_columns(
+    file_path: Union[str, Path],
+    sheet_name: Union[str, int],
+    start_row_index: int,
+    columns: Sequence[int],
+    progress_callback: Optional[ProgressCallback] = None,
+    cancel_event: Optional[threading.Event] = None
+) -> Iterator[Tuple[Any, ...]]:
+    """
+    Liest die angegebenen Spalten einer Parquet-Datei blockweise (sheet_name wird ignoriert).
+
+    Spaltenindizes beziehen sich auf die Reihenfolge im Schema; die Spaltennamen bilden
+    Zeile 0 (wie die Kopfzeile eines CSV-Exports), die Daten beginnen bei Zeile 1.
+    """
+    from itertools import chain, islice
+
+    try:
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("Für Parquet-Dateien wird pyarrow benötigt (pip install pyarrow)") from e
+
+    pf = pq.ParquetFile(str(file_path))
+    names = pf.schema_arrow.names
+    selected = [names[column] for column in dict.fromkeys(columns) if column < len(names)]
+    positions = [selected.index(names[column]) if column < len(names) else len(selected)
+                 for column in columns]
+
+    def data_rows() -> Iterator[Tuple[Any, ...]]:
+        for batch in pf.iter_batches(batch_size=PARQUET_BATCH_ROWS, columns=selected):
+            yield from zip(*(batch.column(name).to_pylist() for name in selected))
+
+    header = [tuple(selected)]
+    rows = islice(chain(header, data_rows()), start_row_index, None)
+    total = max(pf.metadata.num_rows + 1 - start_row_index, 0)
+    yield from _stream_rows(rows, positions, total, progress_callback, cancel_event)
+
+
+def _calamine_available() -> bool:
+    return importlib.util.find_spec("python_calamine") is not None
+
+
+# Lese-Backends für BoM-Dateien: Name -> Funktion(file_path, sheet_name, start_row_index,
+# columns, progress_callback, cancel_event), die die Zellen der Spalten zeilenweise liefert
+BOM_READERS: Dict[str, Callable[..., Iterator[Tuple[Any, ...]]]] = {
+    "openpyxl": _iter_bom_columns,
+    "calamine": _iter_calamine_columns,
+    "csv": _iter_csv_columns,
+    "parquet": _iter_parquet_columns,
+}
+# Backend je Dateiendung; andere Endungen werden als Excel-Datei gelesen
+BOM_ENGINE_BY_SUFFIX = {".csv": "csv", ".tsv": "csv", ".txt": "csv", ".parquet": "parquet", ".pq": "parquet"}
+
+
+def resolve_bom_engine(file_path: Union[str, Path], engine: Optional[str] = None) -> str:
+    """
+    Bestimmt das Lese-Backend einer BoM-Datei.
+
+    Args:
+        file_path: Pfad zur BoM-Datei
+        engine: Name aus BOM_READERS oder None/"auto": nach Dateiendung, Excel-Dateien mit
+            openpyxl (Streaming mit konstantem Speicherbedarf); calamine nur auf Anfrage
+
+    Returns:
+        Name des Backends
+    """
+    if engine in (None, "auto"):
+        engine = BOM_ENGINE_BY_SUFFIX.get(Path(file_path).suffix.lower(), "openpyxl")
+    if engine not in BOM_READERS:
+        raise ValueError(f"Unbekanntes Lese-Backend '{engine}' (verfügbar: {', '.join(BOM_READERS)})")
+    if engine == "calamine" and not _calamine_available():
+        raise ImportError("Für das Backend 'calamine' wird python-calamine benötigt (pip install python-calamine)")
+    return engine
+
+
+def read_bom_frame(
+    file_path: Union[str, Path],
+    sheet_name: Union[str, int],
+    start_row_index: int = 0,
+    material_column_index: int = 2,
+    amount_column_index: int = 4,
+    streaming: bool = True,
+    progress_callback: Optional[ProgressCallback] = None,
+    cancel_event: Optional[threading.Event] = None,
+    level_column_index: Optional[int] = None,
+    engine: Optional[str] = None
+) -> pd.DataFrame:
+    """
+    Liest die Rohdaten der BoM ab start_row_index.
+
+    Args:
+        file_path: Pfad zur BoM-Datei (Excel, CSV oder Parquet, siehe resolve_bom_engine)
+        sheet_name: Name des Excel-Sheets (bei CSV und Parquet ohne Bedeutung)
+        start_row_index: Zeilenindex, ab dem die Materialien beginnen (0 = erste Zeile)
+        material_column_index: Spaltenindex für Materialnamen (0 = A, 1 = B, ...)
+        amount_column_index: Spaltenindex für Mengen (0 = A, 1 = B, ...)
+        streaming: Wenn True, werden nur Material- und Mengenspalte gestreamt (iter_bom_rows),
+            sonst wird das ganze Sheet mit pd.read_excel geladen (nur Excel-Backends)
+        progress_callback: Optional für Fortschrittsmeldungen (siehe iter_bom_rows)
+        cancel_event: Optional; ist es gesetzt, wird OperationCancelled ausgelöst
+        level_column_index: Optional Spaltenindex der BoM-Ebene (mehrstufige BoM)
+        engine: Lese-Backend (siehe resolve_bom_engine); None = nach Dateiendung
+
+    Returns:
+        DataFrame, dessen Spaltenbeschriftungen den Spaltenindizes entsprechen
+    """
+    engine = resolve_bom_engine(file_path, engine)
+    if not streaming and engine in ("openpyxl", "calamine"):
+        df_raw = pd.read_excel(file_path, sheet_name=sheet_name, header=None, engine=engine)
+        _check_cancelled(cancel_event)
+        return df_raw.iloc[start_row_index:, :].dropna(how='all')
+
+    columns = _bom_columns(material_column_index, amount_column_index, level_column_index)
+    rows = BOM_READERS[engine](file_path, sheet_name, start_row_index, columns, progress_callback, cancel_event)
+    return _rows_to_frame(rows, columns)
 
 
 def read_materials_and_map(
@@ -19,71 +668,299 @@ def read_materials_and_map(
     mapping_file: Union[str, Path],
     start_row_index: int = 0,
     material_column_index: int = 2,
-    amount_column_index: int = 4
+    amount_column_index: int = 4,
+    streaming: bool = True,
+    material_overrides: Optional[Dict[str, str]] = None,
+    progress_callback: Optional[ProgressCallback] = None,
+    cancel_event: Optional[threading.Event] = None,
+    level_column_index: Optional[int] = None,
+    mapping_version: Optional[str] = None,
+    engine: Optional[str] = None
 ) -> pd.DataFrame:
     """
-    Liest Materialien aus einer Excel-Datei und mappt sie mit Ecoinvent-Prozessen.
+    Liest Materialien aus einer BoM-Datei und mappt sie mit Ecoinvent-Prozessen.
     
     Args:
         file_path: Pfad zur BoM Excel-Datei
         sheet_name: Name des Excel-Sheets
-        mapping_file: Pfad zur Mapping-Datei (Materialien zu Ecoinvent-Prozessen)
+        mapping_file: Pfad zur Mapping-Datei (Materialien zu Ecoinvent-Prozessen) oder
+            Mapping-Datenbank (siehe load_mapping_for)
         start_row_index: Zeilenindex, ab dem die Materialien beginnen (0 = erste Zeile)
         material_column_index: Spaltenindex für Materialnamen (0 = A, 1 = B, ...)
         amount_column_index: Spaltenindex für Mengen (0 = A, 1 = B, ...)
+        streaming: Wenn True (Standard), werden nur Material- und Mengenspalte gestreamt
+        material_overrides: Optionale Zuordnung BoM-Material -> Material_name im Mapping
+            (z.B. übernommene Vorschläge, siehe bom_to_epd_match.suggest_mappings)
+        progress_callback: Optional für Fortschrittsmeldungen (Schritt, erledigt, gesamt)
+        cancel_event: Optional; ist es gesetzt, wird OperationCancelled ausgelöst
+        level_column_index: Optional Spaltenindex der BoM-Ebene; dann enthält das Ergebnis
+            zusätzlich die Spalten 'Level' und 'Assembly' (siehe parse_bom_materials)
+        mapping_version: Nur bei einer Mapping-Datenbank: Version (None = neueste)
+        engine: Lese-Backend der BoM (openpyxl, calamine, csv, parquet); None = nach
+            Dateiendung (siehe resolve_bom_engine)
     
     Returns:
         DataFrame mit Materialien, Amounts, Units und UUIDs für A1 und A3
     """
-    df_raw = pd.read_excel(file_path, sheet_name=sheet_name, header=None, engine='openpyxl')
-    df = df_raw.iloc[start_row_index:, :].dropna(how='all')
+    df = read_bom_frame(file_path, sheet_name, start_row_index,
+                        material_column_index, amount_column_index, streaming,
+                        progress_callback, cancel_event, level_column_index, engine)
 
-    materials = []
-    total_net = None
-    final_prod = None
+    df_mat = parse_bom_materials(df, material_column_index, amount_column_index, level_column_index)
+    _check_cancelled(cancel_event)
 
-    for _, row in df.iterrows():
-        mat = str(row[material_column_index]).strip()
+    # Mapping einlesen (kompilierter Sidecar bzw. Abfrage der Datenbank, siehe load_mapping_for)
+    if progress_callback:
+        progress_callback("Mapping", 0, None)
+    df_map = load_mapping_for(df_mat, mapping_file, material_overrides, mapping_version)
+    _check_cancelled(cancel_event)
+    return map_materials(df_mat, df_map, material_overrides)
 
-        if not mat or mat.lower() == 'nan':
-            continue
 
-        amount_str = str(row[amount_column_index]).replace(",", ".") if pd.notna(row[amount_column_index]) else ""
-        try:
-            amount_val = float(amount_str)
-        except ValueError:
-            amount_val = 0.0
+def read_workbook_materials_and_map(
+    file_path: Union[str, Path],
+    mapping_file: Union[str, Path],
+    sheet_names: Optional[Iterable[Union[str, int]]] = None,
+    start_row_index: int = 0,
+    material_column_index: int = 2,
+    amount_column_index: int = 4,
+    material_overrides: Optional[Dict[str, str]] = None,
+    progress_callback: Optional[ProgressCallback] = None,
+    cancel_event: Optional[threading.Event] = None,
+    level_column_index: Optional[int] = None,
+    mapping_version: Optional[str] = None,
+    engine: Optional[str] = None
+) -> Dict[str, pd.DataFrame]:
+    """
+    Liest mehrere Sheets einer Arbeitsmappe in einem Durchgang und mappt sie.
 
-        if amount_val <= 0:
-            continue
+    Die Arbeitsmappe wird nur einmal geöffnet und das Mapping nur einmal geladen; alle
+    Sheets verwenden dieselben Spalten und dieselbe Startzeile.
 
-        # Spezialfall Verpackungsgewicht
-        if mat.lower().startswith("total net weight material"):
-            total_net = amount_val
-            continue
-        elif mat.lower().startswith("final product"):
-            final_prod = amount_val
-            continue
+    Args:
+        file_path: Pfad zur BoM Excel-Datei
+        mapping_file: Pfad zur Mapping-Datei
+        sheet_names: Zu lesende Sheets (Namen oder Indizes); None = alle Sheets
+        start_row_index: Zeilenindex, ab dem die Materialien beginnen (0 = erste Zeile)
+        material_column_index: Spaltenindex für Materialnamen (0 = A, 1 = B, ...)
+        amount_column_index: Spaltenindex für Mengen (0 = A, 1 = B, ...)
+        material_overrides: Optionale Zuordnung BoM-Material -> Material_name im Mapping
+        progress_callback: Optional für Fortschrittsmeldungen ("BoM lesen (<Sheet>)", erledigt, gesamt)
+        cancel_event: Optional; ist es gesetzt, wird OperationCancelled ausgelöst
+        level_column_index: Optional Spaltenindex der BoM-Ebene (mehrstufige BoM)
+        mapping_version: Nur bei einer Mapping-Datenbank: Version (None = neueste)
+        engine: Lese-Backend (siehe resolve_bom_engine); nur Excel-Backends (openpyxl, calamine),
+            CSV- und Parquet-Dateien haben keine Sheets
+
+    Returns:
+        Dictionary Sheet-Name -> DataFrame wie von read_materials_and_map (in Sheet-Reihenfolge)
+
+    Raises:
+        ValueError: bei einem Backend ohne Sheets (csv, parquet)
+    """
+    engine = resolve_bom_engine(file_path, engine)
+    if engine not in WORKBOOK_ENGINES:
+        raise ValueError(f"Der Arbeitsmappen-Modus unterstützt nur Excel-Backends "
+                         f"({', '.join(WORKBOOK_ENGINES)}), nicht '{engine}'")
+
+    # Datenbank: eine Abfrage je Sheet (nur dessen Materialien), Excel: einmal laden
+    df_map = None if is_mapping_database(mapping_file) else load_mapping(mapping_file)
+    columns = _bom_columns(material_column_index, amount_column_index, level_column_index)
+    results = {}
+    for title, rows in _workbook_sheet_rows(file_path, sheet_names, engine, start_row_index, columns,
+                                            progress_callback, cancel_event):
+        df = _rows_to_frame(rows, columns)
+        df_mat = parse_bom_materials(df, material_column_index, amount_column_index, level_column_index)
+        _check_cancelled(cancel_event)
+        sheet_map = df_map if df_map is not None else \
+            load_mapping_for(df_mat, mapping_file, material_overrides, mapping_version)
+        results[title] = map_materials(df_mat, sheet_map, material_overrides)
+    return results
 
-        # Normale Materialien
-        materials.append({"Material": mat, "Amount": amount_val})
+
+# Backends mit Sheets (für read_workbook_materials_and_map)
+WORKBOOK_ENGINES = ("openpyxl", "calamine")
+
+
+def _workbook_sheet_rows(
+    file_path: Union[str, Path],
+    sheet_names: Optional[Iterable[Union[str, int]]],
+    engine: str,
+    start_row_index: int,
+    columns: Sequence[int],
+    progress_callback: Optional[ProgressCallback] = None,
+    cancel_event: Optional[threading.Event] = None
+) -> Iterator[Tuple[str, Iterator[Tuple[Any, ...]]]]:
+    """Öffnet die Arbeitsmappe einmal und liefert je Sheet (Titel, Zeilen der Spalten)."""
+    if engine == "calamine":
+        from python_calamine import CalamineWorkbook
+
+        wb = CalamineWorkbook.from_path(str(file_path))
+        names = wb.sheet_names if sheet_names is None else \
+            [wb.sheet_names[name] if isinstance(name, int) else name for name in sheet_names]
+        for name in names:
+            yield name, _calamine_sheet_rows(wb.get_sheet_by_name(name), start_row_index, columns,
+                                             progress_callback, cancel_event, step=f"BoM lesen ({name})")
+        return
+
+    from openpyxl import load_workbook
+
+    wb = load_workbook(file_path, read_only=True, data_only=True, keep_links=False)
+    try:
+        if sheet_names is None:
+            worksheets = list(wb.worksheets)
+        else:
+            worksheets = [wb.worksheets[name] if isinstance(name, int) else wb[name] for name in sheet_names]
+        for ws in worksheets:
+            yield ws.title, _iter_sheet_rows(ws, start_row_index, columns, progress_callback, cancel_event,
+                                             step=f"BoM lesen ({ws.title})")
+    finally:
+        wb.close()
+
+
+def parse_bom_materials(
+    df: pd.DataFrame,
+    material_column_index: int,
+    amount_column_index: int,
+    level_column_index: Optional[int] = None
+) -> pd.DataFrame:
+    """
+    Extrahiert Materialien und Mengen aus den BoM-Rohdaten (vektorisiert).
+
+    Mengen werden mit Komma als Dezimaltrennzeichen akzeptiert; Zeilen ohne Material oder
+    mit Menge <= 0 (bzw. nicht numerisch) werden verworfen. Aus den Zeilen
+    "total net weight material" und "final product" wird das Verpackungsgewicht berechnet
+    und zu gleichen Teilen auf Palette, Karton und Folie verteilt.
+
+    Args:
+        df: BoM-Rohdaten (Spaltenbeschriftungen = Spaltenindizes)
+        material_column_index: Spaltenindex für Materialnamen
+        amount_column_index: Spaltenindex für Mengen
+        level_column_index: Optional Spaltenindex der BoM-Ebene (z.B. 1, 2, 3 oder "..3").
+            Dann enthält das Ergebnis zusätzlich 'Level' (Zeilen ohne Ebene und das
+            Verpackungsgewicht liegen auf der obersten Ebene) und 'Assembly' (True, wenn
+            die nächste Zeile eine tiefere Ebene hat, d.h. die Zeile eine Baugruppe ist).
+            Baugruppen ohne Menge zählen einmal (Menge 1), siehe _keep_assemblies
+
+    Returns:
+        DataFrame mit den Spalten 'Material' und 'Amount'
+
+    Raises:
+        ValueError: wenn eine Baugruppe eine ungültige Menge hat (nicht numerisch oder <= 0)
+    """
+    raw_mat = df[material_column_index]
+    raw_amount = df[amount_column_index]
+
+    mat = raw_mat.where(raw_mat.notna(), '').astype(str).str.strip()
+    mat_lower = mat.str.lower()
+    amount_str = raw_amount.where(raw_amount.notna(), '').astype(str).str.replace(",", ".", regex=False)
+    amount = pd.to_numeric(amount_str.str.strip(), errors='coerce').astype(float)
+
+    valid = mat.ne('') & mat_lower.ne('nan') & amount.gt(0)
+
+    # Spezialfall Verpackungsgewicht (letzter Eintrag gewinnt)
+    is_total_net = mat_lower.str.startswith("total net weight material")
+    is_final_prod = mat_lower.str.startswith("final product")
+    total_net_values = amount[valid & is_total_net]
+    final_prod_values = amount[valid & is_final_prod]
+
+    # Normale Materialien
+    is_material = valid & ~is_total_net & ~is_final_prod
+    if level_column_index is not None:
+        amount, is_material = _keep_assemblies(mat, amount, amount_str, is_material,
+                                               _parse_levels(df[level_column_index]),
+                                               mat.ne('') & mat_lower.ne('nan') & ~is_total_net & ~is_final_prod)
+    df_mat = pd.DataFrame({"Material": mat[is_material], "Amount": amount[is_material]})
+    if level_column_index is not None:
+        df_mat["Level"] = _parse_levels(df[level_column_index][is_material])
+    df_mat = df_mat.reset_index(drop=True)
 
     # Verpackung berechnen
-    if total_net is not None and final_prod is not None and final_prod > total_net:
-        packaging_weight = final_prod - total_net
-        share = packaging_weight / 3.0
-        materials.extend([
-            {"Material": "Packaging pallet", "Amount": share},
-            {"Material": "Packaging carton", "Amount": share},
-            {"Material": "Packaging film", "Amount": share}
-        ])
-
-    df_mat = pd.DataFrame(materials)
-
-    # Mapping einlesen
-    df_map = pd.read_excel(mapping_file, engine='openpyxl')
-    df_map['Material_name_norm'] = df_map['Material_name'].str.strip().str.lower()
+    if not total_net_values.empty and not final_prod_values.empty:
+        total_net = total_net_values.iloc[-1]
+        final_prod = final_prod_values.iloc[-1]
+        if final_prod > total_net:
+            share = (final_prod - total_net) / 3.0
+            df_packaging = pd.DataFrame({
+                "Material": ["Packaging pallet", "Packaging carton", "Packaging film"],
+                "Amount": [share, share, share]
+            })
+            df_mat = pd.concat([df_mat, df_packaging.astype(df_mat.dtypes[["Material", "Amount"]].to_dict())],
+                               ignore_index=True)
+
+    if level_column_index is not None:
+        levels = df_mat["Level"]
+        top_level = levels.min() if levels.notna().any() else 1
+        df_mat["Level"] = levels.fillna(top_level).astype(int)
+        df_mat["Assembly"] = df_mat["Level"].shift(-1, fill_value=0).gt(df_mat["Level"])
+
+    return df_mat
+
+
+def _keep_assemblies(
+    mat: pd.Series,
+    amount: pd.Series,
+    amount_str: pd.Series,
+    is_material: pd.Series,
+    levels: pd.Series,
+    named: pd.Series
+) -> Tuple[pd.Series, pd.Series]:
+    """
+    Behält Baugruppen einer mehrstufigen BoM, auch wenn ihre Menge fehlt.
+
+    Würde eine solche Zeile verworfen, hingen ihre Einzelteile an der vorherigen Baugruppe.
+    Baugruppe ist eine benannte Zeile mit Ebene, auf die eine tiefere Ebene folgt; fehlt ihre
+    Menge, zählt sie einmal (Menge 1).
+
+    Returns:
+        Tuple von (Mengen, Maske der Materialzeilen) inkl. der Baugruppen ohne Menge
+
+    Raises:
+        ValueError: wenn die Menge einer Baugruppe angegeben, aber ungültig ist
+    """
+    candidate = named & (is_material | levels.notna())
+    candidate_levels = levels[candidate]
+    deeper_next = candidate_levels.shift(-1).gt(candidate_levels)
+    without_amount = deeper_next & ~is_material[candidate]
+    positions = without_amount[without_amount].index
+    if len(positions) == 0:
+        return amount, is_material
+    invalid = positions[amount_str[positions].str.strip().ne('')]
+    if len(invalid):
+        examples = ", ".join(f"{mat[i]!r} ({amount_str[i].strip()})" for i in invalid[:VALIDATION_EXAMPLES])
+        raise ValueError(f"{len(invalid)} Baugruppen mit ungültiger Menge: {examples}")
+    amount = amount.copy()
+    amount[positions] = 1.0
+    return amount, is_material | is_material.index.isin(positions)
+
+
+def _parse_levels(values: pd.Series) -> pd.Series:
+    """Ebenen als Zahl; führende Punkte (SAP-Schreibweise "..3") werden ignoriert."""
+    as_str = values.where(values.notna(), '').astype(str).str.strip().str.lstrip(".")
+    return pd.to_numeric(as_str, errors='coerce').astype(float)
+
+
+def map_materials(
+    df_mat: pd.DataFrame,
+    df_map: pd.DataFrame,
+    material_overrides: Optional[Dict[str, str]] = None
+) -> pd.DataFrame:
+    """
+    Mappt Materialien auf Ecoinvent-Prozesse und berechnet die Mengen für A1 und A3.
+
+    Args:
+        df_mat: DataFrame mit den Spalten 'Material' und 'Amount' (siehe parse_bom_materials)
+        df_map: Mapping-DataFrame (siehe load_mapping)
+        material_overrides: Optionale Zuordnung BoM-Material -> Material_name im Mapping
+
+    Returns:
+        DataFrame mit Materialien, Amounts, Units und UUIDs für A1 und A3
+    """
+    df_mat = df_mat.copy()
     df_mat['Material_norm'] = df_mat['Material'].str.strip().str.lower()
+    if material_overrides:
+        overrides = {str(k).strip().lower(): str(v).strip().lower() for k, v in material_overrides.items()}
+        df_mat['Material_norm'] = df_mat['Material_norm'].replace(overrides)
 
     # Merge mit Mapping
     df_merged = pd.merge(df_mat, df_map,
@@ -93,27 +970,353 @@ def read_materials_and_map(
 
     # Final Amount (A1)
     df_merged['Final_Unit_A1'] = df_merged['Process_unit_A1'].fillna('kg')
-    df_merged['Final_Amount_A1'] = df_merged.apply(
-        lambda r: r['Amount'] * (r['Conversion_factor_A1'] if pd.notna(r['Conversion_factor_A1']) else 1.0),
-        axis=1
-    )
+    df_merged['Final_Amount_A1'] = df_merged['Amount'] * df_merged['Conversion_factor_A1'].fillna(1.0)
+
+    # Falls A3 vorhanden
+    df_merged['Final_Unit_A3'] = df_merged['Process_unit_A3']
+    df_merged['Final_Amount_A3'] = (
+        df_merged['Final_Amount_A1'] * df_merged['Conversion_factor_A3'].fillna(1.0)
+    ).where(df_merged['Process_uuid_A3'].notna())
+
+    columns = ['Material', 'Amount',
+               'Final_Amount_A1', 'Final_Unit_A1', 'Process_uuid_A1',
+               'Final_Amount_A3', 'Final_Unit_A3', 'Process_uuid_A3']
+    # Struktur einer mehrstufigen BoM (siehe parse_bom_materials)
+    columns += [column for column in ('Level', 'Assembly') if column in df_merged.columns]
+    return df_merged[columns]
+
+
+def new_local_ids(count: int) -> List[str]:
+    """
+    Erzeugt count zufällige UUID4-Strings mit einem einzigen Aufruf von os.urandom.
+
+    Args:
+        count: Anzahl der benötigten IDs
+
+    Returns:
+        Liste von UUID-Strings
+    """
+    raw = os.urandom(16 * count)
+    return [str(uuid.UUID(bytes=raw[i:i + 16], version=4)) for i in range(0, 16 * count, 16)]
+
+
+def deterministic_local_ids(
+    keys: List[Tuple[str, str]],
+    repository: str,
+    parent_id: str
+) -> List[str]:
+    """
+    Erzeugt inhaltsadressierte IDs (uuid5) für Komponenten.
+
+    Die ID hängt von Komponentenname, Prozess-UUID, Repository und Eltern-ID ab. Mehrfach
+    vorkommende identische Schlüssel werden in Reihenfolge durchnummeriert, damit die IDs
+    innerhalb eines Payloads eindeutig bleiben.
+
+    Args:
+        keys: Liste von (Komponentenname, Prozess-UUID) in Ausgabereihenfolge
+        repository: Repository der Komponenten
+        parent_id: ID der übergeordneten Komponente
+
+    Returns:
+        Liste von UUID-Strings
+    """
+    seen: Dict[str, int] = {}
+    ids = []
+    for name, process_uuid in keys:
+        base = f"{parent_id}|{name}|{process_uuid}|{repository}"
+        occurrence = seen.get(base, 0)
+        seen[base] = occurrence + 1
+        ids.append(str(uuid.uuid5(EPD_ID_NAMESPACE, base if occurrence == 0 else f"{base}|{occurrence}")))
+    return ids
+
+
+def deterministic_root_id(full_name: str, target_repository: str) -> str:
+    """Inhaltsadressierte ID der Wurzelkomponente eines EPDs (siehe deterministic_local_ids)."""
+    return str(uuid.uuid5(EPD_ID_NAMESPACE, f"{target_repository}|{str(full_name).strip()}"))
+
+
+def _float_column(values: pd.Series) -> List[float]:
+    """Wandelt eine Mengenspalte in floats um (Komma als Dezimaltrennzeichen erlaubt)."""
+    if pd.api.types.is_numeric_dtype(values):
+        return values.astype(float).tolist()
+    as_str = values.where(values.notna(), '').astype(str).str.replace(",", ".", regex=False)
+    return pd.to_numeric(as_str, errors='coerce').astype(float).tolist()
+
+
+def _str_column(values: pd.Series) -> List[str]:
+    """Wandelt eine Spalte in getrimmte Strings um (fehlende Werte werden zu 'nan')."""
+    return [str(v).strip() for v in values.tolist()]
+
+
+def _component_lines(df: pd.DataFrame) -> List[Tuple[Any, str, str, str, float, str]]:
+    """
+    Zerlegt den gemappten DataFrame spaltenweise in Komponentenzeilen.
+
+    Returns:
+        Liste von (Zeilenindex, Material, Modul, Prozess-UUID, Menge, Einheit) in Ausgabereihenfolge
+        (A1, danach ggf. A3 je Material); Modul ist "A1" oder "A3"
+    """
+    lines = df.index.tolist()
+    materials = _str_column(df["Material"])
+    amounts_a1 = _float_column(df["Final_Amount_A1"])
+    units_a1 = _str_column(df["Final_Unit_A1"])
+    uuids_a1 = _str_column(df["Process_uuid_A1"])
+
+    has_a3 = df["Process_uuid_A3"].notna().tolist()
+    amounts_a3 = _float_column(df["Final_Amount_A3"])
+    units_a3_raw = df["Final_Unit_A3"]
+    units_a3 = [str(v).strip() if present else None
+                for v, present in zip(units_a3_raw.tolist(), units_a3_raw.notna().tolist())]
+    uuids_a3 = _str_column(df["Process_uuid_A3"])
+
+    result = []
+    for line, material, amount_a1, unit_a1, epd_uuid_a1, a3, amount_a3, unit_a3, epd_uuid_a3 in zip(
+            lines, materials, amounts_a1, units_a1, uuids_a1, has_a3, amounts_a3, units_a3, uuids_a3):
+        result.append((line, material, "A1", epd_uuid_a1, amount_a1, unit_a1))
+        # A3 nur wenn vorhanden
+        if a3:
+            result.append((line, material, "A3", epd_uuid_a3, amount_a3,
+                           unit_a3 if unit_a3 is not None else unit_a1))
+    return result
+
+
+# Namenszusatz der Komponenten je Modul
+COMPONENT_NAME_SUFFIX = {"A1": " (A1)", "A3": " (A3 process)"}
+
+
+def _local_ids(keys: List[Tuple[str, str]], root_repository: str, parent_id: Optional[str]) -> List[str]:
+    """Zufällige oder (mit parent_id) deterministische IDs für die gegebenen Komponenten."""
+    if parent_id is None:
+        return new_local_ids(len(keys))
+    return deterministic_local_ids(keys, root_repository, parent_id)
+
+
+def build_inputs_and_components(
+    df: pd.DataFrame,
+    root_repository: str,
+    parent_id: Optional[str] = None
+) -> Tuple[List[Dict], List[Dict]]:
+    """
+    Baut inputs und components für A1 und optional A3 spaltenweise aus dem DataFrame.
+
+    Die Spalten werden einmalig als Listen extrahiert und die lokalen IDs gesammelt
+    erzeugt (siehe new_local_ids); Reihenfolge und Inhalt der Einträge entsprechen
+    der zeilenweisen Verarbeitung (A1, danach ggf. A3 je Material).
+
+    Args:
+        df: DataFrame mit Materialien und UUIDs (siehe read_materials_and_map)
+        root_repository: URL des Root-Repositories (Ecoinvent)
+        parent_id: Wenn gesetzt, werden deterministische IDs unterhalb dieser Eltern-ID
+            erzeugt (siehe deterministic_local_ids), sonst zufällige UUID4
+
+    Returns:
+        Tuple von (inputs, components) für die API
+    """
+    lines = _component_lines(df)
+    names = [material + COMPONENT_NAME_SUFFIX[module] for _, material, module, _, _, _ in lines]
+    ids = _local_ids([(name, line[3]) for name, line in zip(names, lines)], root_repository, parent_id)
+
+    components = []
+    inputs = []
+    for local_id, name, (_, _, _, epd_uuid, amount, unit) in zip(ids, names, lines):
+        components.append({
+            "id": local_id,
+            "name": name,
+            "epd": epd_uuid,
+            "repository": root_repository
+        })
+        inputs.append({
+            "component": local_id,
+            "amount": amount,
+            "unit": unit
+        })
+
+    return inputs, components
+
+
+def build_aggregated_inputs_and_components(
+    df: pd.DataFrame,
+    root_repository: str,
+    parent_id: Optional[str] = None
+) -> Tuple[List[Dict], List[Dict], Dict[str, List[Dict]]]:
+    """
+    Wie build_inputs_and_components, fasst aber BoM-Zeilen mit gleicher Prozess-UUID, Einheit
+    und gleichem Modul (A1/A3) zu einer Komponente zusammen (Mengen werden summiert).
+
+    Die Komponenten erscheinen in der Reihenfolge ihres ersten Vorkommens. Der Name ist der
+    des ersten Materials; bei mehreren verschiedenen Materialien wird die Anzahl angehängt.
+
+    Args:
+        df: DataFrame mit Materialien und UUIDs (siehe read_materials_and_map)
+        root_repository: URL des Root-Repositories (Ecoinvent)
+        parent_id: Wenn gesetzt, werden deterministische IDs erzeugt (siehe deterministic_local_ids)
+
+    Returns:
+        Tuple von (inputs, components, trace); trace ordnet jeder Komponenten-ID die
+        zusammengefassten BoM-Zeilen (Zeilenindex, Material, Modul, Menge) zu
+    """
+    groups: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+    for line, material, module, epd_uuid, amount, unit in _component_lines(df):
+        # A1- und A3-Zeilen bleiben getrennt, auch wenn sie auf denselben Prozess verweisen
+        key = (epd_uuid, unit, module)
+        group = groups.get(key)
+        if group is None:
+            group = groups[key] = {"module": module, "amount": 0.0, "materials": [], "lines": []}
+        group["amount"] += amount
+        if material not in group["materials"]:
+            group["materials"].append(material)
+        group["lines"].append({"line": line, "material": material, "module": module, "amount": amount})
+
+    names = []
+    for group in groups.values():
+        name = group["materials"][0]
+        if len(group["materials"]) > 1:
+            name += f" (+{len(group['materials']) - 1} weitere)"
+        names.append(name + COMPONENT_NAME_SUFFIX[group["module"]])
+    ids = _local_ids([(name, epd_uuid) for name, (epd_uuid, _, _) in zip(names, groups)], root_repository, parent_id)
+
+    components = []
+    inputs = []
+    trace = {}
+    for local_id, name, ((epd_uuid, unit, _), group) in zip(ids, names, groups.items()):
+        components.append({
+            "id": local_id,
+            "name": name,
+            "epd": epd_uuid,
+            "repository": root_repository
+        })
+        inputs.append({
+            "component": local_id,
+            "amount": group["amount"],
+            "unit": unit
+        })
+        trace[local_id] = group["lines"]
+
+    return inputs, components, trace
+
+
+# Einheit, in der Baugruppen einer mehrstufigen BoM in ihre übergeordnete Baugruppe eingehen
+ASSEMBLY_UNIT = "Item(s)"
+
+
+def _bom_tree(df: pd.DataFrame) -> Dict[str, Any]:
+    """
+    Baut aus den Spalten 'Level' und 'Assembly' die Baugruppenstruktur.
+
+    Returns:
+        Wurzelknoten; jeder Knoten hat 'leaves' (Zeilenpositionen der Einzelteile) und
+        'children' (Baugruppen mit 'name' und 'amount')
+    """
+    levels = df["Level"].tolist()
+    assemblies = df["Assembly"].tolist()
+    materials = _str_column(df["Material"])
+    amounts = _float_column(df["Amount"])
+
+    root = {"level": min(levels, default=1) - 1, "leaves": [], "children": []}
+    stack = [root]
+    for pos, (level, is_assembly) in enumerate(zip(levels, assemblies)):
+        while stack[-1]["level"] >= level:
+            stack.pop()
+        parent = stack[-1]
+        if is_assembly:
+            node = {"level": level, "name": materials[pos], "amount": amounts[pos], "leaves": [], "children": []}
+            parent["children"].append(node)
+            stack.append(node)
+        else:
+            parent["leaves"].append(pos)
+    return root
+
+
+def build_tree_inputs_and_components(
+    df: pd.DataFrame,
+    root_repository: str,
+    target_repository: str,
+    parent_id: Optional[str] = None,
+    aggregate: bool = False,
+    assembly_unit: str = ASSEMBLY_UNIT
+) -> Tuple[List[Dict], List[Dict], Optional[Dict[str, List[Dict]]]]:
+    """
+    Baut inputs und components für eine mehrstufige BoM (Spalten 'Level' und 'Assembly').
+
+    Jede Baugruppe wird eine eigene Komponente im Ziel-Repository, deren inputs ihre
+    Einzelteile (wie in build_inputs_and_components) und Unter-Baugruppen sind. Baugruppen
+    mit gleichem Namen und gleichem Inhalt werden nur einmal erzeugt und überall
+    referenziert. Einzelteile ohne A1-UUID werden übersprungen.
+
+    Args:
+        df: Gemappter DataFrame inkl. 'Level' und 'Assembly' (siehe read_materials_and_map)
+        root_repository: URL des Root-Repositories (Ecoinvent)
+        target_repository: URL des Ziel-Repositories (für die Baugruppen)
+        parent_id: Wenn gesetzt, werden deterministische IDs erzeugt; Baugruppen-IDs hängen
+            dann nur von ihrem Inhalt ab
+        aggregate: Wenn True, werden gleiche Prozesse je Baugruppe zusammengefasst
+            (siehe build_aggregated_inputs_and_components)
+        assembly_unit: Einheit der Baugruppen-Mengen
+
+    Returns:
+        Tuple von (inputs, components, trace) mit den inputs der Wurzelkomponente und allen
+        Komponenten (Unter-Baugruppen vor den übergeordneten); trace nur bei aggregate=True
+    """
+    found = df["Process_uuid_A1"].notna().tolist()
+    components: List[Dict] = []
+    trace: Optional[Dict[str, List[Dict]]] = {} if aggregate else None
+    assembly_ids: Dict[str, str] = {}
+
+    def leaf_inputs(node: Dict[str, Any], node_id: Optional[str]) -> List[Dict]:
+        df_leaves = df.iloc[[pos for pos in node["leaves"] if found[pos]]]
+        if aggregate:
+            inputs, leaf_components, leaf_trace = build_aggregated_inputs_and_components(
+                df_leaves, root_repository, node_id)
+            trace.update(leaf_trace)
+        else:
+            inputs, leaf_components = build_inputs_and_components(df_leaves, root_repository, node_id)
+        components.extend(leaf_components)
+        return inputs
+
+    def assembly_inputs(node: Dict[str, Any]) -> List[Dict]:
+        return [{"component": emit(child), "amount": child["amount"], "unit": assembly_unit}
+                for child in node["children"]]
 
-    # Falls A3 vorhanden
-    df_merged['Final_Unit_A3'] = df_merged['Process_unit_A3']
-    df_merged['Final_Amount_A3'] = df_merged.apply(
-        lambda r: r['Final_Amount_A1'] * (r['Conversion_factor_A3'] if pd.notna(r['Conversion_factor_A3']) else 1.0)
-        if pd.notna(r['Process_uuid_A3']) else None,
-        axis=1
-    )
+    def signature(node: Dict[str, Any]) -> str:
+        """Inhaltsschlüssel einer Baugruppe (Name, Einzelteile, Unter-Baugruppen mit Mengen)."""
+        if "signature" not in node:
+            df_leaves = df.iloc[[pos for pos in node["leaves"] if found[pos]]]
+            content = [node["name"],
+                       [line[1:] for line in _component_lines(df_leaves)],
+                       [[signature(child), child["amount"]] for child in node["children"]]]
+            node["signature"] = hashlib.sha256(json.dumps(content, default=str).encode("utf-8")).hexdigest()
+        return node["signature"]
+
+    def emit(node: Dict[str, Any]) -> str:
+        """Erzeugt die Komponente einer Baugruppe (einmal je Inhalt) und liefert ihre ID."""
+        node_signature = signature(node)
+        if node_signature in assembly_ids:
+            return assembly_ids[node_signature]
+        if parent_id is None:
+            node_id = new_local_ids(1)[0]
+            inputs = leaf_inputs(node, None)
+        else:
+            node_id = str(uuid.uuid5(EPD_ID_NAMESPACE, f"{target_repository}|assembly|{node_signature}"))
+            inputs = leaf_inputs(node, node_id)
+        components.append({
+            "id": node_id,
+            "name": node["name"],
+            "inputs": inputs + assembly_inputs(node),
+            "repository": target_repository
+        })
+        assembly_ids[node_signature] = node_id
+        return node_id
 
-    return df_merged[['Material', 'Amount',
-                      'Final_Amount_A1', 'Final_Unit_A1', 'Process_uuid_A1',
-                      'Final_Amount_A3', 'Final_Unit_A3', 'Process_uuid_A3']]
+    root = _bom_tree(df)
+    inputs = leaf_inputs(root, parent_id) + assembly_inputs(root)
+    return inputs, components, trace
 
 
 def read_excel_like_reference(df: pd.DataFrame, root_repository: str) -> tuple[List[Dict], List[Dict]]:
     """
     Baut inputs und components für A1 und optional A3 aus dem DataFrame.
+
+    Entspricht build_inputs_and_components (bleibt aus Kompatibilitätsgründen erhalten).
     
     Args:
         df: DataFrame mit Materialien und UUIDs
@@ -122,53 +1325,7 @@ def read_excel_like_reference(df: pd.DataFrame, root_repository: str) -> tuple[L
     Returns:
         Tuple von (inputs, components) für die API
     """
-    components = []
-    inputs = []
-
-    for _, row in df.iterrows():
-        # A1
-        material = str(row["Material"]).strip()
-        amount_a1 = float(str(row["Final_Amount_A1"]).replace(",", "."))
-        unit_a1 = str(row["Final_Unit_A1"]).strip()
-        epd_uuid_a1 = str(row["Process_uuid_A1"]).strip()
-
-        local_id_a1 = str(uuid.uuid4())
-
-        components.append({
-            "id": local_id_a1,
-            "name": material + " (A1)",
-            "epd": epd_uuid_a1,
-            "repository": root_repository
-        })
-
-        inputs.append({
-            "component": local_id_a1,
-            "amount": amount_a1,
-            "unit": unit_a1
-        })
-
-        # A3 nur wenn vorhanden
-        if pd.notna(row["Process_uuid_A3"]):
-            amount_a3 = float(str(row["Final_Amount_A3"]).replace(",", ".")) if row["Final_Amount_A3"] is not None else 0.0
-            unit_a3 = str(row["Final_Unit_A3"]).strip() if pd.notna(row["Final_Unit_A3"]) else unit_a1
-            epd_uuid_a3 = str(row["Process_uuid_A3"]).strip()
-
-            local_id_a3 = str(uuid.uuid4())
-
-            components.append({
-                "id": local_id_a3,
-                "name": material + " (A3 process)",
-                "epd": epd_uuid_a3,
-                "repository": root_repository
-            })
-
-            inputs.append({
-                "component": local_id_a3,
-                "amount": amount_a3,
-                "unit": unit_a3
-            })
-
-    return inputs, components
+    return build_inputs_and_components(df, root_repository)
 
 
 def generate_payload(
@@ -178,7 +1335,8 @@ def generate_payload(
     epd_unit: str,
     target_repository: str,
     auth_list: List[Dict],
-    method_lib: Dict
+    method_lib: Dict,
+    root_id: Optional[str] = None
 ) -> Dict[str, Any]:
     """
     Generiert den JSON-Payload für die EPD-API.
@@ -191,11 +1349,13 @@ def generate_payload(
         target_repository: URL des Ziel-Repositories
         auth_list: Liste der Authentifizierungsdaten
         method_lib: Dictionary mit Method Library Informationen
+        root_id: ID der Wurzelkomponente (Standard: zufällige UUID4)
     
     Returns:
         Dictionary mit dem vollständigen Payload für die API
     """
-    root_id = str(uuid.uuid4())
+    if root_id is None:
+        root_id = str(uuid.uuid4())
 
     root_component = {
         "id": root_id,
@@ -217,43 +1377,815 @@ def generate_payload(
     }
 
 
-def save_json(data: Dict[str, Any], output_path: Path) -> None:
+# Einheiten, die für das EPD (Wurzel) zur Auswahl stehen (siehe GUI)
+EPD_UNITS = ("kg", "Item(s)", "m", "m²", "m³", "t")
+# Werte, die als fehlende Einheit gelten
+MISSING_UNITS = ("", "nan", "NaN", "None")
+
+
+def allowed_units(df_map: pd.DataFrame) -> Set[str]:
+    """
+    Zulässige Einheiten für validate_payload: alle Einheiten des geladenen Mappings (Spalten
+    'Process_unit_A1' und 'Process_unit_A3'), die EPD-Einheiten und die Einheit der Baugruppen.
+
+    Args:
+        df_map: Mapping-DataFrame (siehe load_mapping), nicht der gemappte Frame der BoM
+
+    Returns:
+        Menge der zulässigen Einheiten (ohne fehlende Werte wie "nan")
+    """
+    units = set(EPD_UNITS) | {ASSEMBLY_UNIT}
+    for column in ("Process_unit_A1", "Process_unit_A3"):
+        if column in df_map.columns:
+            units.update(_str_column(df_map[column].dropna().drop_duplicates()))
+    return units - set(MISSING_UNITS)
+
+
+def load_allowed_units(mapping_file: Union[str, Path], version: Optional[str] = None) -> Set[str]:
+    """
+    Wie allowed_units, aber direkt aus der Mapping-Datei bzw. -Datenbank.
+
+    Eine Excel-Datei wird über ihren Sidecar gelesen (siehe load_mapping); aus einer
+    Mapping-Datenbank werden nur die Einheiten der Version abgefragt.
+
+    Args:
+        mapping_file: Pfad zur Mapping-Datei bzw. -Datenbank
+        version: Nur bei einer Mapping-Datenbank: Version (None = neueste)
+    """
+    if is_mapping_database(mapping_file):
+        from bom_to_epd_mappingdb import MappingStore
+
+        with MappingStore(mapping_file) as store:
+            return allowed_units(store.unit_frame(version))
+    return allowed_units(load_compiled_sidecar(mapping_file, MAPPING_CACHE_SUFFIX, _read_mapping_excel))
+
+
+# Beispiele je Problemart in den Meldungen von validate_payload
+VALIDATION_EXAMPLES = 5
+
+
+def _problem(errors: List[str], text: str, examples: List[str]) -> None:
+    """Fasst gleichartige Probleme zu einer Meldung mit Anzahl und Beispielen zusammen."""
+    if not examples:
+        return
+    shown = ", ".join(examples[:VALIDATION_EXAMPLES])
+    more = f" und {len(examples) - VALIDATION_EXAMPLES} weitere" if len(examples) > VALIDATION_EXAMPLES else ""
+    errors.append(f"{len(examples)} {text}: {shown}{more}")
+
+
+def validate_payload(payload: Any, known_units: Optional[Iterable[str]] = None) -> List[str]:
+    """
+    Prüft einen Payload (siehe generate_payload) lokal, bevor er an die API geht.
+
+    Geprüft werden Aufbau, eindeutige Komponenten-IDs, Referenzen der inputs und der Wurzel,
+    leere inputs, Zyklen zwischen Komponenten, Mengen (endlich und > 0) und Einheiten. Die
+    Prüfungen laufen spaltenweise über alle inputs auf einmal; gleichartige Probleme werden
+    zu einer Meldung mit Beispielen zusammengefasst.
+
+    Args:
+        payload: Zu prüfender Payload
+        known_units: Zulässige Einheiten (siehe allowed_units); None = nur fehlende Einheiten
+            ("", "nan") melden
+
+    Returns:
+        Liste der Probleme (leer, wenn der Payload gültig ist)
+    """
+    if not isinstance(payload, dict):
+        return ["Payload ist kein JSON-Objekt"]
+    errors = [f"Feld '{key}' fehlt" for key in ("auth", "methodLib", "root", "components") if key not in payload]
+    components = payload.get("components")
+    if not isinstance(components, list):
+        return errors + ["'components' ist keine Liste"]
+    if not components:
+        errors.append("'components' ist leer")
+    objects = [component for component in components if isinstance(component, dict)]
+    if len(objects) < len(components):
+        errors.append(f"{len(components) - len(objects)} Komponenten sind keine JSON-Objekte")
+
+    ids = pd.Series([component.get("id") for component in objects], dtype=object)
+
+    def label(position: int) -> str:
+        component = objects[position]
+        return repr(component.get("name", component.get("id")))
+
+    _problem(errors, "Komponenten ohne 'id'", [label(i) for i in np.flatnonzero(ids.isna().to_numpy())])
+    duplicated = ids.notna() & ids.duplicated()
+    _problem(errors, "doppelte Komponenten-IDs", [str(v) for v in ids[duplicated].unique()])
+
+    # inputs aller Komponenten in flache Spalten zerlegen
+    parents: List[int] = []
+    flat: List[Dict[str, Any]] = []
+    without_content, empty_inputs, bad_inputs, bad_leaves = [], [], [], []
+    for position, component in enumerate(objects):
+        if "inputs" not in component:
+            if "epd" not in component:
+                without_content.append(label(position))
+            elif not component.get("repository") or str(component["epd"]).strip() in ("", "nan", "None"):
+                bad_leaves.append(label(position))
+            continue
+        items = component["inputs"]
+        if not isinstance(items, list) or not all(isinstance(item, dict) for item in items):
+            bad_inputs.append(label(position))
+            continue
+        if not items:
+            empty_inputs.append(label(position))
+        parents.extend([position] * len(items))
+        flat.extend(items)
+    _problem(errors, "Komponenten ohne 'epd' und ohne 'inputs'", without_content)
+    _problem(errors, "Komponenten mit leeren inputs", empty_inputs)
+    _problem(errors, "Komponenten mit ungültigen inputs (keine Liste von Objekten)", bad_inputs)
+    _problem(errors, "Prozess-Komponenten ohne Prozess-UUID oder Repository", bad_leaves)
+
+    root = payload.get("root")
+    if not isinstance(root, dict):
+        if "root" in payload:
+            errors.append("'root' ist kein JSON-Objekt")
+        root = None
+    else:
+        # Die Wurzel wird wie ein weiterer input geprüft (Elternposition -1)
+        parents.append(-1)
+        flat.append(root)
+    references = [item.get("component") for item in flat]
+    amounts = [item.get("amount") for item in flat]
+    units = [item.get("unit") for item in flat]
+
+    parent = np.asarray(parents, dtype=np.int64)
+    unique_ids = pd.Index(ids[ids.notna() & ~duplicated])
+    first_position = np.flatnonzero((ids.notna() & ~duplicated).to_numpy())
+    found = unique_ids.get_indexer(pd.Index(references, dtype=object)) if references else np.empty(0, np.int64)
+    target = np.where(found >= 0, first_position[np.maximum(found, 0)] if len(first_position) else -1, -1)
+
+    def where(mask: Any) -> List[str]:
+        """Beschreibung der betroffenen inputs ("Eltern -> Referenz")."""
+        return [f"{label(p) if p >= 0 else 'root'} -> {label(t) if t >= 0 else repr(references[i])}"
+                for i, p, t in zip(np.flatnonzero(mask), parent[mask], target[mask])]
+
+    _problem(errors, "Referenzen auf unbekannte Komponenten", where(target < 0))
+
+    values = pd.to_numeric(pd.Series(amounts, dtype=object), errors="coerce").to_numpy(dtype=float)
+    bad_amount = ~(np.isfinite(values) & (values > 0))
+    _problem(errors, "Mengen nicht endlich oder nicht > 0",
+             [f"{text} ({amounts[i]!r})" for text, i in zip(where(bad_amount), np.flatnonzero(bad_amount))])
+
+    unit_series = pd.Series(units, dtype=object)
+    missing_unit = (unit_series.isna() | unit_series.isin(MISSING_UNITS)).to_numpy()
+    bad_unit = missing_unit | (~unit_series.isin(set(known_units)).to_numpy() if known_units is not None else False)
+    _problem(errors, "unbekannte oder fehlende Einheiten",
+             [f"{text} ({units[i]!r})" for text, i in zip(where(bad_unit), np.flatnonzero(bad_unit))])
+
+    # Zyklen: Quellen und Senken schichtweise entfernen; übrig bleiben Komponenten in Zyklen
+    edges = (parent >= 0) & (target >= 0)
+    source, sink = parent[edges], target[edges]
+    alive = np.ones(len(objects), dtype=bool)
+    while True:
+        live_edges = alive[source] & alive[sink]
+        in_degree = np.bincount(sink[live_edges], minlength=len(objects))
+        out_degree = np.bincount(source[live_edges], minlength=len(objects))
+        removable = alive & ((in_degree == 0) | (out_degree == 0))
+        if not removable.any():
+            break
+        alive &= ~removable
+    _problem(errors, "Komponenten in einem Zyklus", [label(i) for i in np.flatnonzero(alive)])
+    return errors
+
+
+def encode_json(data: Any, pretty: bool = False) -> bytes:
+    """
+    Serialisiert Daten einmalig zu UTF-8-kodiertem JSON.
+
+    Verwendet orjson, falls installiert, sonst das json-Modul. Standardmäßig kompakt;
+    pretty=True erzeugt eingerücktes JSON (Debug-Modus).
+
+    Args:
+        data: Zu serialisierende Daten (z.B. Payload)
+        pretty: Wenn True, mit Einrückung (2 Leerzeichen)
+
+    Returns:
+        JSON als Bytes
+    """
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 if pretty else 0)
+    if pretty:
+        return json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8")
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def save_json(
+    data: Union[Dict[str, Any], bytes],
+    output_path: Path,
+    pretty: bool = False,
+    compress: bool = False
+) -> Path:
     """
     Speichert das JSON in einer Datei.
     
     Args:
-        data: Dictionary mit den zu speichernden Daten
+        data: Dictionary mit den zu speichernden Daten oder bereits kodiertes JSON (siehe encode_json)
         output_path: Pfad zur Ausgabedatei
+        pretty: Wenn True, eingerückt speichern (nur wenn data kein bereits kodiertes JSON ist)
+        compress: Wenn True, gzip-komprimiert speichern (Endung ".gz" wird ergänzt)
+
+    Returns:
+        Pfad der geschriebenen Datei
+    """
+    body = data if isinstance(data, bytes) else encode_json(data, pretty)
+    output_path = Path(output_path)
+    if compress:
+        if output_path.suffix != ".gz":
+            output_path = output_path.with_name(output_path.name + ".gz")
+        body = gzip.compress(body, compresslevel=6)
+    with open(output_path, 'wb') as f:
+        f.write(body)
+    return output_path
+
+
+def load_json(path: Union[str, Path]) -> Tuple[Any, bytes]:
+    """
+    Liest eine mit save_json geschriebene Datei (auch gzip-komprimiert).
+
+    Returns:
+        Tuple von (Daten, unkomprimiertes JSON als Bytes)
+    """
+    path = Path(path)
+    with open(path, 'rb') as f:
+        body = f.read()
+    if path.suffix == ".gz":
+        body = gzip.decompress(body)
+    return (orjson.loads(body) if orjson is not None else json.loads(body)), body
+
+
+def payload_hash(payload: Dict[str, Any]) -> str:
+    """
+    Kanonischer SHA-256-Hash eines Payloads.
+
+    Die Authentifizierungsdaten werden ignoriert; Ziel-Repository (Wurzelkomponente) und
+    Method Library sind Teil des Hashes.
+    """
+    canonical = {k: v for k, v in payload.items() if k != "auth"}
+    encoded = json.dumps(canonical, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class SubmissionLedger:
+    """
+    Lokales, append-only Protokoll erfolgreicher API-Übermittlungen (JSON Lines).
+
+    Schlüssel ist der kanonische Payload-Hash (siehe payload_hash). Ein identischer Payload
+    wurde damit bereits gegen dasselbe Ziel-Repository und dieselbe Method Library berechnet,
+    und die gespeicherte Antwort kann wiederverwendet werden. Sinnvoll nur zusammen mit
+    deterministischen IDs (siehe deterministic_local_ids).
+
+    Args:
+        path: Pfad der Ledger-Datei
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        if self.path.exists():
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # abgebrochene letzte Zeile
+                    self._entries[entry["hash"]] = entry
+
+    def lookup(self, payload: Dict[str, Any]) -> Optional[requests.Response]:
+        """Liefert die gespeicherte Antwort für einen identischen Payload oder None."""
+        entry = self._entries.get(payload_hash(payload))
+        if entry is None:
+            return None
+        return _response_from_record(entry)
+
+    def record(self, payload: Dict[str, Any], resp: requests.Response) -> None:
+        """Speichert eine erfolgreiche Antwort (Antworten mit Fehlerstatus werden ignoriert)."""
+        if not resp.ok:
+            return
+        entry = {
+            "hash": payload_hash(payload),
+            "target_repository": payload["components"][-1].get("repository"),
+            "method_lib": payload.get("methodLib"),
+            **_response_to_record(resp),
+            "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%S")
+        }
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self._entries[entry["hash"]] = entry
+
+
+def _response_to_record(resp: requests.Response) -> Dict[str, Any]:
+    """JSON-taugliche Kopie einer API-Antwort (siehe _response_from_record)."""
+    return {
+        "status_code": resp.status_code,
+        "url": resp.url,
+        "headers": {"content-type": resp.headers.get("content-type", "")},
+        "encoding": resp.encoding,
+        "content": base64.b64encode(resp.content).decode("ascii")
+    }
+
+
+def _response_from_record(entry: Dict[str, Any]) -> requests.Response:
+    """Baut aus einer gespeicherten Antwort wieder ein Response-Objekt."""
+    resp = requests.Response()
+    resp.status_code = entry["status_code"]
+    resp.url = entry.get("url", "")
+    resp.headers.update(entry.get("headers", {}))
+    resp.encoding = entry.get("encoding")
+    resp._content = base64.b64decode(entry["content"])
+    return resp
+
+
+def material_changes(df_old: Optional[pd.DataFrame], df_new: pd.DataFrame) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Vergleicht zwei gemappte Frames (siehe read_materials_and_map) je Material.
+
+    Mengen gleicher Materialien werden summiert; ein Material gilt als geändert, wenn sich
+    Menge, Einheit oder Prozess-UUID (A1/A3) unterscheiden.
+
+    Returns:
+        Dictionary mit 'added', 'removed' und 'changed' (je Material alte und neue Werte)
+    """
+    def summary(df: Optional[pd.DataFrame]) -> pd.DataFrame:
+        if df is None or df.empty:
+            return pd.DataFrame(columns=["Amount", "Unit", "Process_uuid_A1", "Process_uuid_A3"])
+        grouped = df.assign(Material=df["Material"].astype(str).str.strip()).groupby("Material", sort=False)
+        return pd.DataFrame({
+            "Amount": grouped["Final_Amount_A1"].sum(),
+            "Unit": grouped["Final_Unit_A1"].first(),
+            "Process_uuid_A1": grouped["Process_uuid_A1"].first(),
+            "Process_uuid_A3": grouped["Process_uuid_A3"].first(),
+        })
+
+    def values(row: pd.Series) -> Dict[str, Any]:
+        # numpy-Skalare in Python-Typen umwandeln (JSON)
+        return {key: (None if pd.isna(value) else getattr(value, "item", lambda: value)())
+                for key, value in row.items()}
+
+    old, new = summary(df_old), summary(df_new)
+    added = [{"material": m, **values(new.loc[m])} for m in new.index.difference(old.index, sort=False)]
+    removed = [{"material": m, **values(old.loc[m])} for m in old.index.difference(new.index, sort=False)]
+    changed = []
+    for material in new.index.intersection(old.index, sort=False):
+        before, after = values(old.loc[material]), values(new.loc[material])
+        amount_changed = not math.isclose(before["Amount"] or 0.0, after["Amount"] or 0.0, rel_tol=1e-9, abs_tol=1e-12)
+        if amount_changed or any(before[key] != after[key] for key in ("Unit", "Process_uuid_A1", "Process_uuid_A3")):
+            changed.append({"material": material, "old": before, "new": after})
+    return {"added": added, "removed": removed, "changed": changed}
+
+
+class RunManifest:
+    """
+    Protokoll des letzten Laufs je EPD im Output-Verzeichnis (für BoM-Revisionen).
+
+    Je EPD werden der Fingerabdruck der Quelle (Datei-Hash, Sheet, Spalten, Mapping), der
+    Fingerabdruck des gemappten Frames samt Einstellungen, der gemappte Frame selbst
+    (runs/<EPD>.pkl) und die API-Antwort gespeichert. Eine neue Revision wird damit gegen den
+    letzten Lauf verglichen; unveränderte EPDs müssen weder neu erzeugt noch gesendet werden.
+
+    Args:
+        output_dir: Output-Verzeichnis (enthält run_manifest.json)
+    """
+
+    def __init__(self, output_dir: Union[str, Path]):
+        self.output_dir = Path(output_dir)
+        self.path = self.output_dir / RUN_MANIFEST_FILENAME
+        self._lock = threading.Lock()
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        if self.path.exists():
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    self.entries = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                self.entries = {}
+
+    @staticmethod
+    def source_fingerprint(file_path: Union[str, Path], mapping_file: Union[str, Path], **params: Any) -> str:
+        """Fingerabdruck der Eingabedateien (Inhalt) und Leseparameter (Sheet, Spalten, ...)."""
+        content = {"bom": _file_sha256(Path(file_path)), "mapping": _file_sha256(Path(mapping_file)),
+                   "params": params}
+        return hashlib.sha256(json.dumps(content, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def input_fingerprint(df_mapped: pd.DataFrame, **settings: Any) -> str:
+        """Fingerabdruck des gemappten Frames und der Einstellungen, die den Payload bestimmen."""
+        digest = hashlib.sha256(pd.util.hash_pandas_object(df_mapped, index=False).values.tobytes())
+        digest.update(json.dumps(settings, sort_keys=True, default=str).encode("utf-8"))
+        return digest.hexdigest()
+
+    def lookup(self, name: str) -> Optional[Dict[str, Any]]:
+        return self.entries.get(name)
+
+    def frame_path(self, name: str) -> Path:
+        return self.output_dir / RUN_FRAMES_DIRNAME / f"{name}.pkl"
+
+    def load_frame(self, name: str) -> Optional[pd.DataFrame]:
+        """Gemappter Frame des letzten Laufs oder None."""
+        try:
+            return pd.read_pickle(self.frame_path(name))
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+
+    def response(self, name: str) -> Optional[requests.Response]:
+        """Gespeicherte erfolgreiche API-Antwort des letzten Laufs oder None."""
+        entry = self.entries.get(name)
+        if not entry or not entry.get("response") or entry["response"]["status_code"] >= 400:
+            return None
+        return _response_from_record(entry["response"])
+
+    def record(self, name: str, source: str, fingerprint: str, df_mapped: pd.DataFrame,
+               resp: Optional[requests.Response]) -> None:
+        """Speichert den Lauf eines EPDs (Manifest wird atomar ersetzt)."""
+        frame_path = self.frame_path(name)
+        frame_path.parent.mkdir(parents=True, exist_ok=True)
+        df_mapped.to_pickle(frame_path)
+        with self._lock:
+            self.entries[name] = {
+                "source": source,
+                "fingerprint": fingerprint,
+                "frame": str(frame_path.relative_to(self.output_dir)),
+                "response": _response_to_record(resp) if resp is not None else None,
+                "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%S")
+            }
+            self.save()
+
+    def touch(self, name: str, source: str) -> None:
+        """Übernimmt eine neue Quelle, deren gemappter Inhalt unverändert ist."""
+        with self._lock:
+            self.entries[name]["source"] = source
+            self.save()
+
+    def save(self) -> None:
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, ensure_ascii=False, indent=1)
+        tmp_path.replace(self.path)
+
+
+def _fsync_file(path: Union[str, Path]) -> None:
+    """Schreibt den Inhalt einer Datei auf den Datenträger."""
+    with open(path, "r+b") as f:
+        os.fsync(f.fileno())
+
+
+def _fsync_directory(path: Union[str, Path]) -> None:
+    """Macht neu angelegte bzw. umbenannte Dateien eines Verzeichnisses dauerhaft (nur POSIX)."""
+    if os.name != "posix":
+        return
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class JobJournal:
+    """
+    Absturzsicheres, append-only Journal der EPD-Erstellung im Output-Verzeichnis (JSON Lines).
+
+    Je EPD werden die abgeschlossenen Stufen protokolliert: "parsed" (gemappter Frame unter
+    journal/<EPD>.pkl), "payload_written" (Payload-Datei), "submitted" (Anfrage unterwegs) und
+    "response_stored" (API-Antwort im Journal). Jede Zeile wird vor dem Weiterarbeiten mit
+    fsync geschrieben; eine beim Absturz abgeschnittene letzte Zeile wird beim Öffnen verworfen.
+    Ein erneuter Lauf setzt damit je EPD nach der letzten abgeschlossenen Stufe fort, solange
+    der Fingerabdruck der Quelle (siehe RunManifest.source_fingerprint) unverändert ist.
+
+    Args:
+        output_dir: Output-Verzeichnis (enthält job_journal.jsonl)
     """
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-    print(f"JSON gespeichert unter: {output_path}")
 
+    def __init__(self, output_dir: Union[str, Path]):
+        self.output_dir = Path(output_dir)
+        self.path = self.output_dir / JOURNAL_FILENAME
+        self._lock = threading.Lock()
+        # Zustand je EPD: letzte Stufe und die Daten der Stufen seit dem letzten "parsed"
+        self.states: Dict[str, Dict[str, Any]] = {}
+        if self.path.exists():
+            with open(self.path, "rb+") as f:
+                content = f.read()
+                complete = content.rfind(b"\n") + 1
+                if complete < len(content):
+                    # Abgeschnittene letzte Zeile entfernen, sonst hängt die nächste Zeile daran
+                    f.truncate(complete)
+            for line in content[:complete].splitlines():
+                try:
+                    self._apply(json.loads(line))
+                except (json.JSONDecodeError, KeyError):
+                    continue
+
+    def _apply(self, entry: Dict[str, Any]) -> None:
+        name = entry["epd"]
+        if entry["stage"] == "parsed" or name not in self.states:
+            self.states[name] = {}
+        self.states[name].update(entry)
+
+    def record(self, name: str, stage: str, **data: Any) -> None:
+        """Hängt eine Stufe an das Journal an und wartet, bis sie auf dem Datenträger ist."""
+        if stage not in JOURNAL_STAGES:
+            raise ValueError(f"Unbekannte Journal-Stufe: {stage}")
+        entry = {"epd": name, "stage": stage, **data, "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%S")}
+        line = json.dumps(entry, ensure_ascii=False, default=str) + "\n"
+        with self._lock:
+            created = not self.path.exists()
+            self.output_dir.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+            if created:
+                _fsync_directory(self.output_dir)
+            self._apply(entry)
+
+    def state(self, name: str, source: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Zustand eines EPDs (Schlüssel 'stage' = letzte abgeschlossene Stufe) oder None.
+
+        Mit source wird nur ein Zustand zu derselben Quelle geliefert; bei geänderter BoM oder
+        geänderten Einstellungen beginnt das EPD von vorn.
+        """
+        state = self.states.get(name)
+        if state is None or (source is not None and state.get("source") != source):
+            return None
+        return state
+
+    def frame_path(self, name: str) -> Path:
+        return self.output_dir / JOURNAL_FRAMES_DIRNAME / f"{name}.pkl"
+
+    def record_parsed(self, name: str, source: str, df_mapped: Optional[pd.DataFrame] = None,
+                      **job: Any) -> None:
+        """
+        Protokolliert das Einlesen eines EPDs.
+
+        Args:
+            source: Fingerabdruck der Quelle
+            df_mapped: Gemappter Frame; wird atomar gespeichert und beim Fortsetzen wiederverwendet
+            job: Leseparameter des Auftrags (Datei, Sheet, Spalten, ...) für das Fortsetzen
+        """
+        frame = None
+        if df_mapped is not None:
+            frame_path = self.frame_path(name)
+            frame_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = frame_path.with_name(frame_path.name + ".tmp")
+            df_mapped.to_pickle(tmp_path)
+            _fsync_file(tmp_path)
+            tmp_path.replace(frame_path)
+            _fsync_directory(frame_path.parent)
+            frame = str(frame_path.relative_to(self.output_dir))
+        self.record(name, "parsed", source=source, frame=frame, job=job or None)
+
+    def load_frame(self, name: str) -> Optional[pd.DataFrame]:
+        """Gemappter Frame aus der Stufe "parsed" oder None."""
+        state = self.states.get(name)
+        if not state or not state.get("frame"):
+            return None
+        try:
+            return pd.read_pickle(self.output_dir / state["frame"])
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+
+    def record_payload(self, name: str, path: Union[str, Path]) -> None:
+        """Protokolliert die geschriebene Payload-Datei (wird zuvor auf den Datenträger geschrieben)."""
+        _fsync_file(path)
+        _fsync_directory(Path(path).parent)
+        self.record(name, "payload_written", payload=str(path))
+
+    def payload_path(self, name: str) -> Optional[Path]:
+        """Payload-Datei aus der Stufe "payload_written", falls noch vorhanden."""
+        state = self.states.get(name)
+        if not state or not state.get("payload") or state["stage"] == "parsed":
+            return None
+        path = Path(state["payload"])
+        return path if path.exists() else None
 
-def send_to_api(payload: Dict[str, Any], url_api: str, api_key: str) -> requests.Response:
+    def record_response(self, name: str, resp: requests.Response) -> None:
+        self.record(name, "response_stored", response=_response_to_record(resp))
+
+    def response(self, name: str) -> Optional[requests.Response]:
+        """Gespeicherte erfolgreiche API-Antwort oder None (dann muss erneut gesendet werden)."""
+        state = self.states.get(name)
+        if not state or state["stage"] != "response_stored" or state["response"]["status_code"] >= 400:
+            return None
+        return _response_from_record(state["response"])
+
+    def counts(self) -> Dict[str, int]:
+        """Anzahl EPDs je letzter Stufe."""
+        counts: Dict[str, int] = {}
+        for state in self.states.values():
+            counts[state["stage"]] = counts.get(state["stage"], 0) + 1
+        return counts
+
+
+def get_api_session() -> requests.Session:
+    """Liefert die requests.Session des aufrufenden Threads für API-Aufrufe (je Thread eine)."""
+    session = getattr(_api_sessions, "session", None)
+    if session is None:
+        session = _api_sessions.session = requests.Session()
+    return session
+
+
+def send_to_api(
+    payload: Dict[str, Any],
+    url_api: str,
+    api_key: str,
+    session: Optional[requests.Session] = None,
+    timeout: Tuple[float, float] = DEFAULT_API_TIMEOUT,
+    body: Optional[bytes] = None,
+    compress: bool = False
+) -> requests.Response:
     """
     Sendet den Payload an die EPD-API.
+
+    Für viele Payloads siehe SubmissionEngine in bom_to_epd_api.py.
     
     Args:
         payload: Dictionary mit dem Payload
         url_api: URL der API
         api_key: API-Schlüssel
+        session: Optional zu verwendende Session (Standard: get_api_session())
+        timeout: Timeout (Verbindungsaufbau, Antwort) in Sekunden
+        body: Bereits kodierter Payload (siehe encode_json); sonst wird payload kodiert
+        compress: Wenn True, wird der Body gzip-komprimiert (Content-Encoding: gzip)
     
     Returns:
         Response-Objekt der API
     """
+    headers = request_headers(api_key, compress)
+    data = request_body(payload, body, compress)
+    return (session or get_api_session()).post(url_api, data=data, headers=headers, timeout=timeout)
+
+
+def request_headers(api_key: str, compress: bool = False) -> Dict[str, str]:
+    """HTTP-Header für die EPD-API."""
     headers = {
         "x-api-key": api_key,
         "content-type": "application/json"
     }
-    print("Sende Payload an API...")
-    resp = requests.post(url_api, json=payload, headers=headers)
-    print(f"API Status-Code: {resp.status_code}")
-    try:
-        print("API Antwort:", resp.json())
-    except json.JSONDecodeError:
-        print("Antwort ist keine gültige JSON:", resp.text)
-    return resp
+    if compress:
+        headers["content-encoding"] = "gzip"
+    return headers
+
+
+def request_body(payload: Dict[str, Any], body: Optional[bytes] = None, compress: bool = False) -> bytes:
+    """HTTP-Body für die EPD-API (kodiert payload nur, wenn body nicht übergeben wird)."""
+    data = body if body is not None else encode_json(payload)
+    return gzip.compress(data, compresslevel=6) if compress else data
+
+
+def _file_fingerprint(path: Union[str, Path]) -> Tuple[str, int, int]:
+    """(Pfad, mtime, Größe) einer Datei als Cache-Schlüssel."""
+    path = Path(path).resolve()
+    stat = path.stat()
+    return str(path), stat.st_mtime_ns, stat.st_size
+
+
+class _Identity:
+    """Schlüsselbestandteil, der ein Objekt per Identität vergleicht (und am Leben hält)."""
+    __slots__ = ("obj",)
+
+    def __init__(self, obj: Any):
+        self.obj = obj
+
+    def __eq__(self, other: Any) -> bool:
+        return isinstance(other, _Identity) and other.obj is self.obj
+
+    def __hash__(self) -> int:
+        return id(self.obj)
+
+
+class PipelineSession:
+    """
+    Memoisiert die Zwischenergebnisse der Pipeline über mehrere Aufrufe hinweg.
+
+    Stufen: Roh-Frame der BoM, gemappter Frame, inputs/components, Payload. Jede Stufe wird
+    nur neu berechnet, wenn sich ihre Eingaben geändert haben (Datei-mtimes, Sheet,
+    Spaltenindizes, Repositories, Einheit, ...). Damit liest z.B. "EPD erstellen" nach der
+    Vorschau die Excel-Dateien nicht erneut, und ein neuer EPD-Name erzeugt nur den Payload neu.
+
+    Zurückgegebene Objekte werden gecacht und dürfen nicht verändert werden.
+    """
+
+    def __init__(self):
+        self._cache: Dict[str, Tuple[Any, Any]] = {}
+        self._lock = threading.RLock()
+        # Anzahl Neuberechnungen je Stufe
+        self.computed: Dict[str, int] = {}
+
+    def _stage(self, name: str, key: Any, compute: Callable[[], Any]) -> Any:
+        with self._lock:
+            cached = self._cache.get(name)
+            if cached is not None and cached[0] == key:
+                return cached[1]
+        value = compute()
+        with self._lock:
+            self._cache[name] = (key, value)
+            self.computed[name] = self.computed.get(name, 0) + 1
+        return value
+
+    def clear(self) -> None:
+        """Verwirft alle Zwischenergebnisse."""
+        with self._lock:
+            self._cache.clear()
+
+    def raw_frame(
+        self,
+        file_path: Union[str, Path],
+        sheet_name: Union[str, int],
+        start_row_index: int = 0,
+        material_column_index: int = 2,
+        amount_column_index: int = 4,
+        progress_callback: Optional[ProgressCallback] = None,
+        cancel_event: Optional[threading.Event] = None,
+        level_column_index: Optional[int] = None,
+        engine: Optional[str] = None
+    ) -> pd.DataFrame:
+        """Roh-Frame der BoM (siehe read_bom_frame)."""
+        key = (_file_fingerprint(file_path), sheet_name, start_row_index,
+               material_column_index, amount_column_index, level_column_index, engine)
+        return self._stage("raw", key, lambda: read_bom_frame(
+            file_path, sheet_name, start_row_index, material_column_index, amount_column_index,
+            progress_callback=progress_callback, cancel_event=cancel_event,
+            level_column_index=level_column_index, engine=engine))
+
+    def mapped_frame(
+        self,
+        file_path: Union[str, Path],
+        sheet_name: Union[str, int],
+        mapping_file: Union[str, Path],
+        start_row_index: int = 0,
+        material_column_index: int = 2,
+        amount_column_index: int = 4,
+        material_overrides: Optional[Dict[str, str]] = None,
+        progress_callback: Optional[ProgressCallback] = None,
+        cancel_event: Optional[threading.Event] = None,
+        level_column_index: Optional[int] = None,
+        mapping_version: Optional[str] = None,
+        engine: Optional[str] = None
+    ) -> pd.DataFrame:
+        """Gemappter Frame wie von read_materials_and_map."""
+        df_raw = self.raw_frame(file_path, sheet_name, start_row_index, material_column_index,
+                                amount_column_index, progress_callback, cancel_event, level_column_index,
+                                engine)
+        key = (_Identity(df_raw), _file_fingerprint(mapping_file), material_column_index, amount_column_index,
+               level_column_index, tuple(sorted((material_overrides or {}).items())), mapping_version)
+
+        def compute():
+            df_mat = parse_bom_materials(df_raw, material_column_index, amount_column_index, level_column_index)
+            _check_cancelled(cancel_event)
+            df_map = load_mapping_for(df_mat, mapping_file, material_overrides, mapping_version)
+            return map_materials(df_mat, df_map, material_overrides)
+
+        return self._stage("mapped", key, compute)
+
+    def inputs_and_components(
+        self,
+        df_mapped: pd.DataFrame,
+        root_repository: str,
+        parent_id: Optional[str] = None,
+        aggregate: bool = False,
+        target_repository: Optional[str] = None
+    ) -> Tuple[List[Dict], List[Dict], Optional[Dict[str, List[Dict]]]]:
+        """
+        inputs/components für alle Materialien mit A1-UUID (siehe build_inputs_and_components).
+
+        Enthält df_mapped die Spalte 'Level' (mehrstufige BoM), werden die Baugruppen als
+        Komponenten im target_repository erzeugt (siehe build_tree_inputs_and_components).
+
+        Returns:
+            Tuple von (inputs, components, trace); trace nur bei aggregate=True, sonst None
+        """
+        key = (_Identity(df_mapped), root_repository, parent_id, aggregate, target_repository)
+
+        def compute():
+            if 'Level' in df_mapped.columns:
+                return build_tree_inputs_and_components(df_mapped, root_repository, target_repository,
+                                                        parent_id, aggregate)
+            df_found = df_mapped[df_mapped['Process_uuid_A1'].notna()]
+            if aggregate:
+                return build_aggregated_inputs_and_components(df_found, root_repository, parent_id)
+            return build_inputs_and_components(df_found, root_repository, parent_id) + (None,)
+
+        return self._stage("components", key, compute)
+
+    def payload(
+        self,
+        built: Tuple[List[Dict], List[Dict], Any],
+        full_name: str,
+        epd_unit: str,
+        target_repository: str,
+        auth_list: List[Dict],
+        method_lib: Dict,
+        root_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Payload (siehe generate_payload) aus dem Ergebnis von inputs_and_components."""
+        key = (_Identity(built), full_name, epd_unit, target_repository,
+               json.dumps(auth_list, sort_keys=True), json.dumps(method_lib, sort_keys=True), root_id)
+        return self._stage("payload", key, lambda: generate_payload(
+            full_name, built[0], built[1], epd_unit, target_repository, auth_list, method_lib,
+            root_id=root_id))
 
 
 def process_epd(
@@ -273,14 +2205,29 @@ def process_epd(
     api_key: str,
     output_dir: Path,
     skip_missing_materials: bool = False,
-    log_callback: Optional[Callable[[str], None]] = None
+    log_callback: Optional[Callable[[str], None]] = None,
+    deterministic: bool = False,
+    aggregate: bool = False,
+    material_overrides: Optional[Dict[str, str]] = None,
+    pretty_json: bool = False,
+    compress_output: bool = False,
+    compress_request: bool = False,
+    session: Optional[PipelineSession] = None,
+    level_column_index: Optional[int] = None,
+    events: Optional[Instrumentation] = None,
+    incremental: bool = False,
+    mapping_version: Optional[str] = None,
+    engine: Optional[str] = None,
+    cache_impacts: bool = False,
+    journal: bool = False,
+    validate: bool = True
 ) -> Optional[requests.Response]:
     """
     Hauptfunktion zum Verarbeiten der EPD-Erstellung.
     
     Args:
-        main_file_path: Pfad zur BoM Excel-Datei
-        sheet_name: Name des Excel-Sheets
+        main_file_path: Pfad zur BoM-Datei (Excel, CSV oder Parquet)
+        sheet_name: Name des Excel-Sheets (bei CSV und Parquet ohne Bedeutung)
         mapping_file_path: Pfad zur Mapping-Datei
         full_name: Name des EPDs
         epd_unit: Einheit des EPDs
@@ -295,50 +2242,330 @@ def process_epd(
         api_key: API-Schlüssel
         output_dir: Ausgabeverzeichnis
         skip_missing_materials: Wenn True, werden fehlende Materialien automatisch übersprungen
-        log_callback: Optional callback-Funktion für Log-Nachrichten (z.B. für GUI)
+        log_callback: Optional callback-Funktion für Log-Nachrichten (z.B. für GUI); wird nur
+            verwendet, wenn events nicht angegeben ist
+        deterministic: Wenn True, werden deterministische IDs verwendet und identische, bereits
+            berechnete EPDs aus dem Submission-Ledger im Output-Verzeichnis beantwortet
+        aggregate: Wenn True, werden Zeilen mit gleicher Prozess-UUID und Einheit zu einer
+            Komponente zusammengefasst; die Zuordnung wird als {full_name}.trace.json gespeichert
+        material_overrides: Optionale Zuordnung BoM-Material -> Material_name im Mapping
+        pretty_json: Wenn True, wird der Payload eingerückt serialisiert (Debug-Modus)
+        compress_output: Wenn True, wird die JSON-Datei gzip-komprimiert gespeichert
+        compress_request: Wenn True, wird der HTTP-Body gzip-komprimiert gesendet
+        session: Optional PipelineSession, deren Zwischenergebnisse (z.B. aus der Vorschau)
+            wiederverwendet werden
+        level_column_index: Optional Spaltenindex der BoM-Ebene; dann wird jede Baugruppe als
+            eigene Komponente im Ziel-Repository erzeugt (siehe build_tree_inputs_and_components)
+        events: Optional Instrumentation für Stufen-Ereignisse und Meldungen (siehe
+            bom_to_epd_events); Standard: Meldungen an log_callback bzw. die Konsole
+        incremental: Wenn True, wird gegen den letzten Lauf im Output-Verzeichnis verglichen
+            (siehe RunManifest): ist das EPD unverändert, wird die gespeicherte API-Antwort
+            zurückgegeben; sonst werden die Änderungen als {full_name}.changes.json gespeichert
+        mapping_version: Nur bei einer Mapping-Datenbank (siehe bom_to_epd_mappingdb): zu
+            verwendende Version (None = neueste)
+        engine: Lese-Backend der BoM (siehe resolve_bom_engine); None = nach Dateiendung
+        cache_impacts: Wenn True, werden die Wirkungsfaktoren je Prozess aus der API-Antwort
+            im Output-Verzeichnis zwischengespeichert (siehe bom_to_epd_lcia)
+        journal: Wenn True, werden die abgeschlossenen Stufen im Job-Journal des
+            Output-Verzeichnisses protokolliert (siehe JobJournal); ein erneuter Aufruf nach
+            einem Abbruch setzt nach der letzten abgeschlossenen Stufe fort
+        validate: Wenn True, wird der Payload vor dem Senden lokal geprüft (siehe
+            validate_payload); bei Problemen wird er gespeichert, aber nicht gesendet
     
     Returns:
         Response-Objekt der API oder None bei Abbruch
+
+    Raises:
+        PayloadValidationError: wenn validate=True und der Payload ungültig ist
     """
-    if log_callback:
-        log_callback(f"Lese Materialien aus: {main_file_path}")
+    events = events if events is not None else default_instrumentation(log_callback, run=full_name)
+
+    manifest = RunManifest(output_dir) if incremental else None
+    job_journal = JobJournal(output_dir) if journal else None
+    if manifest is not None or job_journal is not None:
+        # Alles, was den Payload bestimmt (außer dem gemappten Frame selbst)
+        settings = dict(full_name=full_name, epd_unit=epd_unit, root_repository=root_repository,
+                        target_repository=target_repository, method_lib=method_lib,
+                        deterministic=deterministic, aggregate=aggregate)
+        source = RunManifest.source_fingerprint(
+            main_file_path, mapping_file_path, sheet=sheet_name, start_row=start_row_index,
+            material_column=material_column_index, amount_column=amount_column_index,
+            level_column=level_column_index, overrides=sorted((material_overrides or {}).items()),
+            mapping_version=mapping_version, **settings)
+    if manifest is not None:
+        previous = manifest.lookup(full_name)
+        recorded = manifest.response(full_name)
+        if previous and previous["source"] == source and recorded is not None:
+            events.message("BoM und Mapping unverändert seit dem letzten Lauf - gespeicherte API-Antwort wird verwendet.")
+            return recorded
+
+    state = job_journal.state(full_name, source) if job_journal is not None else None
+    if state is not None:
+        journaled = job_journal.response(full_name)
+        if journaled is not None:
+            events.message("EPD laut Job-Journal bereits übermittelt - gespeicherte API-Antwort wird verwendet.")
+            return journaled
+
+    session = session if session is not None else PipelineSession()
+    df_for_payload = job_journal.load_frame(full_name) if state is not None else None
+    if df_for_payload is not None:
+        events.message("Gemappte Materialien aus dem Job-Journal übernommen.")
+    else:
+        events.message(f"Lese Materialien aus: {main_file_path}")
+        with events.stage("read_and_map", sheet=sheet_name) as metrics:
+            df_for_payload = session.mapped_frame(
+                main_file_path,
+                sheet_name,
+                mapping_file_path,
+                start_row_index,
+                material_column_index,
+                amount_column_index,
+                material_overrides=material_overrides,
+                level_column_index=level_column_index,
+                mapping_version=mapping_version,
+                engine=engine
+            )
+            metrics["rows"] = len(df_for_payload)
+        if job_journal is not None:
+            job_journal.record_parsed(full_name, source, df_for_payload)
+
+    if manifest is not None:
+        fingerprint = RunManifest.input_fingerprint(df_for_payload, **settings)
+        if previous and previous["fingerprint"] == fingerprint and recorded is not None:
+            manifest.touch(full_name, source)
+            events.message("Materialien unverändert seit dem letzten Lauf - gespeicherte API-Antwort wird verwendet.")
+            return recorded
+        changes = material_changes(manifest.load_frame(full_name) if previous else None, df_for_payload)
+        save_json(changes, output_dir / f"{full_name}.changes.json", pretty=True)
+        events.message(f"Änderungen gegenüber dem letzten Lauf: {len(changes['added'])} neu, "
+                       f"{len(changes['removed'])} entfernt, {len(changes['changed'])} geändert")
+
+    payload_path = job_journal.payload_path(full_name) if state is not None else None
+    if payload_path is not None:
+        events.message(f"Setze laut Job-Journal mit der Übermittlung fort: {payload_path}")
+        payload, body = load_json(payload_path)
+        resp = _submit_payload(payload, body, full_name, url_api, api_key, output_dir, events,
+                               deterministic, compress_request, cache_impacts, job_journal)
+    else:
+        resp = _emit_epd(
+            df_for_payload, session, mapping_file_path, full_name, epd_unit, root_repository,
+            target_repository, auth_list, method_lib, url_api, api_key, output_dir,
+            skip_missing_materials, events, deterministic, aggregate,
+            pretty_json, compress_output, compress_request, cache_impacts, job_journal, validate,
+            mapping_version
+        )
+    if manifest is not None and resp is not None:
+        manifest.record(full_name, source, fingerprint, df_for_payload, resp)
+    return resp
 
-    df_for_payload = read_materials_and_map(
-        main_file_path,
-        sheet_name,
-        mapping_file_path,
-        start_row_index,
-        material_column_index,
-        amount_column_index
-    )
 
-    # Fehlende Materialien prüfen
+def _emit_epd(
+    df_for_payload: pd.DataFrame,
+    session: PipelineSession,
+    mapping_file_path: Union[str, Path],
+    full_name: str,
+    epd_unit: str,
+    root_repository: str,
+    target_repository: str,
+    auth_list: List[Dict],
+    method_lib: Dict,
+    url_api: str,
+    api_key: str,
+    output_dir: Path,
+    skip_missing_materials: bool,
+    events: Instrumentation,
+    deterministic: bool,
+    aggregate: bool,
+    pretty_json: bool,
+    compress_output: bool,
+    compress_request: bool,
+    cache_impacts: bool = False,
+    journal: Optional[JobJournal] = None,
+    validate: bool = True,
+    mapping_version: Optional[str] = None
+) -> Optional[requests.Response]:
+    """Erzeugt, speichert und sendet den Payload zu einem gemappten Frame (siehe process_epd)."""
+    # Fehlende Materialien prüfen (Baugruppen einer mehrstufigen BoM brauchen keine UUID)
     missing_a1 = df_for_payload[df_for_payload['Process_uuid_A1'].isna()]
+    if 'Assembly' in missing_a1.columns:
+        missing_a1 = missing_a1[~missing_a1['Assembly']]
     if not missing_a1.empty:
+        from bom_to_epd_match import suggest_mappings
+
+        with events.stage("suggest_mappings", missing=len(missing_a1)):
+            suggestions = suggest_mappings(missing_a1['Material'].tolist(), mapping_file_path, top_k=1,
+                                           mapping_version=mapping_version)
         missing_list = []
-        for _, row in missing_a1.iterrows():
-            missing_list.append(f"  - {row['Material']} ({row['Amount']})")
+        for material, amount in zip(missing_a1['Material'].tolist(), missing_a1['Amount'].tolist()):
+            entry = f"  - {material} ({amount})"
+            if suggestions.get(material):
+                best = suggestions[material][0]
+                entry += f" - Vorschlag: {best.material_name} (Score {best.score:.2f})"
+            missing_list.append(entry)
 
-        warning_msg = "WARNUNG: Keine A1-UUID gefunden für:\n" + "\n".join(missing_list)
+        events.warning("WARNUNG: Keine A1-UUID gefunden für:\n" + "\n".join(missing_list))
+        if not skip_missing_materials:
+            # Keine interaktive Eingabe: fehlende Materialien werden immer übersprungen
+            events.message("Fehlende Materialien werden übersprungen.")
 
-        if log_callback:
-            log_callback(warning_msg)
-        else:
-            print(warning_msg)
+    # Materialien ohne A1-UUID werden beim Aufbau der Komponenten übersprungen
+    root_id = deterministic_root_id(full_name, target_repository) if deterministic else None
+    with events.stage("build_components", aggregate=aggregate) as metrics:
+        built = session.inputs_and_components(df_for_payload, root_repository, parent_id=root_id,
+                                              aggregate=aggregate, target_repository=target_repository)
+        metrics["components"] = len(built[1])
+    if aggregate:
+        save_json(built[2], output_dir / f"{full_name}.trace.json", pretty=pretty_json)
+    with events.stage("generate_payload"):
+        payload = session.payload(built, full_name, epd_unit, target_repository, auth_list, method_lib,
+                                  root_id=root_id)
+    errors: List[str] = []
+    if validate:
+        with events.stage("validate_payload") as metrics:
+            errors = validate_payload(payload, load_allowed_units(mapping_file_path, mapping_version))
+            metrics["errors"] = len(errors)
+    # Einmal serialisieren; dieselben Bytes gehen in die Datei und in den HTTP-Body
+    with events.stage("encode_json") as metrics:
+        body = encode_json(payload, pretty_json)
+        metrics["bytes"] = len(body)
+    with events.stage("save_json", compress=compress_output) as metrics:
+        output_path = save_json(body, output_dir / f"{full_name}.json", compress=compress_output)
+        metrics["path"] = str(output_path)
+        metrics["bytes"] = output_path.stat().st_size
+    events.message(f"JSON gespeichert unter: {output_path}")
+    if errors:
+        events.warning("Payload ungültig, wird nicht gesendet:\n" + "\n".join(f"  - {error}" for error in errors))
+        raise PayloadValidationError(errors)
+    if journal is not None:
+        journal.record_payload(full_name, output_path)
+    return _submit_payload(payload, body, full_name, url_api, api_key, output_dir, events,
+                           deterministic, compress_request, cache_impacts, journal)
 
-        if not skip_missing_materials:
-            # Bei GUI: automatisch überspringen, wenn nicht explizit erlaubt
-            if log_callback:
-                log_callback("Fehlende Materialien werden übersprungen.")
-            else:
-                # Bei CLI: automatisch überspringen (keine interaktive Eingabe mehr)
-                print("Fehlende Materialien werden übersprungen.")
-
-        df_for_payload = df_for_payload[df_for_payload['Process_uuid_A1'].notna()]
-
-    inputs, components = read_excel_like_reference(df_for_payload, root_repository)
-    payload = generate_payload(full_name, inputs, components, epd_unit, target_repository, auth_list, method_lib)
-    output_path = output_dir / f"{full_name}.json"
-    save_json(payload, output_path)
-    resp = send_to_api(payload, url_api, api_key)
+
+def _submit_payload(
+    payload: Dict[str, Any],
+    body: bytes,
+    full_name: str,
+    url_api: str,
+    api_key: str,
+    output_dir: Path,
+    events: Instrumentation,
+    deterministic: bool,
+    compress_request: bool,
+    cache_impacts: bool = False,
+    journal: Optional[JobJournal] = None
+) -> requests.Response:
+    """Sendet einen gespeicherten Payload und verarbeitet die Antwort (siehe process_epd)."""
+    ledger = SubmissionLedger(output_dir / LEDGER_FILENAME) if deterministic else None
+    if ledger is not None:
+        recorded = ledger.lookup(payload)
+        if recorded is not None:
+            events.message("Identisches EPD wurde bereits berechnet - gespeicherte API-Antwort wird verwendet.")
+            if journal is not None:
+                journal.record_response(full_name, recorded)
+            return recorded
+
+    if journal is not None:
+        journal.record(full_name, "submitted")
+    events.message("Sende Payload an API...")
+    with events.stage("send_to_api", bytes=len(body), compress=compress_request) as metrics:
+        resp = send_to_api(payload, url_api, api_key, body=body, compress=compress_request)
+        metrics["status"] = resp.status_code
+    events.message(f"API Status-Code: {resp.status_code}")
+    try:
+        data = resp.json()
+        events.message(f"API Antwort: {data}")
+    except ValueError:
+        data = None
+        events.message(f"Antwort ist keine gültige JSON: {resp.text}")
+    if cache_impacts and resp.ok and data is not None:
+        from bom_to_epd_lcia import ImpactFactorCache, IMPACT_CACHE_FILENAME, record_impact_factors
+
+        with ImpactFactorCache(output_dir / IMPACT_CACHE_FILENAME) as cache:
+            count = record_impact_factors(cache, payload, data)
+        events.message(f"Wirkungsfaktoren von {count} Prozessen zwischengespeichert" if count else
+                       "Antwort enthält keine Ergebnisse je Komponente - keine Wirkungsfaktoren gespeichert")
+    if ledger is not None:
+        ledger.record(payload, resp)
+    if journal is not None:
+        journal.record_response(full_name, resp)
     return resp
+
+
+def process_workbook(
+    main_file_path: Union[str, Path],
+    mapping_file_path: Union[str, Path],
+    name_template: str,
+    epd_unit: str,
+    root_repository: str,
+    target_repository: str,
+    start_row_index: int,
+    material_column_index: int,
+    amount_column_index: int,
+    auth_list: List[Dict],
+    method_lib: Dict,
+    url_api: str,
+    api_key: str,
+    output_dir: Path,
+    sheet_names: Optional[Iterable[Union[str, int]]] = None,
+    skip_missing_materials: bool = False,
+    log_callback: Optional[Callable[[str], None]] = None,
+    deterministic: bool = False,
+    aggregate: bool = False,
+    material_overrides: Optional[Dict[str, str]] = None,
+    pretty_json: bool = False,
+    compress_output: bool = False,
+    compress_request: bool = False,
+    level_column_index: Optional[int] = None,
+    events: Optional[Instrumentation] = None,
+    mapping_version: Optional[str] = None,
+    cache_impacts: bool = False,
+    validate: bool = True,
+    engine: Optional[str] = None
+) -> Dict[str, Optional[requests.Response]]:
+    """
+    Erstellt ein EPD je Sheet einer Arbeitsmappe (eine BoM-Variante pro Sheet).
+
+    Die Arbeitsmappe wird nur einmal gelesen (siehe read_workbook_materials_and_map); danach
+    wird für jedes Sheet wie in process_epd ein Payload erzeugt, gespeichert und gesendet.
+
+    Args:
+        name_template: Vorlage für den EPD-Namen mit den Platzhaltern {sheet} (Sheet-Name),
+            {index} (Position des Sheets, ab 1) und {file} (Dateiname ohne Endung),
+            z.B. "{file} - {sheet}"
+        sheet_names: Zu verarbeitende Sheets; None = alle Sheets
+        engine: Lese-Backend; nur openpyxl oder calamine (siehe read_workbook_materials_and_map)
+        Übrige Argumente wie bei process_epd
+
+    Returns:
+        Dictionary Sheet-Name -> Response-Objekt der API
+    """
+    events = events if events is not None else default_instrumentation(log_callback)
+    events.message(f"Lese Arbeitsmappe: {main_file_path}")
+
+    with events.stage("read_workbook") as metrics:
+        frames = read_workbook_materials_and_map(
+            main_file_path,
+            mapping_file_path,
+            sheet_names,
+            start_row_index,
+            material_column_index,
+            amount_column_index,
+            material_overrides=material_overrides,
+            level_column_index=level_column_index,
+            mapping_version=mapping_version,
+            engine=engine
+        )
+        metrics["sheets"] = len(frames)
+        metrics["rows"] = sum(len(df) for df in frames.values())
+    responses = {}
+    for index, (sheet, df_for_payload) in enumerate(frames.items(), start=1):
+        full_name = name_template.format(sheet=sheet, index=index, file=Path(main_file_path).stem)
+        responses[sheet] = _emit_epd(
+            df_for_payload, PipelineSession(), mapping_file_path, full_name, epd_unit, root_repository,
+            target_repository, auth_list, method_lib, url_api, api_key, output_dir,
+            skip_missing_materials, events, deterministic, aggregate,
+            pretty_json, compress_output, compress_request, cache_impacts, validate=validate,
+            mapping_version=mapping_version
+        )
+    return responses
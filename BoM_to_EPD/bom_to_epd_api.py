@@ -0,0 +1,196 @@
+"""
+Übermittlung von EPD-Payloads an die run-epd-tree API
+
+Enthält eine Submission-Engine für viele Payloads: eine persistente requests.Session mit
+Connection-Pooling, begrenzte Parallelität, Token-Bucket-Ratenbegrenzung und exponentielles
+Backoff bei 429/5xx-Antworten bzw. Verbindungsfehlern. Ergebnisse werden geliefert, sobald
+die jeweilige Antwort eintrifft.
+"""
+
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Optional, Iterable, Iterator, Dict, Any, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from bom_to_epd import DEFAULT_API_TIMEOUT, request_headers, request_body
+
+
+RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+
+class TokenBucket:
+    """
+    Thread-sichere Token-Bucket-Ratenbegrenzung.
+
+    Args:
+        rate: Erlaubte Anfragen pro Sekunde
+        capacity: Maximale Anzahl direkt aufeinanderfolgender Anfragen (Burst)
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        if rate <= 0:
+            raise ValueError("rate muss größer als 0 sein")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Blockiert, bis ein Token verfügbar ist, und verbraucht es."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+                wait = (1.0 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+@dataclass
+class SubmissionResult:
+    """Ergebnis der Übermittlung eines Payloads."""
+    key: Any
+    response: Optional[requests.Response] = None
+    error: Optional[str] = None
+    attempts: int = 0
+    seconds: float = 0.0
+
+    @property
+    def status_code(self) -> Optional[int]:
+        return self.response.status_code if self.response is not None else None
+
+    @property
+    def ok(self) -> bool:
+        return self.response is not None and self.response.ok
+
+
+class SubmissionEngine:
+    """
+    Sendet Payloads parallel über eine gemeinsame requests.Session.
+
+    Args:
+        url_api: URL der API
+        api_key: API-Schlüssel
+        max_concurrency: Maximale Anzahl gleichzeitiger Anfragen
+        rate_limit: Maximale Anfragen pro Sekunde (None = unbegrenzt)
+        burst: Burst-Größe des Token-Buckets (Standard: rate_limit)
+        max_retries: Maximale Anzahl Wiederholungen bei 429/5xx oder Verbindungsfehlern
+        backoff_base: Basis-Wartezeit in Sekunden für das exponentielle Backoff
+        backoff_max: Obergrenze der Wartezeit in Sekunden
+        timeout: Timeout für requests (connect, read)
+        session: Optional vorhandene Session (sonst wird eine eigene erzeugt); sie wird weder
+            verändert noch geschlossen, die Header werden je Anfrage gesetzt und der
+            Verbindungspool bleibt wie vom Aufrufer eingerichtet
+        compress: Wenn True, werden die Bodies gzip-komprimiert gesendet
+    """
+
+    def __init__(
+        self,
+        url_api: str,
+        api_key: str,
+        max_concurrency: int = 8,
+        rate_limit: Optional[float] = None,
+        burst: Optional[float] = None,
+        max_retries: int = 5,
+        backoff_base: float = 1.0,
+        backoff_max: float = 60.0,
+        timeout: Tuple[float, float] = DEFAULT_API_TIMEOUT,
+        session: Optional[requests.Session] = None,
+        compress: bool = False
+    ):
+        self.url_api = url_api
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.compress = compress
+        self.bucket = TokenBucket(rate_limit, burst) if rate_limit else None
+
+        self.headers = request_headers(api_key, compress)
+        self._owns_session = session is None
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_concurrency)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+        self.session = session
+
+    def __enter__(self) -> "SubmissionEngine":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._owns_session:
+            self.session.close()
+
+    def _backoff(self, attempt: int, response: Optional[requests.Response]) -> float:
+        """Wartezeit vor dem nächsten Versuch (Retry-After hat Vorrang, sonst Full Jitter)."""
+        if response is not None:
+            retry_after = response.headers.get("Retry-After")
+            if retry_after:
+                try:
+                    return min(self.backoff_max, max(0.0, float(retry_after)))
+                except ValueError:
+                    pass
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def submit(self, payload: Dict[str, Any], key: Any = None, body: Optional[bytes] = None) -> SubmissionResult:
+        """
+        Sendet einen Payload inklusive Wiederholungen.
+
+        Args:
+            payload: Dictionary mit dem Payload
+            key: Beliebiger Schlüssel zur Zuordnung des Ergebnisses
+            body: Bereits kodierter Payload (siehe encode_json); wird nur einmal kodiert
+
+        Returns:
+            SubmissionResult mit der letzten Antwort bzw. dem letzten Fehler
+        """
+        result = SubmissionResult(key=key)
+        started = time.perf_counter()
+        data = request_body(payload, body, self.compress)
+        for attempt in range(self.max_retries + 1):
+            if self.bucket is not None:
+                self.bucket.acquire()
+            result.attempts = attempt + 1
+            response = None
+            try:
+                response = self.session.post(self.url_api, data=data, headers=self.headers, timeout=self.timeout)
+                result.response = response
+                result.error = None
+                if response.status_code not in RETRY_STATUS_CODES:
+                    break
+                result.error = f"HTTP {response.status_code}"
+            except (requests.ConnectionError, requests.Timeout) as e:
+                result.error = f"{type(e).__name__}: {e}"
+            if attempt < self.max_retries:
+                time.sleep(self._backoff(attempt, response))
+        result.seconds = time.perf_counter() - started
+        return result
+
+    def submit_many(self, payloads: Iterable[Tuple]) -> Iterator[SubmissionResult]:
+        """
+        Sendet viele Payloads parallel (höchstens max_concurrency gleichzeitig).
+
+        Args:
+            payloads: Iterable von (Schlüssel, Payload) oder (Schlüssel, Payload, kodierter Body)
+
+        Yields:
+            SubmissionResult je Payload in der Reihenfolge des Eintreffens der Antworten
+        """
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            futures = [executor.submit(self.submit, item[1], item[0], *item[2:]) for item in payloads]
+            for future in as_completed(futures):
+                yield future.result()
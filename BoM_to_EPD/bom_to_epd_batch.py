@@ -0,0 +1,583 @@
+"""
+BoM zu EPD Batch-Konverter
+
+Kommandozeilen-Einstiegspunkt, der ein ganzes Verzeichnis von BoM Excel-Dateien oder ein
+Manifest (CSV/YAML) ohne GUI in EPD-Payloads konvertiert. Lesen, Mappen und Payload-Erzeugung
+laufen parallel in einem Prozess-Pool; das Mapping wird nur einmal geladen und an alle
+Worker verteilt.
+
+Beispiel:
+    python bom_to_epd_batch.py boms/ -o results --sheet BoM --material-column C --amount-column E
+    python bom_to_epd_batch.py manifest.csv -o results
+    python bom_to_epd_batch.py boms/ -o results --submit --journal
+    python bom_to_epd_batch.py --resume -o results --submit
+"""
+
+import argparse
+import csv
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Optional, Callable, List, Dict, Any, Union
+
+import pandas as pd
+
+from bom_to_epd import (
+    load_mapping, read_bom_frame, parse_bom_materials, map_materials,
+    build_inputs_and_components, build_aggregated_inputs_and_components,
+    build_tree_inputs_and_components, generate_payload, validate_payload, allowed_units, PayloadValidationError,
+    encode_json, save_json, load_json, column_letter_to_index,
+    deterministic_root_id, SubmissionLedger, LEDGER_FILENAME, BOM_READERS, JobJournal, RunManifest,
+    DEFAULT_ROOT_REPOSITORY, DEFAULT_TARGET_REPOSITORY, DEFAULT_AUTH_URL,
+    DEFAULT_METHOD_URL, DEFAULT_METHOD_NAME, DEFAULT_API_URL, DEFAULT_API_KEY
+)
+
+
+BOM_FILE_PATTERNS = ("*.xlsx", "*.xlsm", "*.csv", "*.parquet")
+
+
+@dataclass
+class BatchJob:
+    """Ein Konvertierungsauftrag (eine Zeile im Manifest bzw. eine Datei im Verzeichnis)."""
+    file: str
+    sheet: Union[str, int]
+    material_column: int
+    amount_column: int
+    epd_name: str
+    unit: str = "kg"
+    start_row: int = 0
+    level_column: Optional[int] = None
+
+
+@dataclass
+class BatchSettings:
+    """Für alle Aufträge eines Batches gemeinsame Einstellungen."""
+    root_repository: str
+    target_repository: str
+    auth_list: List[Dict]
+    method_lib: Dict
+    output_dir: str
+    deterministic: bool = False
+    aggregate: bool = False
+    pretty_json: bool = False
+    compress_output: bool = False
+    engine: Optional[str] = None
+    validate: bool = True
+
+
+@dataclass
+class BatchResult:
+    """Ergebnis eines einzelnen Auftrags."""
+    file: str
+    sheet: Union[str, int]
+    epd_name: str
+    rows: int = 0
+    missing: int = 0
+    output: Optional[str] = None
+    error: Optional[str] = None
+    seconds: float = 0.0
+    status_code: Optional[int] = None
+
+
+def parse_column(value: Union[str, int]) -> int:
+    """Spaltenangabe als Buchstabe (A, B, ...) oder als 0-basierter Index."""
+    if isinstance(value, int):
+        return value
+    value = str(value).strip()
+    if value.isdigit():
+        return int(value)
+    return column_letter_to_index(value)
+
+
+def _optional_column(value: Union[str, int, None]) -> Optional[int]:
+    """Wie parse_column, aber None bleibt None (optionale Spalten)."""
+    return None if value is None else parse_column(value)
+
+
+def _job_from_record(record: Dict[str, Any], base_dir: Path, defaults: argparse.Namespace) -> BatchJob:
+    """Erzeugt einen BatchJob aus einer Manifest-Zeile; fehlende Felder kommen aus den CLI-Optionen."""
+    def field(name: str, default: Any) -> Any:
+        value = record.get(name)
+        if value is None or (isinstance(value, str) and not value.strip()):
+            return default
+        return value
+
+    file_path = Path(str(record["file"]).strip())
+    if not file_path.is_absolute():
+        file_path = base_dir / file_path
+
+    return BatchJob(
+        file=str(file_path),
+        sheet=field("sheet", defaults.sheet if defaults.sheet is not None else 0),
+        material_column=parse_column(field("material_column", defaults.material_column)),
+        amount_column=parse_column(field("amount_column", defaults.amount_column)),
+        epd_name=str(field("epd_name", file_path.stem)).strip(),
+        unit=str(field("unit", defaults.unit)).strip(),
+        start_row=int(field("start_row", defaults.start_row)),
+        level_column=_optional_column(field("level_column", defaults.level_column))
+    )
+
+
+def _unique_names(jobs: List[BatchJob]) -> List[BatchJob]:
+    """
+    Stellt sicher, dass jeder EPD-Name nur einmal vorkommt.
+
+    Der EPD-Name bestimmt die Ausgabedatei, den Eintrag im Job-Journal und die gespeicherte
+    Antwort; doppelte Namen würden sich gegenseitig überschreiben.
+
+    Raises:
+        ValueError: wenn EPD-Namen mehrfach vergeben sind
+    """
+    files_by_name: Dict[str, List[str]] = {}
+    for job in jobs:
+        files_by_name.setdefault(job.epd_name, []).append(f"{job.file} [{job.sheet}]")
+    duplicates = {name: files for name, files in files_by_name.items() if len(files) > 1}
+    if duplicates:
+        details = "; ".join(f"{name}: {', '.join(files)}" for name, files in duplicates.items())
+        raise ValueError(f"EPD-Namen sind mehrfach vergeben (epd_name angeben): {details}")
+    return jobs
+
+
+def load_manifest(manifest_path: Path, defaults: argparse.Namespace) -> List[BatchJob]:
+    """
+    Liest ein CSV- oder YAML-Manifest.
+
+    Spalten bzw. Schlüssel: file, sheet, material_column, amount_column, epd_name, unit
+    und optional start_row und level_column. Relative Dateipfade beziehen sich auf das
+    Verzeichnis des Manifests. YAML-Manifeste sind eine Liste von Einträgen oder enthalten diese unter "jobs".
+
+    Args:
+        manifest_path: Pfad zum Manifest (.csv, .yaml, .yml)
+        defaults: CLI-Optionen als Standardwerte für fehlende Felder
+
+    Returns:
+        Liste der Aufträge
+
+    Raises:
+        ValueError: wenn EPD-Namen mehrfach vergeben sind
+    """
+    base_dir = manifest_path.parent
+    if manifest_path.suffix.lower() in (".yaml", ".yml"):
+        try:
+            import yaml
+        except ImportError as e:
+            raise RuntimeError("YAML-Manifeste benötigen das Paket 'pyyaml'.") from e
+        with open(manifest_path, encoding="utf-8") as f:
+            data = yaml.safe_load(f) or []
+        records = data.get("jobs", []) if isinstance(data, dict) else data
+    else:
+        with open(manifest_path, newline="", encoding="utf-8-sig") as f:
+            sample = f.read(4096)
+            f.seek(0)
+            try:
+                dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+            except csv.Error:
+                dialect = csv.excel
+            records = list(csv.DictReader(f, dialect=dialect))
+
+    return _unique_names([_job_from_record(record, base_dir, defaults) for record in records])
+
+
+def discover_jobs(directory: Path, mapping_file: Path, defaults: argparse.Namespace) -> List[BatchJob]:
+    """
+    Erzeugt je BoM-Datei im Verzeichnis einen Auftrag (EPD-Name = Dateiname ohne Endung).
+
+    Raises:
+        ValueError: wenn zwei Dateien denselben Namen haben (z.B. a.xlsx und a.csv)
+    """
+    files = set()
+    for pattern in BOM_FILE_PATTERNS:
+        files.update(directory.glob(pattern))
+    mapping_resolved = mapping_file.resolve()
+    return _unique_names([
+        _job_from_record({"file": path.name}, directory, defaults)
+        for path in sorted(files)
+        if not path.name.startswith("~$") and path.resolve() != mapping_resolved
+    ])
+
+
+# Wird im Worker-Prozess einmalig durch _init_worker gesetzt
+_worker_state: Dict[str, Any] = {}
+
+
+def _init_worker(df_map: pd.DataFrame, settings: BatchSettings) -> None:
+    """Initialisiert einen Worker-Prozess mit dem gemeinsamen Mapping."""
+    _worker_state["df_map"] = df_map
+    _worker_state["settings"] = settings
+
+
+def convert_job(job: BatchJob, df_map: pd.DataFrame, settings: BatchSettings) -> BatchResult:
+    """
+    Führt Lesen, Mappen und Payload-Erzeugung für einen Auftrag aus und speichert das JSON.
+
+    Materialien ohne A1-UUID werden (wie in process_epd) übersprungen und gezählt. Ein ungültiger
+    Payload (siehe validate_payload) wird gespeichert, der Auftrag aber als Fehler gemeldet.
+
+    Args:
+        job: Auftrag
+        df_map: Geladenes Mapping (siehe load_mapping)
+        settings: Gemeinsame Einstellungen
+
+    Returns:
+        BatchResult des Auftrags (Fehler werden im Feld 'error' zurückgegeben)
+    """
+    result = BatchResult(file=job.file, sheet=job.sheet, epd_name=job.epd_name)
+    started = time.perf_counter()
+    try:
+        df_raw = read_bom_frame(job.file, job.sheet, job.start_row,
+                                job.material_column, job.amount_column,
+                                level_column_index=job.level_column, engine=settings.engine)
+        df_merged = map_materials(parse_bom_materials(df_raw, job.material_column, job.amount_column,
+                                                      job.level_column),
+                                  df_map)
+        result.rows = len(df_merged)
+
+        found = df_merged['Process_uuid_A1'].notna()
+        if job.level_column is not None:
+            # Baugruppen einer mehrstufigen BoM brauchen keine UUID
+            result.missing = int((~found & ~df_merged['Assembly']).sum())
+        else:
+            result.missing = int((~found).sum())
+
+        root_id = deterministic_root_id(job.epd_name, settings.target_repository) \
+            if settings.deterministic else None
+        if job.level_column is not None:
+            inputs, components, trace = build_tree_inputs_and_components(
+                df_merged, settings.root_repository, settings.target_repository,
+                parent_id=root_id, aggregate=settings.aggregate)
+            if settings.aggregate:
+                save_json(trace, Path(settings.output_dir) / f"{job.epd_name}.trace.json",
+                          pretty=settings.pretty_json)
+        elif settings.aggregate:
+            inputs, components, trace = build_aggregated_inputs_and_components(
+                df_merged[found], settings.root_repository, parent_id=root_id)
+            save_json(trace, Path(settings.output_dir) / f"{job.epd_name}.trace.json",
+                      pretty=settings.pretty_json)
+        else:
+            inputs, components = build_inputs_and_components(df_merged[found], settings.root_repository,
+                                                             parent_id=root_id)
+        payload = generate_payload(job.epd_name, inputs, components, job.unit,
+                                   settings.target_repository, settings.auth_list, settings.method_lib,
+                                   root_id=root_id)
+        errors = validate_payload(payload, allowed_units(df_map)) if settings.validate else []
+        output_path = Path(settings.output_dir) / f"{job.epd_name}.json"
+        output_path = save_json(encode_json(payload, settings.pretty_json), output_path,
+                                compress=settings.compress_output)
+        result.output = str(output_path)
+        if errors:
+            # Gespeichert zur Kontrolle, aber als Fehler markiert und nicht gesendet
+            raise PayloadValidationError(errors)
+    except Exception as e:
+        result.error = f"{type(e).__name__}: {e}"
+    result.seconds = time.perf_counter() - started
+    return result
+
+
+def _convert_in_worker(job: BatchJob) -> BatchResult:
+    return convert_job(job, _worker_state["df_map"], _worker_state["settings"])
+
+
+def run_batch(
+    jobs: List[BatchJob],
+    mapping_file: Union[str, Path],
+    settings: BatchSettings,
+    workers: Optional[int] = None,
+    mapping_version: Optional[str] = None,
+    on_result: Optional[Callable[[BatchJob, BatchResult], None]] = None
+) -> List[BatchResult]:
+    """
+    Konvertiert alle Aufträge parallel.
+
+    Args:
+        jobs: Aufträge
+        mapping_file: Pfad zur Mapping-Datei (wird einmal geladen und an die Worker verteilt)
+        settings: Gemeinsame Einstellungen
+        workers: Anzahl Worker-Prozesse (Standard: Anzahl CPU-Kerne; 1 = ohne Prozess-Pool)
+        mapping_version: Nur bei einer Mapping-Datenbank: Version (None = neueste)
+        on_result: Optional Funktion, die im Hauptprozess mit Auftrag und Ergebnis aufgerufen wird,
+            sobald ein Auftrag fertig ist (z.B. für das Job-Journal)
+
+    Returns:
+        Ergebnisse in der Reihenfolge der Aufträge
+    """
+    Path(settings.output_dir).mkdir(parents=True, exist_ok=True)
+    if not jobs:
+        return []
+    df_map = load_mapping(mapping_file, version=mapping_version)
+    workers = workers or os.cpu_count() or 1
+    workers = max(1, min(workers, len(jobs)))
+
+    results: List[Optional[BatchResult]] = [None] * len(jobs)
+    if workers == 1:
+        for i, job in enumerate(jobs):
+            results[i] = convert_job(job, df_map, settings)
+            if on_result is not None:
+                on_result(job, results[i])
+        return results
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(df_map, settings)) as executor:
+        futures = {executor.submit(_convert_in_worker, job): i for i, job in enumerate(jobs)}
+        for future in as_completed(futures):
+            i = futures[future]
+            results[i] = future.result()
+            if on_result is not None:
+                on_result(jobs[i], results[i])
+    return results
+
+
+def job_source(job: BatchJob, mapping_file: Union[str, Path], settings: BatchSettings,
+               mapping_version: Optional[str] = None) -> str:
+    """Fingerabdruck von BoM, Mapping und allen Einstellungen, die den Payload eines Auftrags bestimmen."""
+    return RunManifest.source_fingerprint(
+        job.file, mapping_file, sheet=job.sheet, start_row=job.start_row,
+        material_column=job.material_column, amount_column=job.amount_column,
+        level_column=job.level_column, unit=job.unit, mapping_version=mapping_version,
+        engine=settings.engine, root_repository=settings.root_repository,
+        target_repository=settings.target_repository, method_lib=settings.method_lib,
+        deterministic=settings.deterministic, aggregate=settings.aggregate)
+
+
+def resume_jobs(
+    jobs: List[BatchJob],
+    journal: JobJournal,
+    sources: Dict[str, str]
+) -> Dict[str, BatchResult]:
+    """
+    Ergebnisse der Aufträge, die laut Job-Journal nicht neu konvertiert werden müssen.
+
+    Aufträge mit gespeicherter erfolgreicher Antwort sind abgeschlossen (status_code gesetzt);
+    bei geschriebenem Payload muss nur noch gesendet werden. Aufträge mit geänderter Quelle
+    (siehe job_source) fehlen im Ergebnis und werden neu konvertiert.
+
+    Returns:
+        Dictionary EPD-Name -> BatchResult
+    """
+    resumed = {}
+    for job in jobs:
+        if journal.state(job.epd_name, sources[job.epd_name]) is None:
+            continue
+        payload_path = journal.payload_path(job.epd_name)
+        if payload_path is None:
+            continue
+        result = BatchResult(file=job.file, sheet=job.sheet, epd_name=job.epd_name, output=str(payload_path))
+        response = journal.response(job.epd_name)
+        if response is not None:
+            result.status_code = response.status_code
+        resumed[job.epd_name] = result
+    return resumed
+
+
+def submit_results(
+    results: List[BatchResult],
+    engine: "SubmissionEngine",
+    ledger: Optional[SubmissionLedger] = None,
+    impact_cache: Optional["ImpactFactorCache"] = None,
+    journal: Optional[JobJournal] = None
+) -> None:
+    """
+    Sendet die geschriebenen Payloads aller erfolgreichen Aufträge über die SubmissionEngine.
+
+    Status-Code bzw. Fehler werden im jeweiligen BatchResult vermerkt und ausgegeben,
+    sobald die Antwort eintrifft. Mit Ledger werden bereits berechnete, identische Payloads
+    nicht erneut gesendet; mit impact_cache werden die Wirkungsfaktoren aus den Antworten
+    übernommen (siehe bom_to_epd_lcia). Mit Journal werden Übermittlung und Antwort je EPD
+    protokolliert; Aufträge mit bereits gespeicherter Antwort (status_code gesetzt) werden
+    übersprungen.
+    """
+    if impact_cache is not None:
+        from bom_to_epd_lcia import record_impact_factors
+
+    payloads = {}
+    for i, result in enumerate(results):
+        if result.output and not result.error and result.status_code is None:
+            payload, body = load_json(result.output)
+            recorded = ledger.lookup(payload) if ledger is not None else None
+            if recorded is not None:
+                result.status_code = recorded.status_code
+                if journal is not None:
+                    journal.record_response(result.epd_name, recorded)
+                print(f"{result.epd_name}: bereits berechnet, gespeicherte Antwort (Status {recorded.status_code})")
+                continue
+            payloads[i] = (payload, body)
+            if journal is not None:
+                journal.record(result.epd_name, "submitted")
+
+    for submission in engine.submit_many((i, payload, body) for i, (payload, body) in payloads.items()):
+        result = results[submission.key]
+        result.status_code = submission.status_code
+        if not submission.ok:
+            result.error = submission.error or f"HTTP {submission.status_code}"
+        else:
+            if ledger is not None:
+                ledger.record(payloads[submission.key][0], submission.response)
+            if impact_cache is not None:
+                try:
+                    record_impact_factors(impact_cache, payloads[submission.key][0], submission.response.json())
+                except ValueError:
+                    pass
+        if journal is not None and submission.response is not None:
+            journal.record_response(result.epd_name, submission.response)
+        print(f"{result.epd_name}: Status {submission.status_code} nach {submission.attempts} "
+              f"Versuch(en), {submission.seconds:.2f} s")
+
+
+def summarize(results: List[BatchResult], elapsed: float) -> Dict[str, Any]:
+    """Berechnet die Durchsatz-Kennzahlen eines Batch-Laufs."""
+    rows = sum(r.rows for r in results)
+    elapsed = max(elapsed, 1e-9)
+    return {
+        "files": len(results),
+        "failed": sum(1 for r in results if r.error),
+        "rows": rows,
+        "missing": sum(r.missing for r in results),
+        "seconds": elapsed,
+        "files_per_second": len(results) / elapsed,
+        "rows_per_second": rows / elapsed
+    }
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Konvertiert ein Verzeichnis oder Manifest (CSV/YAML) von BoM-Dateien in EPD-Payloads."
+    )
+    parser.add_argument("source", type=Path, nargs="?",
+                        help="Verzeichnis mit BoM-Dateien oder Manifest (.csv/.yaml/.yml); "
+                             "bei --resume optional (dann die Aufträge aus dem Job-Journal)")
+    parser.add_argument("-o", "--output-dir", type=Path, default=Path(__file__).parent / "results")
+    parser.add_argument("-m", "--mapping", type=Path,
+                        default=Path(__file__).parent / "Mapping_Materials_to_Processes.xlsx",
+                        help="Mapping-Excel-Datei oder Mapping-Datenbank (.sqlite/.db)")
+    parser.add_argument("--mapping-version", default=None,
+                        help="Version der Mapping-Datenbank (Standard: neueste)")
+    parser.add_argument("--sheet", default=None, help="Sheet-Name (Standard: erstes Sheet)")
+    parser.add_argument("--material-column", default="C", help="Material-Spalte (Buchstabe oder Index)")
+    parser.add_argument("--amount-column", default="E", help="Amount-Spalte (Buchstabe oder Index)")
+    parser.add_argument("--level-column", default=None,
+                        help="Ebenen-Spalte einer mehrstufigen BoM (Buchstabe oder Index, optional)")
+    parser.add_argument("--start-row", type=int, default=0, help="Start-Zeilenindex (0 = Zeile 1)")
+    parser.add_argument("--engine", default=None, choices=["auto", *BOM_READERS],
+                        help="Lese-Backend der BoM-Dateien (Standard: nach Dateiendung)")
+    parser.add_argument("--unit", default="kg", help="EPD-Einheit")
+    parser.add_argument("--root-repository", default=DEFAULT_ROOT_REPOSITORY)
+    parser.add_argument("--target-repository", default=DEFAULT_TARGET_REPOSITORY)
+    parser.add_argument("--auth-url", default=DEFAULT_AUTH_URL)
+    parser.add_argument("--auth-user", default=os.environ.get("BOM_TO_EPD_AUTH_USER", ""))
+    parser.add_argument("--auth-password", default=os.environ.get("BOM_TO_EPD_AUTH_PASSWORD", ""))
+    parser.add_argument("--method-url", default=DEFAULT_METHOD_URL)
+    parser.add_argument("--method-name", default=DEFAULT_METHOD_NAME)
+    parser.add_argument("-j", "--workers", type=int, default=None,
+                        help="Anzahl Worker-Prozesse (Standard: Anzahl CPU-Kerne)")
+    parser.add_argument("--deterministic", action="store_true",
+                        help="Deterministische IDs; identische, bereits berechnete EPDs nicht erneut senden")
+    parser.add_argument("--aggregate", action="store_true",
+                        help="Zeilen mit gleicher Prozess-UUID und Einheit zu einer Komponente zusammenfassen")
+    parser.add_argument("--no-validate", dest="validate", action="store_false",
+                        help="Payloads vor dem Senden nicht lokal prüfen")
+    parser.add_argument("--pretty", action="store_true", help="JSON eingerückt schreiben (Debug)")
+    parser.add_argument("--gzip", action="store_true", help="JSON-Dateien gzip-komprimiert schreiben")
+    parser.add_argument("--gzip-request", action="store_true",
+                        help="HTTP-Body gzip-komprimiert senden (Content-Encoding: gzip)")
+    parser.add_argument("--submit", action="store_true", help="Payloads an die API senden")
+    parser.add_argument("--api-url", default=DEFAULT_API_URL)
+    parser.add_argument("--api-key", default=os.environ.get("BOM_TO_EPD_API_KEY", DEFAULT_API_KEY))
+    parser.add_argument("--concurrency", type=int, default=8, help="Gleichzeitige API-Anfragen")
+    parser.add_argument("--rate-limit", type=float, default=None, help="Maximale API-Anfragen pro Sekunde")
+    parser.add_argument("--max-retries", type=int, default=5, help="Wiederholungen bei 429/5xx")
+    parser.add_argument("--cache-impacts", action="store_true",
+                        help="Wirkungsfaktoren aus den API-Antworten im Output-Verzeichnis zwischenspeichern")
+    parser.add_argument("--journal", action="store_true",
+                        help="Stufen je EPD absturzsicher im Job-Journal des Output-Verzeichnisses protokollieren")
+    parser.add_argument("--resume", action="store_true",
+                        help="Abgebrochenen Lauf fortsetzen: abgeschlossene Stufen laut Job-Journal überspringen")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = build_arg_parser()
+    args = parser.parse_args(argv)
+    if args.source is None and not args.resume:
+        parser.error("source fehlt (nur mit --resume optional)")
+
+    journal = JobJournal(args.output_dir) if args.journal or args.resume else None
+    if args.source is None:
+        # Aufträge aus dem Journal (Leseparameter aus der Stufe "parsed")
+        jobs = [BatchJob(**state["job"]) for state in journal.states.values() if state.get("job")]
+    else:
+        try:
+            if args.source.is_dir():
+                jobs = discover_jobs(args.source, args.mapping, args)
+            else:
+                jobs = load_manifest(args.source, args)
+        except ValueError as e:
+            parser.error(str(e))
+    if not jobs:
+        print(f"Keine BoM-Dateien gefunden in: {args.source if args.source is not None else journal.path}")
+        return 1
+
+    settings = BatchSettings(
+        root_repository=args.root_repository,
+        target_repository=args.target_repository,
+        auth_list=[{"url": args.auth_url, "user": args.auth_user, "password": args.auth_password}],
+        method_lib={"url": args.method_url, "name": args.method_name},
+        output_dir=str(args.output_dir),
+        deterministic=args.deterministic,
+        aggregate=args.aggregate,
+        pretty_json=args.pretty,
+        compress_output=args.gzip,
+        engine=args.engine,
+        validate=args.validate
+    )
+
+    started = time.perf_counter()
+    if journal is None:
+        results = run_batch(jobs, args.mapping, settings, args.workers, args.mapping_version)
+    else:
+        sources = {job.epd_name: job_source(job, args.mapping, settings, args.mapping_version) for job in jobs}
+        resumed = resume_jobs(jobs, journal, sources) if args.resume else {}
+        if resumed:
+            done = sum(1 for result in resumed.values() if result.status_code is not None)
+            print(f"Job-Journal: {done} EPDs abgeschlossen, {len(resumed) - done} nur noch zu senden, "
+                  f"{len(jobs) - len(resumed)} zu konvertieren")
+
+        def record(job: BatchJob, result: BatchResult) -> None:
+            if result.error:
+                return
+            journal.record_parsed(job.epd_name, sources[job.epd_name], **asdict(job))
+            journal.record_payload(job.epd_name, result.output)
+
+        pending = [job for job in jobs if job.epd_name not in resumed]
+        converted = iter(run_batch(pending, args.mapping, settings, args.workers, args.mapping_version, record))
+        results = [resumed[job.epd_name] if job.epd_name in resumed else next(converted) for job in jobs]
+    if args.submit:
+        from bom_to_epd_api import SubmissionEngine
+        from bom_to_epd_lcia import ImpactFactorCache, IMPACT_CACHE_FILENAME
+
+        impact_cache = ImpactFactorCache(args.output_dir / IMPACT_CACHE_FILENAME) if args.cache_impacts else None
+        with SubmissionEngine(args.api_url, args.api_key, max_concurrency=args.concurrency,
+                              rate_limit=args.rate_limit, max_retries=args.max_retries,
+                              compress=args.gzip_request) as engine:
+            ledger = SubmissionLedger(args.output_dir / LEDGER_FILENAME) if args.deterministic else None
+            submit_results(results, engine, ledger, impact_cache, journal)
+        if impact_cache is not None:
+            print(f"Wirkungsfaktoren im Cache: {len(impact_cache)} Prozesse")
+            impact_cache.close()
+    summary = summarize(results, time.perf_counter() - started)
+
+    for result in results:
+        if result.error:
+            print(f"FEHLER {result.file} [{result.sheet}]: {result.error}")
+        elif result.missing:
+            print(f"{result.epd_name}: {result.missing} Materialien ohne A1-UUID übersprungen")
+
+    print(f"{summary['files']} Dateien ({summary['failed']} fehlgeschlagen), {summary['rows']} Zeilen "
+          f"in {summary['seconds']:.2f} s: {summary['files_per_second']:.2f} Dateien/s, "
+          f"{summary['rows_per_second']:.0f} Zeilen/s")
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,288 @@
+"""
+Benchmark der Pipeline mit synthetischen BoM- und Mapping-Dateien
+
+Erzeugt BoM-Arbeitsmappen und Mapping-Dateien in konfigurierbarer Größe (Trefferquote im
+Mapping, Anteil der Materialien mit A3-Prozess) und misst jede Stufe einzeln:
+read_excel (BoM lesen), Parsen (parse_bom_materials), Mapping laden, Merge (map_materials),
+read_excel_like_reference (inputs/components), generate_payload und save_json.
+
+Jede Größe läuft in einem eigenen Python-Prozess, damit der gemeldete Spitzen-Speicher
+(peak RSS) nur diesen Lauf betrifft. Der Mapping-Sidecar wird vorab erzeugt, "load_mapping"
+misst also das Laden aus dem Cache. Die Ergebnisse werden als JSON geschrieben bzw. bei
+Endung .jsonl an die Datei angehängt (eine Zeile pro Lauf), um Releases vergleichen zu können.
+
+Beispiel:
+    python bom_to_epd_benchmark.py --lines 1000,10000,100000 --hit-ratio 0.9 -o benchmark.json
+"""
+
+import argparse
+import json
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+from typing import Optional, List, Dict, Any
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+DEFAULT_LINES = (1000, 10000, 100000)
+DEFAULT_MATERIALS = 2000
+STAGES = ("read_excel", "parse", "load_mapping", "merge", "read_excel_like_reference",
+          "generate_payload", "save_json")
+
+MAPPING_COLUMNS = ["Material_name", "Process_uuid_A1", "Process_unit_A1", "Conversion_factor_A1",
+                   "Process_uuid_A3", "Process_unit_A3", "Conversion_factor_A3"]
+UNITS = ("kg", "m2", "m3", "Item(s)")
+
+
+def generate_mapping(path: Path, materials: int = DEFAULT_MATERIALS, a3_ratio: float = 0.3,
+                     seed: int = 0) -> Path:
+    """
+    Schreibt eine synthetische Mapping-Datei.
+
+    Args:
+        path: Zieldatei (.xlsx)
+        materials: Anzahl Materialien ("Material 0" bis "Material <n-1>")
+        a3_ratio: Anteil der Materialien mit A3-Prozess (0..1)
+        seed: Startwert des Zufallsgenerators
+
+    Returns:
+        Pfad der geschriebenen Datei
+    """
+    from openpyxl import Workbook
+
+    rng = random.Random(seed)
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Mapping")
+    ws.append(MAPPING_COLUMNS)
+    for i in range(materials):
+        has_a3 = rng.random() < a3_ratio
+        ws.append([
+            f"Material {i}",
+            str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+            rng.choice(UNITS),
+            round(rng.uniform(0.1, 5.0), 4),
+            str(uuid.UUID(int=rng.getrandbits(128), version=4)) if has_a3 else None,
+            "kg" if has_a3 else None,
+            round(rng.uniform(0.5, 1.5), 4) if has_a3 else None,
+        ])
+    wb.save(path)
+    return path
+
+
+def generate_bom(path: Path, lines: int, materials: int = DEFAULT_MATERIALS, hit_ratio: float = 0.9,
+                 seed: int = 0) -> Path:
+    """
+    Schreibt eine synthetische BoM (Material in Spalte C, Menge in Spalte E, ab Zeile 1).
+
+    Args:
+        path: Zieldatei (.xlsx)
+        lines: Anzahl Materialzeilen
+        materials: Anzahl Materialien im Mapping (siehe generate_mapping)
+        hit_ratio: Anteil der Zeilen, deren Material im Mapping vorkommt (0..1)
+        seed: Startwert des Zufallsgenerators
+
+    Returns:
+        Pfad der geschriebenen Datei
+    """
+    from openpyxl import Workbook
+
+    rng = random.Random(seed)
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("BoM")
+    for i in range(lines):
+        if rng.random() < hit_ratio:
+            material = f"Material {rng.randrange(materials)}"
+        else:
+            material = f"Unknown material {i}"
+        # Mengen teils als Text mit Dezimalkomma, wie in echten BoMs
+        amount = round(rng.uniform(0.001, 50.0), 3)
+        ws.append([i + 1, "Pos", material, "Beschreibung", str(amount).replace(".", ",") if i % 4 == 0 else amount])
+    ws.append([None, None, "Total net weight material", None, 100.0])
+    ws.append([None, None, "Final product", None, 112.5])
+    wb.save(path)
+    return path
+
+
+def _peak_rss_mb() -> Optional[float]:
+    """Spitzen-Speicher des Prozesses in MB (None, wenn nicht verfügbar)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux meldet kB, macOS Bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def run_case(bom_file: Path, mapping_file: Path, output_dir: Path, streaming: bool = True) -> Dict[str, Any]:
+    """
+    Führt die Pipeline einmal aus und misst jede Stufe.
+
+    Returns:
+        Dictionary mit 'stages' (Sekunden je Stufe), 'wall_seconds', 'rows', 'rows_per_second',
+        'payload_bytes' und 'peak_rss_mb'
+    """
+    import bom_to_epd as b
+
+    # Importe nicht der ersten Stufe zurechnen
+    b.warm_up()
+    stages = {}
+    started = time.perf_counter()
+
+    def timed(name, func, *args, **kwargs):
+        t0 = time.perf_counter()
+        value = func(*args, **kwargs)
+        stages[name] = round(time.perf_counter() - t0, 6)
+        return value
+
+    df_raw = timed("read_excel", b.read_bom_frame, bom_file, "BoM", 0, 2, 4, streaming)
+    df_mat = timed("parse", b.parse_bom_materials, df_raw, 2, 4)
+    df_map = timed("load_mapping", b.load_mapping, mapping_file)
+    df_merged = timed("merge", b.map_materials, df_mat, df_map)
+    df_found = df_merged[df_merged['Process_uuid_A1'].notna()]
+    inputs, components = timed("read_excel_like_reference", b.read_excel_like_reference,
+                                df_found, b.DEFAULT_ROOT_REPOSITORY)
+    payload = timed("generate_payload", b.generate_payload, "Benchmark", inputs, components, "kg",
+                    b.DEFAULT_TARGET_REPOSITORY, [], {})
+    body = b.encode_json(payload)
+    timed("save_json", b.save_json, body, output_dir / "benchmark.json")
+
+    wall = time.perf_counter() - started
+    rows = len(df_raw)
+    return {
+        "stages": stages,
+        "wall_seconds": round(wall, 6),
+        "rows": rows,
+        "mapped_rows": len(df_found),
+        "rows_per_second": round(rows / wall, 1) if wall > 0 else None,
+        "payload_bytes": len(body),
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def _run_case_in_subprocess(bom_file: Path, mapping_file: Path, output_dir: Path, streaming: bool) -> Dict[str, Any]:
+    args = [sys.executable, str(Path(__file__).resolve()), "--case",
+            json.dumps({"bom": str(bom_file), "mapping": str(mapping_file),
+                        "output_dir": str(output_dir), "streaming": streaming})]
+    out = subprocess.run(args, cwd=Path(__file__).parent, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def run_benchmark(
+    lines: List[int],
+    workdir: Path,
+    materials: int = DEFAULT_MATERIALS,
+    hit_ratio: float = 0.9,
+    a3_ratio: float = 0.3,
+    streaming: bool = True,
+    repeat: int = 1,
+    seed: int = 0
+) -> List[Dict[str, Any]]:
+    """
+    Erzeugt (falls noch nicht vorhanden) die Testdateien und misst alle Größen.
+
+    Args:
+        lines: BoM-Größen (Anzahl Zeilen)
+        workdir: Verzeichnis für die erzeugten Dateien (werden wiederverwendet)
+        materials: Anzahl Materialien im Mapping
+        hit_ratio: Anteil der BoM-Zeilen mit Treffer im Mapping
+        a3_ratio: Anteil der Mapping-Einträge mit A3-Prozess
+        streaming: Lesemodus der BoM (siehe read_bom_frame)
+        repeat: Anzahl Läufe je Größe; gemeldet wird der schnellste
+        seed: Startwert des Zufallsgenerators
+
+    Returns:
+        Liste der Ergebnisse je Größe
+    """
+    workdir.mkdir(parents=True, exist_ok=True)
+    mapping_file = workdir / f"mapping_{materials}_{a3_ratio}_{seed}.xlsx"
+    if not mapping_file.exists():
+        generate_mapping(mapping_file, materials, a3_ratio, seed)
+    # Sidecar vorab erzeugen, damit load_mapping in allen Läufen den Cache-Pfad misst
+    from bom_to_epd import load_mapping
+    load_mapping(mapping_file)
+
+    results = []
+    for n in lines:
+        bom_file = workdir / f"bom_{n}_{materials}_{hit_ratio}_{seed}.xlsx"
+        if not bom_file.exists():
+            generate_bom(bom_file, n, materials, hit_ratio, seed)
+        with tempfile.TemporaryDirectory() as output_dir:
+            runs = [_run_case_in_subprocess(bom_file, mapping_file, Path(output_dir), streaming)
+                    for _ in range(max(1, repeat))]
+        best = min(runs, key=lambda r: r["wall_seconds"])
+        best.update({"lines": n, "materials": materials, "hit_ratio": hit_ratio,
+                     "a3_ratio": a3_ratio, "streaming": streaming})
+        results.append(best)
+    return results
+
+
+def _environment() -> Dict[str, Any]:
+    import pandas
+    import openpyxl
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "pandas": pandas.__version__,
+        "openpyxl": openpyxl.__version__,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+
+
+def write_results(results: List[Dict[str, Any]], output: Path) -> None:
+    """Schreibt die Ergebnisse als JSON bzw. hängt sie bei Endung .jsonl zeilenweise an."""
+    environment = _environment()
+    if output.suffix == ".jsonl":
+        with open(output, "a", encoding="utf-8") as f:
+            for result in results:
+                f.write(json.dumps({**environment, **result}) + "\n")
+    else:
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump({"environment": environment, "results": results}, f, indent=2)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Misst die Stufen der BoM-zu-EPD-Pipeline.")
+    parser.add_argument("--lines", default=",".join(str(n) for n in DEFAULT_LINES),
+                        help="Kommagetrennte BoM-Größen (z.B. 1000,10000,1000000)")
+    parser.add_argument("--materials", type=int, default=DEFAULT_MATERIALS, help="Materialien im Mapping")
+    parser.add_argument("--hit-ratio", type=float, default=0.9, help="Anteil der Zeilen mit Mapping-Treffer")
+    parser.add_argument("--a3-ratio", type=float, default=0.3, help="Anteil der Mapping-Einträge mit A3")
+    parser.add_argument("--pandas", action="store_true", help="BoM mit pd.read_excel statt gestreamt lesen")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workdir", type=Path, default=Path(tempfile.gettempdir()) / "bom_to_epd_benchmark",
+                        help="Verzeichnis für die erzeugten Testdateien")
+    parser.add_argument("-o", "--output", type=Path, default=Path("benchmark.json"),
+                        help="Ergebnisdatei (.json oder .jsonl zum Anhängen)")
+    parser.add_argument("--case", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.case:
+        case = json.loads(args.case)
+        result = run_case(Path(case["bom"]), Path(case["mapping"]), Path(case["output_dir"]), case["streaming"])
+        print(json.dumps(result))
+        return 0
+
+    lines = [int(n) for n in args.lines.split(",") if n.strip()]
+    results = run_benchmark(lines, args.workdir, args.materials, args.hit_ratio, args.a3_ratio,
+                            not args.pandas, args.repeat, args.seed)
+    for r in results:
+        stages = ", ".join(f"{name} {r['stages'][name] * 1000:.0f} ms" for name in STAGES)
+        peak = f"{r['peak_rss_mb']:.0f} MB" if r["peak_rss_mb"] is not None else "-"
+        print(f"{r['lines']:>9} Zeilen: {r['wall_seconds']:.2f} s, {r['rows_per_second']:.0f} Zeilen/s, "
+              f"Peak {peak} ({stages})")
+    write_results(results, args.output)
+    print(f"Ergebnisse gespeichert unter: {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,184 @@
+"""
+Strukturierte Ereignisse und Stufen-Zeiten für process_epd
+
+process_epd meldet jede Stufe (BoM lesen, Komponenten bauen, JSON speichern, API-Aufruf, ...)
+mit Start- und Stop-Ereignis inklusive Dauer und Kennzahlen (Zeilen, Bytes, HTTP-Status) sowie
+Textmeldungen für den Benutzer. Wohin die Ereignisse gehen, bestimmen austauschbare Sinks:
+Konsole, logging, JSONL-Trace-Datei oder eine Liste im Speicher (z.B. für Tests).
+
+Beispiel:
+    events = Instrumentation([ConsoleSink(), JsonlTraceSink("trace.jsonl")])
+    process_epd(..., events=events)
+
+Ist die Umgebungsvariable BOM_TO_EPD_TRACE gesetzt, schreibt default_instrumentation()
+zusätzlich eine Trace-Datei unter diesem Pfad.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+from typing import Optional, Callable, Iterator, List, Dict, Any, Union
+
+
+TRACE_ENV_VARIABLE = "BOM_TO_EPD_TRACE"
+
+
+@dataclass
+class Event:
+    """
+    Ein Ereignis der Pipeline.
+
+    kind ist "start" bzw. "stop" (Beginn/Ende einer Stufe, bei "stop" mit seconds) oder
+    "message" (Textmeldung in message, level "info" oder "warning").
+    """
+    kind: str
+    stage: Optional[str] = None
+    seconds: Optional[float] = None
+    message: Optional[str] = None
+    level: str = "info"
+    fields: Dict[str, Any] = field(default_factory=dict)
+    timestamp: float = field(default_factory=time.time)
+    run: Optional[str] = None
+
+
+class ConsoleSink:
+    """Gibt Textmeldungen auf der Konsole aus (bisheriges Verhalten von process_epd)."""
+
+    def emit(self, event: Event) -> None:
+        if event.kind == "message":
+            print(event.message)
+
+
+class CallbackSink:
+    """Leitet Textmeldungen an eine Funktion weiter (z.B. log_callback der GUI)."""
+
+    def __init__(self, callback: Callable[[str], None]):
+        self.callback = callback
+
+    def emit(self, event: Event) -> None:
+        if event.kind == "message":
+            self.callback(event.message)
+
+
+class LoggingSink:
+    """Schreibt alle Ereignisse in einen logging-Logger (Stufen mit Dauer und Kennzahlen)."""
+
+    def __init__(self, logger: Optional[logging.Logger] = None, level: int = logging.INFO):
+        self.logger = logger or logging.getLogger("bom_to_epd")
+        self.level = level
+
+    def emit(self, event: Event) -> None:
+        if event.kind == "message":
+            level = logging.WARNING if event.level == "warning" else self.level
+            self.logger.log(level, event.message)
+        elif event.kind == "stop":
+            details = " ".join(f"{key}={value}" for key, value in event.fields.items())
+            self.logger.log(self.level, "%s: %.3f s %s", event.stage, event.seconds, details)
+        else:
+            self.logger.debug("%s gestartet", event.stage)
+
+
+class JsonlTraceSink:
+    """
+    Hängt jedes Ereignis als JSON-Zeile an eine Trace-Datei an.
+
+    Args:
+        path: Pfad der Trace-Datei (wird angelegt bzw. fortgeschrieben)
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    def emit(self, event: Event) -> None:
+        line = json.dumps(asdict(event), ensure_ascii=False, default=str)
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+
+class MemorySink:
+    """Sammelt alle Ereignisse in einer Liste (z.B. für Tests und Auswertungen)."""
+
+    def __init__(self):
+        self.events: List[Event] = []
+        self._lock = threading.Lock()
+
+    def emit(self, event: Event) -> None:
+        with self._lock:
+            self.events.append(event)
+
+    def stages(self) -> Dict[str, float]:
+        """Dauer je Stufe in Sekunden (bei mehrfachen Durchläufen aufsummiert)."""
+        durations: Dict[str, float] = {}
+        for event in self.events:
+            if event.kind == "stop":
+                durations[event.stage] = durations.get(event.stage, 0.0) + event.seconds
+        return durations
+
+    def messages(self) -> List[str]:
+        return [event.message for event in self.events if event.kind == "message"]
+
+
+class Instrumentation:
+    """
+    Verteilt Ereignisse an die konfigurierten Sinks.
+
+    Args:
+        sinks: Objekte mit einer Methode emit(event)
+        run: Optionale Kennung des Laufs (z.B. EPD-Name), wird in jedes Ereignis übernommen
+    """
+
+    def __init__(self, sinks: Optional[List[Any]] = None, run: Optional[str] = None):
+        self.sinks = list(sinks or [])
+        self.run = run
+
+    def emit(self, event: Event) -> None:
+        if event.run is None:
+            event.run = self.run
+        for sink in self.sinks:
+            sink.emit(event)
+
+    def message(self, text: str, level: str = "info") -> None:
+        """Textmeldung für den Benutzer."""
+        self.emit(Event("message", message=text, level=level))
+
+    def warning(self, text: str) -> None:
+        self.message(text, level="warning")
+
+    @contextmanager
+    def stage(self, name: str, **fields: Any) -> Iterator[Dict[str, Any]]:
+        """
+        Misst eine Stufe. Der gelieferte Dictionary kann um Kennzahlen ergänzt werden
+        (z.B. rows, bytes, status), die mit dem Stop-Ereignis gemeldet werden.
+        """
+        self.emit(Event("start", stage=name, fields=dict(fields)))
+        metrics = dict(fields)
+        started = time.perf_counter()
+        try:
+            yield metrics
+        except BaseException as e:
+            metrics["error"] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            self.emit(Event("stop", stage=name, seconds=round(time.perf_counter() - started, 6),
+                            fields=metrics))
+
+
+def default_instrumentation(
+    log_callback: Optional[Callable[[str], None]] = None,
+    run: Optional[str] = None
+) -> Instrumentation:
+    """
+    Standard-Instrumentierung von process_epd: Meldungen an log_callback bzw. die Konsole und,
+    falls BOM_TO_EPD_TRACE gesetzt ist, alle Ereignisse in diese Trace-Datei.
+    """
+    sinks: List[Any] = [CallbackSink(log_callback) if log_callback else ConsoleSink()]
+    trace_path = os.environ.get(TRACE_ENV_VARIABLE)
+    if trace_path:
+        sinks.append(JsonlTraceSink(trace_path))
+    return Instrumentation(sinks, run)
@@ -2,8 +2,132 @@ import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 from pathlib import Path
 import threading
-from bom_to_epd import process_epd, read_materials_and_map
-import pandas as pd
+# bom_to_epd importiert pandas/requests erst bei Bedarf (siehe warm_up)
+from bom_to_epd import (
+    process_epd, PipelineSession, column_letter_to_index, warm_up, OperationCancelled,
+    DEFAULT_ROOT_REPOSITORY, DEFAULT_TARGET_REPOSITORY, DEFAULT_API_URL, DEFAULT_API_KEY,
+    DEFAULT_AUTH_URL, DEFAULT_METHOD_URL, DEFAULT_METHOD_NAME, EPD_UNITS
+)
+from bom_to_epd_events import MemorySink, default_instrumentation
+
+def format_number(decimals):
+    """Formatierer für Zahlen in PreviewTable (fehlende Werte als "-")"""
+    def _format(value):
+        try:
+            if value != value:  # NaN
+                return "-"
+            return f"{value:.{decimals}f}"
+        except (TypeError, ValueError):
+            return "-" if value is None else str(value)
+    return _format
+
+
+class PreviewTable(ttk.Frame):
+    """
+    Seitenweise Tabelle über einem DataFrame.
+    
+    Es werden immer nur PAGE_SIZE Zeilen in den Treeview eingefügt. Sortieren (Klick auf die
+    Spaltenüberschrift) und Filtern (Material-Text, optional Einheit) arbeiten auf dem
+    DataFrame, ohne die Excel-Datei neu einzulesen.
+    """
+    PAGE_SIZE = 500
+    ALL_UNITS = "Alle"
+    
+    def __init__(self, parent, df, columns, formatters=None, unit_column=None, height=10):
+        super().__init__(parent)
+        self.df = df.reset_index(drop=True)
+        self.view = self.df
+        self.columns = [name for name, _, _ in columns]
+        self.formatters = formatters or {}
+        self.unit_column = unit_column
+        self.sort_column = None
+        self.sort_descending = False
+        self.page = 0
+        
+        # Filterleiste
+        filter_bar = ttk.Frame(self)
+        filter_bar.pack(fill=tk.X, pady=(0, 3))
+        ttk.Label(filter_bar, text="Filter Material:").pack(side=tk.LEFT)
+        self.filter_text = tk.StringVar()
+        self.filter_text.trace_add("write", lambda *_: self.apply_filter())
+        ttk.Entry(filter_bar, textvariable=self.filter_text, width=30).pack(side=tk.LEFT, padx=5)
+        self.filter_unit = tk.StringVar(value=self.ALL_UNITS)
+        if unit_column:
+            ttk.Label(filter_bar, text="Einheit:").pack(side=tk.LEFT, padx=(10, 0))
+            units = sorted(self.df[unit_column].astype(str).unique().tolist())
+            unit_combo = ttk.Combobox(filter_bar, textvariable=self.filter_unit, values=[self.ALL_UNITS] + units, width=12, state="readonly")
+            unit_combo.pack(side=tk.LEFT, padx=5)
+            unit_combo.bind("<<ComboboxSelected>>", lambda _: self.apply_filter())
+        
+        # Treeview
+        tree_frame = ttk.Frame(self)
+        tree_frame.pack(fill=tk.BOTH, expand=True)
+        self.tree = ttk.Treeview(tree_frame, columns=self.columns, show="headings", height=height)
+        for name, heading, width in columns:
+            self.tree.heading(name, text=heading, command=lambda c=name: self.sort_by(c))
+            self.tree.column(name, width=width, minwidth=min(width, 80))
+        scrollbar = ttk.Scrollbar(tree_frame, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.tree.pack(side="left", fill=tk.BOTH, expand=True)
+        scrollbar.pack(side="right", fill="y")
+        
+        # Seitennavigation
+        pager = ttk.Frame(self)
+        pager.pack(fill=tk.X, pady=(3, 0))
+        ttk.Button(pager, text="<", width=3, command=lambda: self.show_page(self.page - 1)).pack(side=tk.LEFT)
+        self.page_label = ttk.Label(pager)
+        self.page_label.pack(side=tk.LEFT, padx=5)
+        ttk.Button(pager, text=">", width=3, command=lambda: self.show_page(self.page + 1)).pack(side=tk.LEFT)
+        
+        self.show_page(0)
+    
+    def page_count(self):
+        return max(1, (len(self.view) + self.PAGE_SIZE - 1) // self.PAGE_SIZE)
+    
+    def apply_filter(self):
+        """Filtert nach Material-Text und Einheit und zeigt die erste Seite"""
+        mask = None
+        text = self.filter_text.get().strip()
+        if text:
+            mask = self.df["Material"].str.contains(text, case=False, regex=False)
+        unit = self.filter_unit.get()
+        if self.unit_column and unit != self.ALL_UNITS:
+            unit_mask = self.df[self.unit_column].astype(str) == unit
+            mask = unit_mask if mask is None else mask & unit_mask
+        self.view = self.df if mask is None else self.df[mask]
+        self._sort_view()
+        self.show_page(0)
+    
+    def sort_by(self, column):
+        """Sortiert nach einer Spalte; erneuter Klick kehrt die Reihenfolge um"""
+        if self.sort_column == column:
+            self.sort_descending = not self.sort_descending
+        else:
+            self.sort_column, self.sort_descending = column, False
+        self._sort_view()
+        self.show_page(0)
+    
+    def _sort_view(self):
+        if self.sort_column is None:
+            return
+        column = self.view[self.sort_column]
+        key = None if column.dtype.kind in "biuf" else (lambda s: s.astype(str).str.lower())
+        self.view = self.view.sort_values(self.sort_column, ascending=not self.sort_descending,
+                                          kind="stable", key=key, na_position="last")
+    
+    def show_page(self, page):
+        """Fügt die Zeilen einer Seite in den Treeview ein"""
+        self.page = max(0, min(page, self.page_count() - 1))
+        self.tree.delete(*self.tree.get_children())
+        chunk = self.view.iloc[self.page * self.PAGE_SIZE:(self.page + 1) * self.PAGE_SIZE]
+        columns = [
+            [self.formatters.get(c, str)(v) for v in chunk[c].tolist()]
+            for c in self.columns
+        ]
+        for values in zip(*columns):
+            self.tree.insert("", tk.END, values=values)
+        self.page_label.configure(text=f"Seite {self.page + 1}/{self.page_count()} ({len(self.view)} Einträge)")
+
 
 class BoMToEPDGUI:
     def __init__(self, root):
@@ -14,35 +138,57 @@ class BoMToEPDGUI:
         # Variablen
         self.main_file_path = tk.StringVar()
         self.mapping_file_path = tk.StringVar(value=str(Path(__file__).parent / "Mapping_Materials_to_Processes.xlsx"))
+        self.mapping_version = tk.StringVar()
         self.sheet_name = tk.StringVar()
         self.full_name = tk.StringVar()
         self.epd_unit = tk.StringVar(value="kg")
-        self.epd_unit_options = ["kg", "Item(s)", "m", "m²", "m³", "t"]
+        self.epd_unit_options = list(EPD_UNITS)
         self.material_column = tk.StringVar()
         self.amount_column = tk.StringVar()
-        self.root_repository = tk.StringVar(value="https://lca.dev.ditwin.cloud/Playground/Ecoinvent_3_10_EN15804_results2")
-        self.target_repository = tk.StringVar(value="https://lca.dev.ditwin.cloud/Computed/HVDC_Repo")
+        self.level_column = tk.StringVar()
+        self.root_repository = tk.StringVar(value=DEFAULT_ROOT_REPOSITORY)
+        self.target_repository = tk.StringVar(value=DEFAULT_TARGET_REPOSITORY)
         # API & Method Library - fest voreingestellt
-        self.url_api = "https://olca-epd.dev.ditwin.cloud/run-epd-tree"
-        self.api_key = "develop"
+        self.url_api = DEFAULT_API_URL
+        self.api_key = DEFAULT_API_KEY
         self.output_dir = tk.StringVar(value=str(Path(__file__).parent / "results"))
         self.skip_missing = tk.BooleanVar(value=False)
+        self.incremental = tk.BooleanVar(value=False)
+        # Übernommene Mapping-Vorschläge (BoM-Material -> Material_name im Mapping)
+        self.material_overrides = {}
+        # Zwischenergebnisse der Vorschau werden beim Erstellen der EPD wiederverwendet
+        self.session = PipelineSession()
         
         # Auth-Einstellungen
         # Hinweis: Prod (lca.ditwin.cloud) existiert auch, wird aber nicht in der GUI verwendet
         self.auth_url1 = "https://lca.ditwin.cloud"  # Prod - nicht in GUI verwendet
-        self.auth_url2 = "https://lca.dev.ditwin.cloud"  # Dev - wird verwendet
+        self.auth_url2 = DEFAULT_AUTH_URL  # Dev - wird verwendet
         self.auth_user1 = tk.StringVar(value="janne_teresa_kederer_siemens_energy_com")  # Prod - nicht in GUI verwendet
         self.auth_password1 = tk.StringVar(value="Test4EPDtree!")  # Prod - nicht in GUI verwendet
         self.auth_user2 = tk.StringVar(value="janne_teresa_kederer_siemens_energy_com")
         self.auth_password2 = tk.StringVar(value="Test4EPDtree!")
         
         # Method Lib - fest voreingestellt
-        self.method_url = "https://lca.dev.ditwin.cloud"
-        self.method_name = "en15804_pef31_indata_lcia_method"
+        self.method_url = DEFAULT_METHOD_URL
+        self.method_name = DEFAULT_METHOD_NAME
         
         self.create_widgets()
         
+        # Schwere Importe und Mapping erst nach dem Anzeigen des Fensters im Hintergrund laden
+        self.root.after(100, self.start_warm_up)
+        
+    def start_warm_up(self):
+        """Startet das Vorladen von pandas, openpyxl, requests und Mapping im Hintergrund"""
+        def _warm_up():
+            try:
+                warm_up(self.mapping_file_path.get())
+            except Exception:
+                pass  # Fehler treten beim eigentlichen Laden erneut auf und werden dort angezeigt
+        
+        thread = threading.Thread(target=_warm_up)
+        thread.daemon = True
+        thread.start()
+        
     def create_widgets(self):
         # Hauptframe mit Scrollbar
         main_frame = ttk.Frame(self.root)
@@ -77,6 +223,11 @@ class BoMToEPDGUI:
         ttk.Button(scrollable_frame, text="Durchsuchen", command=self.browse_mapping_file).grid(row=current_row, column=2, padx=5, pady=2)
         current_row += 1
         
+        ttk.Label(scrollable_frame, text="Mapping-Version:").grid(row=current_row, column=0, sticky="w", padx=5, pady=2)
+        ttk.Entry(scrollable_frame, textvariable=self.mapping_version, width=20).grid(row=current_row, column=1, padx=5, pady=2, sticky="w")
+        ttk.Label(scrollable_frame, text="(nur Mapping-Datenbank, leer = neueste)", font=("Arial", 8)).grid(row=current_row, column=2, sticky="w", padx=5)
+        current_row += 1
+        
         ttk.Label(scrollable_frame, text="Sheet-Name:").grid(row=current_row, column=0, sticky="w", padx=5, pady=2)
         ttk.Entry(scrollable_frame, textvariable=self.sheet_name, width=50).grid(row=current_row, column=1, columnspan=2, padx=5, pady=2, sticky="w")
         current_row += 1
@@ -91,6 +242,11 @@ class BoMToEPDGUI:
         ttk.Label(scrollable_frame, text="(z.B. A, B, C, ...)", font=("Arial", 8)).grid(row=current_row, column=2, sticky="w", padx=5)
         current_row += 1
         
+        ttk.Label(scrollable_frame, text="Ebenen-Spalte:").grid(row=current_row, column=0, sticky="w", padx=5, pady=2)
+        ttk.Entry(scrollable_frame, textvariable=self.level_column, width=5).grid(row=current_row, column=1, padx=5, pady=2, sticky="w")
+        ttk.Label(scrollable_frame, text="(optional, für mehrstufige BoMs)", font=("Arial", 8)).grid(row=current_row, column=2, sticky="w", padx=5)
+        current_row += 1
+        
         # Materialien-Vorschau Button
         preview_frame = ttk.Frame(scrollable_frame)
         preview_frame.grid(row=current_row, column=0, columnspan=3, pady=10)
@@ -153,6 +309,10 @@ class BoMToEPDGUI:
                        variable=self.skip_missing).grid(row=current_row, column=0, columnspan=3, sticky="w", padx=5, pady=5)
         current_row += 1
         
+        ttk.Checkbutton(scrollable_frame, text="Nur Änderungen gegenüber dem letzten Lauf neu berechnen (BoM-Revisionen)", 
+                       variable=self.incremental).grid(row=current_row, column=0, columnspan=3, sticky="w", padx=5, pady=5)
+        current_row += 1
+        
         # Buttons
         button_frame = ttk.Frame(scrollable_frame)
         button_frame.grid(row=current_row, column=0, columnspan=3, pady=20)
@@ -171,7 +331,8 @@ class BoMToEPDGUI:
     def browse_main_file(self):
         filename = filedialog.askopenfilename(
             title="BoM Excel-Datei auswählen",
-            filetypes=[("Excel-Dateien", "*.xlsx *.xls"), ("Alle Dateien", "*.*")]
+            filetypes=[("Excel-Dateien", "*.xlsx *.xls"), ("ERP-Exporte (CSV, Parquet)", "*.csv *.parquet"),
+                       ("Alle Dateien", "*.*")]
         )
         if filename:
             self.main_file_path.set(filename)
@@ -179,10 +340,12 @@ class BoMToEPDGUI:
     def browse_mapping_file(self):
         filename = filedialog.askopenfilename(
             title="Mapping-Datei auswählen",
-            filetypes=[("Excel-Dateien", "*.xlsx *.xls"), ("Alle Dateien", "*.*")]
+            filetypes=[("Excel-Dateien", "*.xlsx *.xls"), ("Mapping-Datenbanken", "*.sqlite *.sqlite3 *.db"),
+                       ("Alle Dateien", "*.*")]
         )
         if filename:
             self.mapping_file_path.set(filename)
+            self.material_overrides = {}
     
     def browse_output_dir(self):
         dirname = filedialog.askdirectory(title="Output-Verzeichnis auswählen")
@@ -191,15 +354,16 @@ class BoMToEPDGUI:
     
     def column_letter_to_index(self, letter):
         """Konvertiert Spaltenbuchstaben (A, B, C, ..., Z, AA, AB, ...) in Index (0, 1, 2, ...)"""
-        if not letter:
-            return 0
-        letter = letter.upper().strip()
-        index = 0
-        for char in letter:
-            if not char.isalpha():
-                return 0
-            index = index * 26 + (ord(char) - ord('A') + 1)
-        return index - 1
+        return column_letter_to_index(letter)
+    
+    def level_column_index(self):
+        """Index der Ebenen-Spalte oder None, wenn keine angegeben ist"""
+        letter = self.level_column.get().strip()
+        return self.column_letter_to_index(letter) if letter else None
+    
+    def mapping_version_value(self):
+        """Version der Mapping-Datenbank oder None (neueste Version bzw. Excel-Mapping)"""
+        return self.mapping_version.get().strip() or None
     
     def toggle_password(self, entry, var):
         """Schaltet die Sichtbarkeit des Passworts um"""
@@ -209,7 +373,7 @@ class BoMToEPDGUI:
             entry.config(show="*")
     
     def preview_materials(self):
-        """Lädt Materialien aus Excel und zeigt sie in einem Vorschau-Fenster an"""
+        """Lädt Materialien im Hintergrund und zeigt sie in einem Vorschau-Fenster an"""
         # Validierung
         if not self.main_file_path.get():
             messagebox.showerror("Fehler", "Bitte wählen Sie eine BoM Excel-Datei aus.")
@@ -224,124 +388,169 @@ class BoMToEPDGUI:
             messagebox.showerror("Fehler", "Die ausgewählte Mapping-Datei existiert nicht.")
             return
         
-        try:
-            # Materialien lesen (ohne API-Calls)
-            df_merged = read_materials_and_map(
-                self.main_file_path.get(),
-                self.sheet_name.get(),
-                self.mapping_file_path.get(),
-                0,  # Start immer bei Zeile 0
-                self.column_letter_to_index(self.material_column.get()),
-                self.column_letter_to_index(self.amount_column.get())
-            )
-            
-            # Materialien in gefundene und fehlende trennen
-            df_found = df_merged[df_merged['Process_uuid_A1'].notna()].copy()
-            df_missing = df_merged[df_merged['Process_uuid_A1'].isna()].copy()
-            
-            # Vorschau-Fenster erstellen
-            preview_window = tk.Toplevel(self.root)
-            preview_window.title("Materialien-Vorschau")
-            preview_window.geometry("900x600")
-            
-            # Hauptframe
-            main_frame = ttk.Frame(preview_window, padding="10")
-            main_frame.pack(fill=tk.BOTH, expand=True)
-            
-            # Canvas für Scrollbar
-            canvas = tk.Canvas(main_frame)
-            scrollbar = ttk.Scrollbar(main_frame, orient="vertical", command=canvas.yview)
-            scrollable_frame = ttk.Frame(canvas)
-            
-            scrollable_frame.bind(
-                "<Configure>",
-                lambda e: canvas.configure(scrollregion=canvas.bbox("all"))
-            )
-            
-            canvas.create_window((0, 0), window=scrollable_frame, anchor="nw")
-            canvas.configure(yscrollcommand=scrollbar.set)
-            
-            # ===== FEHLENDE MATERIALIEN (ZUERST) =====
-            if len(df_missing) > 0:
-                missing_label = ttk.Label(scrollable_frame, text=f"Fehlende Materialien ({len(df_missing)}) - Bitte prüfen!", font=("Arial", 11, "bold"), foreground="red")
-                missing_label.pack(pady=(0, 5), anchor="w")
-                
-                # Frame für fehlende Materialien
-                missing_frame = ttk.Frame(scrollable_frame)
-                missing_frame.pack(fill=tk.X, pady=(0, 15))
-                
-                # Treeview für fehlende Materialien
-                tree_missing = ttk.Treeview(missing_frame, columns=("Material", "Amount"), show="headings", height=8)
-                tree_missing.heading("Material", text="Material")
-                tree_missing.heading("Amount", text="Amount")
-                
-                tree_missing.column("Material", width=650, minwidth=400)
-                tree_missing.column("Amount", width=150, minwidth=100)
-                
-                # Scrollbar für fehlende
-                scrollbar_missing = ttk.Scrollbar(missing_frame, orient="vertical", command=tree_missing.yview)
-                tree_missing.configure(yscrollcommand=scrollbar_missing.set)
-                
-                # Daten einfügen
-                for _, row in df_missing.iterrows():
-                    material = str(row['Material'])
-                    # Verwende das ursprüngliche Amount
-                    if 'Amount' in row and pd.notna(row['Amount']):
-                        amount = f"{row['Amount']:.4f}"
-                    elif 'Final_Amount_A1' in row and pd.notna(row['Final_Amount_A1']):
-                        amount = f"{row['Final_Amount_A1']:.4f}"
-                    else:
-                        amount = "-"
-                    tree_missing.insert("", tk.END, values=(material, amount))
-                
-                tree_missing.pack(side="left", fill=tk.BOTH, expand=True)
-                scrollbar_missing.pack(side="right", fill="y")
-            
-            # ===== GEFUNDENE MATERIALIEN =====
-            found_label = ttk.Label(scrollable_frame, text=f"Gefundene Materialien ({len(df_found)})", font=("Arial", 11, "bold"))
-            found_label.pack(pady=(10, 5) if len(df_missing) > 0 else (0, 5), anchor="w")
-            
-            # Frame für gefundene Materialien
-            found_frame = ttk.Frame(scrollable_frame)
-            found_frame.pack(fill=tk.X, pady=(0, 10))
-            
-            # Treeview für gefundene Materialien
-            tree_found = ttk.Treeview(found_frame, columns=("Material", "Amount", "Einheit"), show="headings", height=8)
-            tree_found.heading("Material", text="Material")
-            tree_found.heading("Amount", text="Amount")
-            tree_found.heading("Einheit", text="Einheit")
-            
-            tree_found.column("Material", width=500, minwidth=300)
-            tree_found.column("Amount", width=150, minwidth=100)
-            tree_found.column("Einheit", width=150, minwidth=100)
-            
-            # Scrollbar für gefundene
-            scrollbar_found = ttk.Scrollbar(found_frame, orient="vertical", command=tree_found.yview)
-            tree_found.configure(yscrollcommand=scrollbar_found.set)
-            
-            # Daten einfügen
-            for _, row in df_found.iterrows():
-                material = str(row['Material'])
-                amount = f"{row['Final_Amount_A1']:.4f}" if pd.notna(row['Final_Amount_A1']) else "-"
-                unit = str(row['Final_Unit_A1']) if pd.notna(row['Final_Unit_A1']) else "-"
-                tree_found.insert("", tk.END, values=(material, amount, unit))
-            
-            tree_found.pack(side="left", fill=tk.BOTH, expand=True)
-            scrollbar_found.pack(side="right", fill="y")
-            
-            # Canvas und Scrollbar packen
-            canvas.pack(side="left", fill="both", expand=True)
-            scrollbar.pack(side="right", fill="y")
+        # Einstellungen im Haupt-Thread lesen
+        main_file = self.main_file_path.get()
+        sheet_name = self.sheet_name.get()
+        mapping_file = self.mapping_file_path.get()
+        material_column = self.column_letter_to_index(self.material_column.get())
+        amount_column = self.column_letter_to_index(self.amount_column.get())
+        level_column = self.level_column_index()
+        mapping_version = self.mapping_version_value()
+        material_overrides = dict(self.material_overrides)
+        
+        # Vorschau-Fenster mit Fortschrittsanzeige erstellen
+        preview_window = tk.Toplevel(self.root)
+        preview_window.title("Materialien-Vorschau")
+        preview_window.geometry("900x600")
+        
+        progress_frame = ttk.Frame(preview_window, padding="20")
+        progress_frame.pack(fill=tk.X)
+        status = tk.StringVar(value="Lade Materialien...")
+        ttk.Label(progress_frame, textvariable=status).pack(anchor="w")
+        progress_bar = ttk.Progressbar(progress_frame, mode="indeterminate", length=500)
+        progress_bar.pack(fill=tk.X, pady=10)
+        progress_bar.start(10)
+        
+        cancel_event = threading.Event()
+        
+        def cancel():
+            cancel_event.set()
+            preview_window.destroy()
+        
+        ttk.Button(progress_frame, text="Abbrechen", command=cancel).pack()
+        preview_window.protocol("WM_DELETE_WINDOW", cancel)
+        
+        def update_progress(step, done, total):
+            if not preview_window.winfo_exists():
+                return
+            if total:
+                progress_bar.stop()
+                progress_bar.configure(mode="determinate", maximum=total, value=min(done, total))
+                status.set(f"{step}: {done} von {total} Zeilen")
+            else:
+                status.set(f"{step}...")
+        
+        def show_error(error):
+            if preview_window.winfo_exists():
+                preview_window.destroy()
+            messagebox.showerror("Fehler", f"Fehler beim Laden der Materialien: {error}")
+        
+        def load():
+            try:
+                # Materialien lesen (ohne API-Calls)
+                df_merged = self.session.mapped_frame(
+                    main_file,
+                    sheet_name,
+                    mapping_file,
+                    0,  # Start immer bei Zeile 0
+                    material_column,
+                    amount_column,
+                    material_overrides=material_overrides,
+                    progress_callback=lambda *args: self.root.after(0, update_progress, *args),
+                    cancel_event=cancel_event,
+                    level_column_index=level_column,
+                    mapping_version=mapping_version
+                )
+                self.root.after(0, update_progress, "Vorschläge suchen", 0, None)
+                found_view, missing_view = self._build_preview_frames(df_merged, mapping_file, mapping_version)
+                if not cancel_event.is_set():
+                    self.root.after(0, self._show_preview, preview_window, progress_frame, found_view, missing_view)
+            except OperationCancelled:
+                pass
+            except Exception as e:
+                self.root.after(0, show_error, e)
+        
+        thread = threading.Thread(target=load)
+        thread.daemon = True
+        thread.start()
+    
+    def _build_preview_frames(self, df_merged, mapping_file, mapping_version=None):
+        """Bereitet die Tabellen für gefundene und fehlende Materialien vor (im Worker-Thread)"""
+        import pandas as pd
+        from bom_to_epd_match import suggest_mappings
+        
+        # Materialien in gefundene und fehlende trennen
+        df_found = df_merged[df_merged['Process_uuid_A1'].notna()]
+        df_missing = df_merged[df_merged['Process_uuid_A1'].isna()]
+        if 'Assembly' in df_missing.columns:
+            # Baugruppen einer mehrstufigen BoM brauchen keine UUID
+            df_missing = df_missing[~df_missing['Assembly']]
+        
+        found_view = pd.DataFrame({
+            "Material": df_found['Material'].astype(str).tolist(),
+            "Amount": df_found['Final_Amount_A1'].tolist(),
+            "Einheit": [str(u) if pd.notna(u) else "-" for u in df_found['Final_Unit_A1'].tolist()]
+        })
+        
+        # Vorschläge aus dem Mapping-Index derselben Version; verwende das ursprüngliche Amount
+        suggestions = suggest_mappings(df_missing['Material'].tolist(), mapping_file, top_k=1,
+                                       mapping_version=mapping_version)
+        best = [suggestions.get(m) or [None] for m in df_missing['Material'].tolist()]
+        missing_view = pd.DataFrame({
+            "Material": df_missing['Material'].astype(str).tolist(),
+            "Amount": df_missing['Amount'].fillna(df_missing['Final_Amount_A1']).tolist(),
+            "Vorschlag": [b[0].material_name if b[0] else "-" for b in best],
+            "Score": [b[0].score if b[0] else float("nan") for b in best]
+        })
+        return found_view, missing_view
+    
+    def _show_preview(self, preview_window, progress_frame, found_view, missing_view):
+        """Ersetzt die Fortschrittsanzeige durch die Vorschau-Tabellen"""
+        if not preview_window.winfo_exists():
+            return
+        progress_frame.destroy()
+        preview_window.protocol("WM_DELETE_WINDOW", preview_window.destroy)
+        
+        # Hauptframe
+        main_frame = ttk.Frame(preview_window, padding="10")
+        main_frame.pack(fill=tk.BOTH, expand=True)
+        
+        # ===== FEHLENDE MATERIALIEN (ZUERST) =====
+        if len(missing_view) > 0:
+            missing_label = ttk.Label(main_frame, text=f"Fehlende Materialien ({len(missing_view)}) - Bitte prüfen!", font=("Arial", 11, "bold"), foreground="red")
+            missing_label.pack(pady=(0, 5), anchor="w")
             
-            # Schließen-Button
-            button_frame = ttk.Frame(preview_window)
-            button_frame.pack(pady=(5, 10))
-            close_button = ttk.Button(button_frame, text="Schließen", command=preview_window.destroy)
-            close_button.pack()
+            missing_table = PreviewTable(main_frame, missing_view, [
+                ("Material", "Material", 330),
+                ("Amount", "Amount", 100),
+                ("Vorschlag", "Vorschlag aus Mapping", 300),
+                ("Score", "Score", 60)
+            ], formatters={"Amount": format_number(4), "Score": format_number(2)})
+            missing_table.pack(fill=tk.BOTH, expand=True, pady=(0, 5))
             
-        except Exception as e:
-            error_msg = f"Fehler beim Laden der Materialien: {str(e)}"
-            messagebox.showerror("Fehler", error_msg)
+            ttk.Button(main_frame, text="Ausgewählte Vorschläge übernehmen",
+                       command=lambda: self.accept_suggestions(missing_table.tree, preview_window)).pack(pady=(0, 10), anchor="w")
+        
+        # ===== GEFUNDENE MATERIALIEN =====
+        found_label = ttk.Label(main_frame, text=f"Gefundene Materialien ({len(found_view)})", font=("Arial", 11, "bold"))
+        found_label.pack(pady=(10, 5) if len(missing_view) > 0 else (0, 5), anchor="w")
+        
+        found_table = PreviewTable(main_frame, found_view, [
+            ("Material", "Material", 500),
+            ("Amount", "Amount", 150),
+            ("Einheit", "Einheit", 150)
+        ], formatters={"Amount": format_number(4)}, unit_column="Einheit")
+        found_table.pack(fill=tk.BOTH, expand=True, pady=(0, 10))
+        
+        # Schließen-Button
+        button_frame = ttk.Frame(preview_window)
+        button_frame.pack(pady=(5, 10))
+        close_button = ttk.Button(button_frame, text="Schließen", command=preview_window.destroy)
+        close_button.pack()
+    
+    def accept_suggestions(self, tree, preview_window):
+        """Übernimmt die Vorschläge der ausgewählten fehlenden Materialien und lädt die Vorschau neu"""
+        accepted = 0
+        for item in tree.selection():
+            material, _, suggestion, _ = tree.item(item, "values")
+            if suggestion != "-":
+                self.material_overrides[material] = suggestion
+                accepted += 1
+        if not accepted:
+            messagebox.showinfo("Vorschläge", "Bitte wählen Sie fehlende Materialien mit Vorschlag aus.", parent=preview_window)
+            return
+        preview_window.destroy()
+        self.preview_materials()
     
     def log(self, message):
         self.log_text.insert(tk.END, message + "\n")
@@ -397,6 +606,11 @@ class BoMToEPDGUI:
             output_dir = Path(self.output_dir.get())
             output_dir.mkdir(parents=True, exist_ok=True)
             
+            # Meldungen auf die Konsole, Stufen-Zeiten zusätzlich für die Erfolgsmeldung sammeln
+            events = default_instrumentation(run=self.full_name.get())
+            timings = MemorySink()
+            events.sinks.append(timings)
+            
             # EPD verarbeiten
             resp = process_epd(
                 main_file_path=self.main_file_path.get(),
@@ -415,11 +629,17 @@ class BoMToEPDGUI:
                 api_key=self.api_key,
                 output_dir=output_dir,
                 skip_missing_materials=self.skip_missing.get(),
-                log_callback=None
+                material_overrides=self.material_overrides,
+                session=self.session,
+                level_column_index=self.level_column_index(),
+                mapping_version=self.mapping_version_value(),
+                events=events,
+                incremental=self.incremental.get()
             )
             
             if resp is not None:
-                self.root.after(0, messagebox.showinfo, "Erfolg", f"EPD wurde erfolgreich erstellt!\n\nStatus-Code: {resp.status_code}\n\nJSON-Datei gespeichert in:\n{output_dir}")
+                durations = "\n".join(f"  {stage}: {seconds:.2f} s" for stage, seconds in timings.stages().items())
+                self.root.after(0, messagebox.showinfo, "Erfolg", f"EPD wurde erfolgreich erstellt!\n\nStatus-Code: {resp.status_code}\n\nJSON-Datei gespeichert in:\n{output_dir}\n\nDauer:\n{durations}")
             else:
                 self.root.after(0, messagebox.showwarning, "Abgebrochen", "Der Vorgang wurde abgebrochen.")
                 
@@ -0,0 +1,519 @@
+"""
+Lokaler Cache der Wirkungsfaktoren und Was-wäre-wenn-Rechnung
+
+Die API (run-epd-tree) berechnet die Wirkungen eines EPDs aus den Prozessen des
+Root-Repositories. Enthält die Antwort Ergebnisse je Komponente, werden daraus die
+Wirkungsfaktoren je Prozess (Wirkung pro Einheit, z.B. kg CO2-Äq. pro kg) abgeleitet und in
+einer SQLite-Datenbank abgelegt, Schlüssel: Prozess-UUID, Repository, Einheit und Method
+Library (derselbe Prozess kann mit verschiedenen Einheiten verwendet werden).
+
+Mit diesen Faktoren berechnet ImpactModel die Summen A1-A3 einer gemappten BoM lokal als
+Produkt Mengen x Wirkungsmatrix (numpy), z.B. für Sensitivitäts- und Variantenrechnungen über
+Tausende BoM-Varianten ohne API-Aufruf. Dünn besetzt ist nur die Zuordnung Zeile -> Prozess
+(höchstens zwei Einträge je Zeile, A1 und A3); sie wird als Indexvektor je Modul gespeichert
+und per Indexzugriff multipliziert, was einem CSR-Produkt entspricht, ohne scipy. Die
+Faktoren je Prozess und Indikator sind voll besetzt, ebenso das Ergebnis Zeilen x Indikatoren
+(wenige Indikatoren), daher dichte numpy-Arrays. Prozesse ohne Faktor im Cache werden als fehlend
+gemeldet und tragen nichts bei.
+
+Erkannte Antwortformate (auch eine Ebene tiefer unter "results", "result" oder "data"):
+    {"components": {"<Komponenten-ID>": <Ergebnisse>}}
+    {"components": [{"id": "<Komponenten-ID>", "results" | "impacts" | "indicators": <Ergebnisse>}]}
+<Ergebnisse> ist {"<Indikator>": Wert} oder eine Liste von Einträgen mit "indicator"/"name"/
+"category", "value"/"amount"/"result" und optional "module" (verwendet werden "A1-A3" bzw. die
+Summe von A1, A2 und A3). Die Ergebnisse gelten für die Menge der Komponente im Payload.
+
+Beispiel:
+    python bom_to_epd_lcia.py ingest results/EPD.json antwort.json --cache impact_factors.sqlite
+    python bom_to_epd_lcia.py totals bom.xlsx --sheet BoM --cache impact_factors.sqlite --scale "Steel=1.1"
+"""
+
+import argparse
+import json
+import sqlite3
+import sys
+import time
+from pathlib import Path
+from typing import Optional, Iterable, Sequence, List, Dict, Any, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from bom_to_epd import load_json
+
+
+# Dateiname des Caches im Output-Verzeichnis (process_epd(..., cache_impacts=True))
+IMPACT_CACHE_FILENAME = "impact_factors.sqlite"
+
+# Module, deren Summe die Herstellungsphase A1-A3 ergibt
+PRODUCTION_MODULES = ("A1", "A2", "A3")
+PRODUCTION_TOTAL_MODULES = ("A1-A3", "A1A3", "A1_A3")
+
+# Maximale Anzahl Prozess-UUIDs je Abfrage
+LOOKUP_BATCH_SIZE = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS impact_factors (
+    process_uuid TEXT NOT NULL,
+    repository TEXT NOT NULL,
+    method TEXT NOT NULL,
+    unit TEXT NOT NULL DEFAULT '',
+    indicator TEXT NOT NULL,
+    value REAL NOT NULL,
+    updated REAL NOT NULL,
+    PRIMARY KEY (process_uuid, repository, unit, method, indicator)
+);
+"""
+
+# Schlüssel eines Faktors: (Prozess-UUID, Repository, Einheit); Einheit "" = unbekannt
+FactorKey = Tuple[str, str, str]
+
+_RESULT_KEYS = ("results", "impacts", "indicators")
+_INDICATOR_KEYS = ("indicator", "name", "category")
+_VALUE_KEYS = ("value", "amount", "result")
+
+
+def method_key(method_lib: Dict[str, Any]) -> str:
+    """Schlüssel der Method Library im Cache (URL und Name)."""
+    return f"{method_lib.get('url', '')}|{method_lib.get('name', '')}"
+
+
+class ImpactFactorCache:
+    """
+    Wirkungsfaktoren je Prozess in einer SQLite-Datenbank.
+
+    Args:
+        path: Pfad der Datenbank (wird bei Bedarf angelegt)
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.conn = sqlite3.connect(str(self.path))
+        self._migrate()
+        self.conn.executescript(_SCHEMA)
+
+    def _migrate(self) -> None:
+        """Übernimmt Caches, deren Schlüssel die Einheit noch nicht enthielt."""
+        columns = {row[1]: row[5] for row in self.conn.execute("PRAGMA table_info(impact_factors)")}
+        if not columns or columns.get("unit"):
+            return
+        with self.conn:
+            self.conn.execute("ALTER TABLE impact_factors RENAME TO impact_factors_old")
+            self.conn.executescript(_SCHEMA)
+            self.conn.execute(
+                "INSERT OR REPLACE INTO impact_factors "
+                "(process_uuid, repository, method, unit, indicator, value, updated) "
+                "SELECT process_uuid, repository, method, COALESCE(unit, ''), indicator, value, updated "
+                "FROM impact_factors_old")
+            self.conn.execute("DROP TABLE impact_factors_old")
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> "ImpactFactorCache":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def put_many(
+        self,
+        factors: Dict[FactorKey, Dict[str, float]],
+        method_lib: Dict[str, Any]
+    ) -> int:
+        """
+        Speichert Faktoren (vorhandene Werte desselben Prozesses und derselben Einheit werden ersetzt).
+
+        Args:
+            factors: (Prozess-UUID, Repository, Einheit) -> {Indikator: Wirkung pro Einheit}
+            method_lib: Method Library, mit der die Faktoren berechnet wurden
+
+        Returns:
+            Anzahl gespeicherter Faktoren (Prozess und Einheit)
+        """
+        method = method_key(method_lib)
+        now = time.time()
+        rows = [(process_uuid, repository, method, indicator, unit or "", float(value), now)
+                for (process_uuid, repository, unit), values in factors.items()
+                for indicator, value in values.items()]
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO impact_factors "
+                "(process_uuid, repository, method, indicator, unit, value, updated) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows)
+        return len(factors)
+
+    def get_many(
+        self,
+        process_uuids: Iterable[str],
+        repository: str,
+        method_lib: Dict[str, Any]
+    ) -> Dict[Tuple[str, str], Dict[str, float]]:
+        """
+        Liefert die gespeicherten Faktoren zu Prozessen.
+
+        Returns:
+            (Prozess-UUID, Einheit) -> {Indikator: Wirkung pro Einheit}; je Prozess ein Eintrag
+            pro gespeicherter Einheit, fehlende Prozesse fehlen
+        """
+        uuids = list(dict.fromkeys(process_uuids))
+        method = method_key(method_lib)
+        result: Dict[Tuple[str, str], Dict[str, float]] = {}
+        for start in range(0, len(uuids), LOOKUP_BATCH_SIZE):
+            chunk = uuids[start:start + LOOKUP_BATCH_SIZE]
+            rows = self.conn.execute(
+                f"SELECT process_uuid, unit, indicator, value FROM impact_factors "
+                f"WHERE repository = ? AND method = ? AND process_uuid IN ({', '.join('?' * len(chunk))})",
+                (repository, method, *chunk)).fetchall()
+            for process_uuid, unit, indicator, value in rows:
+                result.setdefault((process_uuid, unit), {})[indicator] = value
+        return result
+
+    def __len__(self) -> int:
+        return self.conn.execute(
+            "SELECT COUNT(*) FROM (SELECT DISTINCT process_uuid, repository, unit, method FROM impact_factors)"
+        ).fetchone()[0]
+
+
+def _result_values(results: Any) -> Dict[str, float]:
+    """Indikator -> Wert (A1-A3) aus den Ergebnissen einer Komponente."""
+    if isinstance(results, dict):
+        values = {}
+        for indicator, value in results.items():
+            if isinstance(value, dict):
+                value = next((value[k] for k in _VALUE_KEYS if k in value), None)
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                values[str(indicator)] = float(value)
+        return values
+
+    totals: Dict[str, float] = {}
+    sums: Dict[str, float] = {}
+    for entry in results if isinstance(results, list) else []:
+        if not isinstance(entry, dict):
+            continue
+        indicator = next((entry[k] for k in _INDICATOR_KEYS if k in entry), None)
+        value = next((entry[k] for k in _VALUE_KEYS if k in entry), None)
+        if indicator is None or not isinstance(value, (int, float)) or isinstance(value, bool):
+            continue
+        module = str(entry.get("module", "")).replace(" ", "")
+        if not module or module in PRODUCTION_TOTAL_MODULES:
+            totals[str(indicator)] = float(value)
+        elif module in PRODUCTION_MODULES:
+            sums[str(indicator)] = sums.get(str(indicator), 0.0) + float(value)
+    return {**sums, **totals}
+
+
+def component_results(data: Any) -> Dict[str, Dict[str, float]]:
+    """
+    Sucht in einer API-Antwort die Ergebnisse je Komponente (Formate siehe Modulbeschreibung).
+
+    Returns:
+        Komponenten-ID -> {Indikator: Wert}; leer, wenn die Antwort keine solchen enthält
+    """
+    if not isinstance(data, dict):
+        return {}
+    components = data.get("components")
+    if not isinstance(components, (dict, list)):
+        for key in ("results", "result", "data"):
+            if isinstance(data.get(key), dict) and "components" in data[key]:
+                components = data[key]["components"]
+                break
+    if isinstance(components, dict):
+        items = components.items()
+    elif isinstance(components, list):
+        items = [(entry.get("id"), next((entry[k] for k in _RESULT_KEYS if k in entry), None))
+                 for entry in components if isinstance(entry, dict)]
+    else:
+        return {}
+    results = {}
+    for component_id, values in items:
+        values = _result_values(values)
+        if component_id is not None and values:
+            results[str(component_id)] = values
+    return results
+
+
+def component_amounts(payload: Dict[str, Any]) -> Dict[str, Tuple[float, Optional[str]]]:
+    """
+    Gesamtmenge jeder Komponente je Einheit des EPDs (Mengen entlang des Baums multipliziert).
+
+    Returns:
+        Komponenten-ID -> (Menge, Einheit des ersten Inputs, der auf sie verweist)
+    """
+    by_id = {component["id"]: component for component in payload.get("components", [])}
+    amounts: Dict[str, Tuple[float, Optional[str]]] = {}
+
+    def visit(component_id: str, factor: float, depth: int) -> None:
+        if depth > len(by_id):
+            raise ValueError(f"Zyklische Komponenten-Referenz bei {component_id}")
+        for entry in by_id.get(component_id, {}).get("inputs", []):
+            child = entry.get("component")
+            amount = factor * float(entry.get("amount", 0.0))
+            previous, unit = amounts.get(child, (0.0, entry.get("unit")))
+            amounts[child] = (previous + amount, unit)
+            visit(child, amount, depth + 1)
+
+    root = payload.get("root", {})
+    visit(root.get("component"), float(root.get("amount", 1)), 0)
+    return amounts
+
+
+def impact_factors_from_response(
+    payload: Dict[str, Any],
+    response_data: Any
+) -> Dict[FactorKey, Dict[str, float]]:
+    """
+    Leitet Wirkungsfaktoren je Prozess und Einheit aus Payload und API-Antwort ab.
+
+    Für jede Prozess-Komponente (mit 'epd') mit Ergebnissen in der Antwort zählen Ergebnis und
+    Gesamtmenge im Payload (siehe component_amounts). Komponenten mit demselben Prozess,
+    Repository und derselben Einheit (z.B. ein Prozess als A1 und A3) werden summiert, bevor
+    durch die Menge geteilt wird; verschiedene Einheiten ergeben getrennte Faktoren.
+
+    Returns:
+        (Prozess-UUID, Repository, Einheit) -> {Indikator: Wirkung pro Einheit}, wie put_many
+    """
+    results = component_results(response_data)
+    if not results:
+        return {}
+    amounts = component_amounts(payload)
+    totals: Dict[FactorKey, Tuple[float, Dict[str, float]]] = {}
+    for component in payload.get("components", []):
+        values = results.get(component["id"])
+        amount, unit = amounts.get(component["id"], (0.0, None))
+        if "epd" not in component or values is None or not amount:
+            continue
+        key = (str(component["epd"]).strip(), component.get("repository", ""), str(unit or "").strip())
+        total_amount, total_values = totals.get(key, (0.0, {}))
+        for indicator, value in values.items():
+            total_values[indicator] = total_values.get(indicator, 0.0) + value
+        totals[key] = (total_amount + amount, total_values)
+    return {key: {indicator: value / amount for indicator, value in values.items()}
+            for key, (amount, values) in totals.items()}
+
+
+def record_impact_factors(
+    cache: ImpactFactorCache,
+    payload: Dict[str, Any],
+    response_data: Any
+) -> int:
+    """Übernimmt die Faktoren aus einer API-Antwort in den Cache; liefert die Anzahl Prozesse."""
+    factors = impact_factors_from_response(payload, response_data)
+    if not factors:
+        return 0
+    return cache.put_many(factors, payload.get("methodLib", {}))
+
+
+def _tree_multipliers(df: pd.DataFrame) -> np.ndarray:
+    """Produkt der Mengen aller übergeordneten Baugruppen je Zeile (1 ohne 'Level')."""
+    if "Level" not in df.columns:
+        return np.ones(len(df))
+    multipliers = np.ones(len(df))
+    stack: List[Tuple[int, float]] = []  # (Ebene, kumulierte Menge) offener Baugruppen
+    for i, (level, amount, assembly) in enumerate(zip(df["Level"].tolist(), df["Amount"].tolist(),
+                                                      df["Assembly"].tolist())):
+        while stack and stack[-1][0] >= level:
+            stack.pop()
+        multipliers[i] = stack[-1][1] if stack else 1.0
+        if assembly:
+            stack.append((level, multipliers[i] * amount))
+    return multipliers
+
+
+class ImpactModel:
+    """
+    Lineares Wirkungsmodell einer gemappten BoM (siehe read_materials_and_map).
+
+    Attributes:
+        materials: Material je BoM-Zeile (ohne Baugruppen und Materialien ohne A1-UUID)
+        amounts: Menge je Zeile (Spalte 'Amount', in BoM-Einheiten)
+        indicators: Namen der Wirkungsindikatoren
+        line_factors: Wirkung je Einheit 'Amount' (Zeilen x Indikatoren, dicht); enthält A1 und A3.
+            Speicherbedarf Zeilen x Indikatoren x 8 Byte, z.B. 16 MB für 100.000 Zeilen und
+            20 Indikatoren; jede Variante ist damit ein einziges Matrixprodukt
+        missing: Prozesse (UUID, Einheit) ohne passenden Faktor im Cache
+    """
+
+    def __init__(self, materials: List[str], amounts: np.ndarray, indicators: List[str],
+                 line_factors: np.ndarray, missing: List[Tuple[str, str]]):
+        self.materials = materials
+        self.amounts = amounts
+        self.indicators = indicators
+        self.line_factors = line_factors
+        self.missing = missing
+        material_index = {material: i for i, material in enumerate(dict.fromkeys(materials))}
+        self._material_index = material_index
+        self._line_material = np.array([material_index[m] for m in materials], dtype=np.intp)
+
+    @classmethod
+    def from_frame(
+        cls,
+        df_mapped: pd.DataFrame,
+        cache: ImpactFactorCache,
+        root_repository: str,
+        method_lib: Dict[str, Any]
+    ) -> "ImpactModel":
+        """
+        Baut das Modell aus einem gemappten Frame und den Faktoren im Cache.
+
+        Wie im Payload zählen nur Zeilen mit A1-UUID; bei mehrstufigen BoMs werden die Mengen
+        mit denen der übergeordneten Baugruppen multipliziert.
+        """
+        multipliers = _tree_multipliers(df_mapped)
+        keep = df_mapped["Process_uuid_A1"].notna().to_numpy()
+        if "Assembly" in df_mapped.columns:
+            keep = keep & ~df_mapped["Assembly"].to_numpy(dtype=bool)
+        df = df_mapped[keep]
+        multipliers = multipliers[keep]
+
+        # (UUID, Einheit, Menge je Einheit 'Amount') je Zeile und Modul
+        amounts = df["Amount"].to_numpy(dtype=float)
+        uses = []
+        for module in ("A1", "A3"):
+            present = df[f"Process_uuid_{module}"].notna().to_numpy()
+            units = df[f"Final_Unit_{module}"].where(df[f"Final_Unit_{module}"].notna(), df["Final_Unit_A1"])
+            per_amount = np.where(present, df[f"Final_Amount_{module}"].fillna(0.0).to_numpy(dtype=float)
+                                  / amounts * multipliers, 0.0)
+            uses.append((df[f"Process_uuid_{module}"].tolist(), units.astype(str).str.strip().tolist(),
+                         per_amount, present))
+
+        processes = {(str(u).strip(), unit) for uuids, units, _, present in uses
+                     for u, unit, p in zip(uuids, units, present) if p}
+        stored = cache.get_many({u for u, _ in processes}, root_repository, method_lib)
+        indicators = sorted({indicator for values in stored.values() for indicator in values})
+        column = {indicator: j for j, indicator in enumerate(indicators)}
+        process_index = {}
+        matrix_rows = []
+        missing = []
+        for key in sorted(processes):
+            # Faktor derselben Einheit; ohne Einheit gespeicherte Faktoren gelten für jede
+            values = stored.get(key) or stored.get((key[0], ""))
+            if not values:
+                missing.append(key)
+                continue
+            row = np.zeros(len(indicators))
+            for indicator, value in values.items():
+                row[column[indicator]] = value
+            process_index[key] = len(matrix_rows)
+            matrix_rows.append(row)
+        matrix = np.vstack(matrix_rows + [np.zeros(len(indicators))])  # letzte Zeile: kein Faktor
+        none = len(matrix_rows)
+
+        # Dünne Inzidenz Zeile -> Prozess (je Modul ein Index pro Zeile) x dichte Faktor-Matrix:
+        # matrix[idx] wählt die Prozesszeilen aus, ohne eine Zeilen x Prozesse-Matrix anzulegen
+
+        line_factors = np.zeros((len(df), len(indicators)))
+        for uuids, units, per_amount, present in uses:
+            idx = np.array([process_index.get((str(u).strip(), unit), none) if p else none
+                            for u, unit, p in zip(uuids, units, present)], dtype=np.intp)
+            line_factors += per_amount[:, None] * matrix[idx]
+        return cls(df["Material"].astype(str).str.strip().tolist(), amounts, indicators, line_factors, missing)
+
+    def totals(self, amounts: Optional[np.ndarray] = None) -> pd.Series:
+        """Summe A1-A3 je Indikator für die Mengen der BoM bzw. für abweichende Mengen je Zeile."""
+        amounts = self.amounts if amounts is None else np.asarray(amounts, dtype=float)
+        return pd.Series(amounts @ self.line_factors, index=self.indicators)
+
+    def contributions(self) -> pd.DataFrame:
+        """Beitrag je Material (Zeilen gleichen Materials summiert) und Indikator."""
+        by_material = np.zeros((len(self._material_index), len(self.indicators)))
+        np.add.at(by_material, self._line_material, self.amounts[:, None] * self.line_factors)
+        return pd.DataFrame(by_material, index=list(self._material_index), columns=self.indicators)
+
+    def variant_totals(self, amounts: np.ndarray) -> pd.DataFrame:
+        """Summen für viele Varianten auf einmal (Mengen: Varianten x Zeilen)."""
+        return pd.DataFrame(np.asarray(amounts, dtype=float) @ self.line_factors, columns=self.indicators)
+
+    def what_if(self, variants: Sequence[Dict[str, float]]) -> pd.DataFrame:
+        """
+        Summen für Varianten, die die Mengen einzelner Materialien skalieren.
+
+        Es wird nur die Änderung gegenüber der BoM gerechnet (dünn besetzt): je Variante und
+        genanntem Material (Faktor - 1) x Beitrag des Materials.
+
+        Args:
+            variants: je Variante Material -> Faktor auf die Menge (z.B. {"Steel": 1.1});
+                unbekannte Materialien lösen KeyError aus
+
+        Returns:
+            DataFrame Varianten x Indikatoren
+        """
+        contributions = self.contributions().to_numpy()
+        variant_idx, material_idx, factors = [], [], []
+        for v, variant in enumerate(variants):
+            for material, factor in variant.items():
+                material = str(material).strip()
+                if material not in self._material_index:
+                    raise KeyError(f"Material '{material}' nicht in der BoM")
+                variant_idx.append(v)
+                material_idx.append(self._material_index[material])
+                factors.append(factor - 1.0)
+        result = np.tile(self.totals().to_numpy(), (len(variants), 1))
+        np.add.at(result, np.array(variant_idx, dtype=np.intp),
+                  np.array(factors)[:, None] * contributions[np.array(material_idx, dtype=np.intp)])
+        return pd.DataFrame(result, columns=self.indicators)
+
+
+def _parse_scale(values: List[str]) -> Dict[str, float]:
+    scale = {}
+    for value in values:
+        material, _, factor = value.rpartition("=")
+        scale[material] = float(factor)
+    return scale
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from bom_to_epd import (read_materials_and_map, column_letter_to_index,
+                            DEFAULT_ROOT_REPOSITORY, DEFAULT_METHOD_URL, DEFAULT_METHOD_NAME)
+
+    parser = argparse.ArgumentParser(description="Cache der Wirkungsfaktoren und lokale A1-A3-Summen.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_ingest = sub.add_parser("ingest", help="Faktoren aus Payload und gespeicherter API-Antwort übernehmen")
+    p_ingest.add_argument("payload", type=Path)
+    p_ingest.add_argument("response", type=Path)
+    p_ingest.add_argument("--cache", type=Path, default=Path(IMPACT_CACHE_FILENAME))
+
+    p_totals = sub.add_parser("totals", help="A1-A3-Summen einer BoM aus dem Cache berechnen")
+    p_totals.add_argument("bom", type=Path)
+    p_totals.add_argument("--sheet", default="0", help="Sheet-Name oder -Index (Standard: erstes Sheet)")
+    p_totals.add_argument("-m", "--mapping", type=Path,
+                          default=Path(__file__).parent / "Mapping_Materials_to_Processes.xlsx")
+    p_totals.add_argument("--material-column", default="C")
+    p_totals.add_argument("--amount-column", default="E")
+    p_totals.add_argument("--level-column", default=None)
+    p_totals.add_argument("--start-row", type=int, default=0)
+    p_totals.add_argument("--cache", type=Path, default=Path(IMPACT_CACHE_FILENAME))
+    p_totals.add_argument("--root-repository", default=DEFAULT_ROOT_REPOSITORY)
+    p_totals.add_argument("--method-url", default=DEFAULT_METHOD_URL)
+    p_totals.add_argument("--method-name", default=DEFAULT_METHOD_NAME)
+    p_totals.add_argument("--scale", action="append", default=[],
+                          help="Variante als Material=Faktor[,Material=Faktor...]; je Angabe eine Variante")
+
+    args = parser.parse_args(argv)
+    with ImpactFactorCache(args.cache) as cache:
+        if args.command == "ingest":
+            payload, _ = load_json(args.payload)
+            count = record_impact_factors(cache, payload, json.loads(args.response.read_text(encoding="utf-8")))
+            print(f"{count} Prozesse übernommen ({len(cache)} im Cache)")
+            return 0 if count else 1
+
+        level = column_letter_to_index(args.level_column) if args.level_column else None
+        sheet = int(args.sheet) if args.sheet.isdigit() else args.sheet
+        df = read_materials_and_map(args.bom, sheet, args.mapping, args.start_row,
+                                    column_letter_to_index(args.material_column),
+                                    column_letter_to_index(args.amount_column), level_column_index=level)
+        model = ImpactModel.from_frame(df, cache, args.root_repository,
+                                       {"url": args.method_url, "name": args.method_name})
+        if model.missing:
+            print(f"WARNUNG: {len(model.missing)} Prozesse ohne Faktor im Cache (tragen nichts bei)")
+        print(model.totals().to_string())
+        for scale in args.scale:
+            variant = _parse_scale([part for part in scale.split(",") if part])
+            print(f"\nVariante {scale}:")
+            print(model.what_if([variant]).iloc[0].to_string())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
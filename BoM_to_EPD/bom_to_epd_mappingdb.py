@@ -0,0 +1,367 @@
+"""
+SQLite-Backend für das Mapping
+
+Alternative zur Mapping-Excel-Datei für große bzw. häufig bearbeitete Mappings: Die Einträge
+liegen in einer SQLite-Datenbank mit Index auf (Version, normalisierter Materialname). Beim
+Mappen einer BoM werden nur deren Materialien abgefragt (blockweise über eine temporäre
+Tabelle), statt das ganze Mapping zu laden. Einzelne Einträge lassen sich ändern, ohne eine
+Arbeitsmappe neu zu lesen oder zu schreiben.
+
+Jeder Import legt eine Version an (z.B. "ecoinvent-3.10"); ohne Angabe wird die zuletzt
+angelegte Version verwendet. Überall, wo eine Mapping-Datei erwartet wird, kann auch eine
+Datenbank (Endung .sqlite, .sqlite3 oder .db) angegeben werden.
+
+Beispiel:
+    python bom_to_epd_mappingdb.py import Mapping_Materials_to_Processes.xlsx mapping.sqlite --version 2024-06
+    python bom_to_epd_mappingdb.py set mapping.sqlite "Steel sheet" --uuid-a1 <UUID> --unit-a1 kg
+    python bom_to_epd_mappingdb.py versions mapping.sqlite
+"""
+
+import argparse
+import json
+import math
+import sqlite3
+import sys
+import time
+from pathlib import Path
+from typing import Optional, Iterable, List, Dict, Any, Union
+
+import pandas as pd
+
+from bom_to_epd import load_mapping
+
+
+# Spalten der Mapping-Excel-Datei, die als eigene Tabellenspalten gespeichert werden;
+# weitere Spalten (z.B. Kommentare) landen als JSON in 'extra'
+MAPPING_COLUMNS = (
+    "Material_name",
+    "Process_uuid_A1", "Process_unit_A1", "Conversion_factor_A1",
+    "Process_uuid_A3", "Process_unit_A3", "Conversion_factor_A3",
+)
+FLOAT_COLUMNS = ("Conversion_factor_A1", "Conversion_factor_A3")
+
+# Maximale Anzahl Materialnamen je Abfrage-Block
+LOOKUP_BATCH_SIZE = 5000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS mapping_versions (
+    version TEXT PRIMARY KEY,
+    created REAL NOT NULL,
+    source TEXT
+);
+CREATE TABLE IF NOT EXISTS mapping (
+    id INTEGER PRIMARY KEY,
+    version TEXT NOT NULL REFERENCES mapping_versions(version) ON DELETE CASCADE,
+    Material_name TEXT,
+    Material_name_norm TEXT NOT NULL,
+    Process_uuid_A1 TEXT,
+    Process_unit_A1 TEXT,
+    Conversion_factor_A1 REAL,
+    Process_uuid_A3 TEXT,
+    Process_unit_A3 TEXT,
+    Conversion_factor_A3 REAL,
+    extra TEXT
+);
+CREATE INDEX IF NOT EXISTS mapping_version_norm ON mapping (version, Material_name_norm);
+"""
+
+
+def normalize_name(name: Any) -> str:
+    """Normalisierter Materialname wie in load_mapping (ohne Randleerzeichen, klein)."""
+    return str(name).strip().lower()
+
+
+def _cell(value: Any) -> Any:
+    """Zellwert für SQLite: NaN als NULL, numpy-Skalare als Python-Werte."""
+    value = getattr(value, "item", lambda: value)()
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
+
+
+class MappingStore:
+    """
+    Mapping-Einträge in einer SQLite-Datenbank.
+
+    Args:
+        path: Pfad der Datenbank (wird bei Bedarf angelegt)
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.conn = sqlite3.connect(str(self.path))
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> "MappingStore":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def versions(self) -> List[Dict[str, Any]]:
+        """Alle Versionen (älteste zuerst) mit Anlagezeitpunkt, Quelle und Anzahl Einträge."""
+        rows = self.conn.execute(
+            "SELECT v.version, v.created, v.source, COUNT(m.id) FROM mapping_versions v "
+            "LEFT JOIN mapping m ON m.version = v.version GROUP BY v.version ORDER BY v.created, v.rowid"
+        ).fetchall()
+        return [{"version": version, "created": created, "source": source, "entries": entries}
+                for version, created, source, entries in rows]
+
+    def latest_version(self) -> Optional[str]:
+        """Zuletzt angelegte Version oder None, wenn die Datenbank leer ist."""
+        row = self.conn.execute(
+            "SELECT version FROM mapping_versions ORDER BY created DESC, rowid DESC LIMIT 1"
+        ).fetchone()
+        return row[0] if row else None
+
+    def _resolve(self, version: Optional[str]) -> str:
+        if version is None:
+            version = self.latest_version()
+            if version is None:
+                raise ValueError(f"Mapping-Datenbank {self.path} enthält keine Version")
+            return version
+        if self.conn.execute("SELECT 1 FROM mapping_versions WHERE version = ?", (version,)).fetchone() is None:
+            raise ValueError(f"Mapping-Version '{version}' nicht in {self.path} vorhanden")
+        return version
+
+    def import_frame(
+        self,
+        df_map: pd.DataFrame,
+        version: str,
+        source: Optional[str] = None,
+        replace: bool = False
+    ) -> int:
+        """
+        Legt eine Version aus einem Mapping-DataFrame (siehe load_mapping) an.
+
+        Args:
+            df_map: Mapping mit mindestens der Spalte 'Material_name'
+            version: Name der Version
+            source: Optionale Herkunft (z.B. Pfad der Excel-Datei)
+            replace: Wenn True, wird eine vorhandene Version gleichen Namens ersetzt
+
+        Returns:
+            Anzahl importierter Einträge
+        """
+        if "Material_name" not in df_map.columns:
+            raise ValueError("Mapping enthält keine Spalte 'Material_name'")
+        df = df_map[df_map["Material_name"].notna()].reindex(columns=[*MAPPING_COLUMNS])
+        df = df.astype(object).where(df.notna(), None)
+        extra_columns = [c for c in df_map.columns if c not in MAPPING_COLUMNS and c != "Material_name_norm"]
+        extras = [None] * len(df)
+        if extra_columns:
+            records = df_map.loc[df.index, extra_columns].to_dict("records")
+            extras = [json.dumps({str(k): _cell(v) for k, v in record.items() if _cell(v) is not None},
+                                 ensure_ascii=False, default=str) for record in records]
+            extras = [extra if extra != "{}" else None for extra in extras]
+        rows = [(version, *values, normalize_name(values[0]), extra)
+                for values, extra in zip(df.itertuples(index=False, name=None), extras)]
+
+        with self.conn:
+            exists = self.conn.execute("SELECT 1 FROM mapping_versions WHERE version = ?", (version,)).fetchone()
+            if exists and not replace:
+                raise ValueError(f"Mapping-Version '{version}' existiert bereits")
+            if exists:
+                self.conn.execute("DELETE FROM mapping WHERE version = ?", (version,))
+                self.conn.execute("UPDATE mapping_versions SET created = ?, source = ? WHERE version = ?",
+                                  (time.time(), source, version))
+            else:
+                self.conn.execute("INSERT INTO mapping_versions (version, created, source) VALUES (?, ?, ?)",
+                                  (version, time.time(), source))
+            self.conn.executemany(
+                f"INSERT INTO mapping (version, {', '.join(MAPPING_COLUMNS)}, Material_name_norm, extra) "
+                f"VALUES ({', '.join('?' * (len(MAPPING_COLUMNS) + 3))})", rows)
+        return len(rows)
+
+    def import_excel(
+        self,
+        mapping_file: Union[str, Path],
+        version: str,
+        replace: bool = False
+    ) -> int:
+        """Legt eine Version aus einer Mapping-Excel-Datei im bisherigen Format an (siehe import_frame)."""
+        return self.import_frame(load_mapping(mapping_file), version, str(mapping_file), replace)
+
+    def copy_version(self, version: str, new_version: str) -> int:
+        """Legt new_version als Kopie von version an (z.B. als Ausgangspunkt für Änderungen)."""
+        version = self._resolve(version)
+        with self.conn:
+            self.conn.execute("INSERT INTO mapping_versions (version, created, source) VALUES (?, ?, ?)",
+                              (new_version, time.time(), f"Kopie von {version}"))
+            cursor = self.conn.execute(
+                f"INSERT INTO mapping (version, {', '.join(MAPPING_COLUMNS)}, Material_name_norm, extra) "
+                f"SELECT ?, {', '.join(MAPPING_COLUMNS)}, Material_name_norm, extra FROM mapping "
+                f"WHERE version = ? ORDER BY id", (new_version, version))
+        return cursor.rowcount
+
+    def delete_version(self, version: str) -> None:
+        version = self._resolve(version)
+        with self.conn:
+            self.conn.execute("DELETE FROM mapping_versions WHERE version = ?", (version,))
+
+    def upsert(self, material_name: str, version: Optional[str] = None, **values: Any) -> None:
+        """
+        Ändert einen Eintrag bzw. legt ihn an.
+
+        Args:
+            material_name: Materialname (Vergleich über den normalisierten Namen)
+            version: Version; None = zuletzt angelegte
+            values: Zu setzende Spalten, z.B. Process_uuid_A1="...", Conversion_factor_A1=0.5
+        """
+        unknown = set(values) - set(MAPPING_COLUMNS[1:])
+        if unknown:
+            raise ValueError(f"Unbekannte Mapping-Spalten: {', '.join(sorted(unknown))}")
+        version = self._resolve(version)
+        norm = normalize_name(material_name)
+        values = {column: _cell(value) for column, value in values.items()}
+        with self.conn:
+            exists = self.conn.execute("SELECT 1 FROM mapping WHERE version = ? AND Material_name_norm = ?",
+                                       (version, norm)).fetchone()
+            if exists:
+                if values:
+                    assignments = ", ".join(f"{column} = ?" for column in values)
+                    self.conn.execute(f"UPDATE mapping SET {assignments} WHERE version = ? AND Material_name_norm = ?",
+                                      (*values.values(), version, norm))
+            else:
+                columns = ["version", "Material_name", "Material_name_norm", *values]
+                self.conn.execute(f"INSERT INTO mapping ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                                  (version, material_name.strip(), norm, *values.values()))
+
+    def delete(self, material_name: str, version: Optional[str] = None) -> int:
+        """Löscht alle Einträge zu einem Materialnamen; liefert die Anzahl gelöschter Zeilen."""
+        version = self._resolve(version)
+        with self.conn:
+            cursor = self.conn.execute("DELETE FROM mapping WHERE version = ? AND Material_name_norm = ?",
+                                       (version, normalize_name(material_name)))
+        return cursor.rowcount
+
+    def lookup(self, names_norm: Iterable[str], version: Optional[str] = None) -> pd.DataFrame:
+        """
+        Liefert die Mapping-Einträge zu normalisierten Materialnamen.
+
+        Die Namen werden blockweise (LOOKUP_BATCH_SIZE) in eine temporäre Tabelle geschrieben
+        und über den Index (version, Material_name_norm) verknüpft, unabhängig von der Größe
+        des Mappings.
+
+        Args:
+            names_norm: Normalisierte Materialnamen (z.B. 'Material_norm' der BoM)
+            version: Version; None = zuletzt angelegte
+
+        Returns:
+            DataFrame wie load_mapping, aber nur mit den gefundenen Einträgen (ohne 'extra')
+        """
+        version = self._resolve(version)
+        names = list(dict.fromkeys(str(name) for name in names_norm))
+        columns = [*MAPPING_COLUMNS, "Material_name_norm"]
+        rows: List[tuple] = []
+        self.conn.execute("CREATE TEMP TABLE IF NOT EXISTS lookup_names (name TEXT PRIMARY KEY)")
+        try:
+            for start in range(0, len(names), LOOKUP_BATCH_SIZE):
+                self.conn.execute("DELETE FROM lookup_names")
+                self.conn.executemany("INSERT INTO lookup_names (name) VALUES (?)",
+                                      ((name,) for name in names[start:start + LOOKUP_BATCH_SIZE]))
+                rows.extend(self.conn.execute(
+                    f"SELECT m.id, {', '.join('m.' + c for c in columns)} FROM lookup_names n "
+                    f"JOIN mapping m ON m.version = ? AND m.Material_name_norm = n.name",
+                    (version,)).fetchall())
+        finally:
+            self.conn.execute("DELETE FROM lookup_names")
+        # Reihenfolge wie in der Excel-Datei (wichtig bei doppelten Materialnamen)
+        rows.sort(key=lambda row: row[0])
+        return self._frame([row[1:] for row in rows], columns)
+
+    def unit_frame(self, version: Optional[str] = None) -> pd.DataFrame:
+        """Alle Kombinationen von Process_unit_A1 und Process_unit_A3 einer Version (siehe allowed_units)."""
+        columns = ["Process_unit_A1", "Process_unit_A3"]
+        rows = self.conn.execute(f"SELECT DISTINCT {', '.join(columns)} FROM mapping WHERE version = ?",
+                                 (self._resolve(version),)).fetchall()
+        return pd.DataFrame.from_records(rows, columns=columns)
+
+    def to_frame(self, version: Optional[str] = None) -> pd.DataFrame:
+        """Gesamtes Mapping einer Version als DataFrame wie load_mapping (inkl. Zusatzspalten)."""
+        version = self._resolve(version)
+        columns = [*MAPPING_COLUMNS, "extra", "Material_name_norm"]
+        rows = self.conn.execute(f"SELECT {', '.join(columns)} FROM mapping WHERE version = ? ORDER BY id",
+                                 (version,)).fetchall()
+        df_map = self._frame(rows, columns)
+        extras = pd.DataFrame([json.loads(extra) if isinstance(extra, str) else {} for extra in df_map.pop("extra")],
+                              index=df_map.index)
+        if not extras.empty:
+            df_map = pd.concat([df_map.iloc[:, :len(MAPPING_COLUMNS)], extras, df_map[["Material_name_norm"]]],
+                               axis=1)
+        return df_map
+
+    @staticmethod
+    def _frame(rows: List[tuple], columns: List[str]) -> pd.DataFrame:
+        df_map = pd.DataFrame.from_records(rows, columns=columns)
+        for column in FLOAT_COLUMNS:
+            df_map[column] = pd.to_numeric(df_map[column], errors="coerce").astype(float)
+        return df_map
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Verwaltet ein Mapping in einer SQLite-Datenbank.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_import = sub.add_parser("import", help="Mapping-Excel-Datei als neue Version importieren")
+    p_import.add_argument("excel", type=Path)
+    p_import.add_argument("database", type=Path)
+    p_import.add_argument("--version", help="Name der Version (Standard: Zeitstempel)")
+    p_import.add_argument("--replace", action="store_true", help="Vorhandene Version ersetzen")
+
+    p_versions = sub.add_parser("versions", help="Versionen auflisten")
+    p_versions.add_argument("database", type=Path)
+
+    p_set = sub.add_parser("set", help="Eintrag ändern oder anlegen")
+    p_set.add_argument("database", type=Path)
+    p_set.add_argument("material")
+    p_set.add_argument("--version")
+    for stage in ("a1", "a3"):
+        p_set.add_argument(f"--uuid-{stage}")
+        p_set.add_argument(f"--unit-{stage}")
+        p_set.add_argument(f"--factor-{stage}", type=float)
+
+    p_delete = sub.add_parser("delete", help="Eintrag löschen")
+    p_delete.add_argument("database", type=Path)
+    p_delete.add_argument("material")
+    p_delete.add_argument("--version")
+
+    p_export = sub.add_parser("export", help="Version als Excel-Datei exportieren")
+    p_export.add_argument("database", type=Path)
+    p_export.add_argument("excel", type=Path)
+    p_export.add_argument("--version")
+
+    args = parser.parse_args(argv)
+    with MappingStore(args.database) as store:
+        if args.command == "import":
+            version = args.version or time.strftime("%Y-%m-%d %H:%M:%S")
+            count = store.import_excel(args.excel, version, replace=args.replace)
+            print(f"{count} Einträge als Version '{version}' importiert")
+        elif args.command == "versions":
+            for entry in store.versions():
+                created = time.strftime("%Y-%m-%d %H:%M", time.localtime(entry["created"]))
+                print(f"{entry['version']}\t{created}\t{entry['entries']} Einträge\t{entry['source'] or ''}")
+        elif args.command == "set":
+            values = {}
+            for stage in ("a1", "a3"):
+                for option, column in (("uuid", "Process_uuid"), ("unit", "Process_unit"),
+                                       ("factor", "Conversion_factor")):
+                    value = getattr(args, f"{option}_{stage}")
+                    if value is not None:
+                        values[f"{column}_{stage.upper()}"] = value
+            store.upsert(args.material, args.version, **values)
+        elif args.command == "delete":
+            if not store.delete(args.material, args.version):
+                print(f"Kein Eintrag für '{args.material}' gefunden")
+                return 1
+        else:
+            store.to_frame(args.version).drop(columns="Material_name_norm").to_excel(args.excel, index=False)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
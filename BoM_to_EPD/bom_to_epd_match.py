@@ -0,0 +1,168 @@
+"""
+Mapping-Vorschläge für fehlende Materialien
+
+Invertierter Index über die Materialnamen der Mapping-Datei (Zeichen-Trigramme und ganze
+Wörter). Für ein Material ohne Treffer im Mapping liefert der Index die ähnlichsten
+Mapping-Einträge mit Score (Dice-Koeffizient der Merkmalsmengen). Der Index wird wie das
+Mapping selbst als Sidecar neben der Mapping-Datei gespeichert (bei einer Mapping-Datenbank
+je Version).
+"""
+
+import hashlib
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from bom_to_epd import load_compiled_sidecar, load_mapping, is_mapping_database
+
+
+MATCH_INDEX_SUFFIX = ".index.pkl"
+MATCH_INDEX_VERSION = 1
+
+_NON_ALNUM = re.compile(r"[^0-9a-zäöüß]+")
+
+
+def normalize_material_name(name: str) -> str:
+    """Kleinschreibung, Sonderzeichen als Leerzeichen, Mehrfach-Leerzeichen zusammengefasst."""
+    return _NON_ALNUM.sub(" ", str(name).lower()).strip()
+
+
+def material_features(name: str) -> set:
+    """Merkmalsmenge eines Materialnamens: Zeichen-Trigramme und ganze Wörter."""
+    norm = normalize_material_name(name)
+    if not norm:
+        return set()
+    padded = f" {norm} "
+    features = {padded[i:i + 3] for i in range(len(padded) - 2)}
+    features.update("#" + token for token in norm.split())
+    return features
+
+
+@dataclass
+class MatchCandidate:
+    """Ein Vorschlag aus dem Mapping für ein fehlendes Material."""
+    material_name: str
+    process_uuid_a1: Optional[str]
+    score: float
+
+
+class MaterialMatchIndex:
+    """
+    Invertierter Merkmalsindex über die Spalte 'Material_name' des Mappings.
+
+    Args:
+        names: Materialnamen (eindeutig nach Normalisierung, wie in 'Material_name')
+        process_uuids: Zugehörige Process_uuid_A1 (None, falls nicht vorhanden)
+    """
+
+    def __init__(self, names: List[str], process_uuids: List[Optional[str]]):
+        self.names = names
+        self.process_uuids = process_uuids
+        postings: Dict[str, List[int]] = {}
+        sizes = []
+        for i, name in enumerate(names):
+            features = material_features(name)
+            sizes.append(len(features))
+            for feature in features:
+                postings.setdefault(feature, []).append(i)
+        self.sizes = np.asarray(sizes, dtype=np.float64)
+        self.postings = {feature: np.asarray(ids, dtype=np.int32) for feature, ids in postings.items()}
+
+    @classmethod
+    def from_mapping(cls, df_map: pd.DataFrame) -> "MaterialMatchIndex":
+        """Baut den Index aus dem Mapping-DataFrame (siehe load_mapping)."""
+        df_unique = df_map.dropna(subset=['Material_name']).drop_duplicates('Material_name_norm')
+        names = [str(name).strip() for name in df_unique['Material_name'].tolist()]
+        process_uuids = [str(v).strip() if pd.notna(v) else None
+                         for v in df_unique['Process_uuid_A1'].tolist()]
+        return cls(names, process_uuids)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def query(self, material: str, top_k: int = 5, min_score: float = 0.0) -> List[MatchCandidate]:
+        """
+        Liefert die top_k ähnlichsten Mapping-Einträge.
+
+        Args:
+            material: Materialname aus der BoM
+            top_k: Maximale Anzahl Vorschläge
+            min_score: Vorschläge mit geringerem Score werden verworfen (0..1)
+
+        Returns:
+            Vorschläge absteigend nach Score
+        """
+        features = material_features(material)
+        hits = [self.postings[f] for f in features if f in self.postings]
+        if not hits or not self.names:
+            return []
+        shared = np.bincount(np.concatenate(hits), minlength=len(self.names))
+        scores = 2.0 * shared / (self.sizes + len(features))
+
+        candidates = np.flatnonzero(shared)
+        if len(candidates) > top_k:
+            candidates = candidates[np.argpartition(-scores[candidates], top_k - 1)[:top_k]]
+        candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+
+        return [
+            MatchCandidate(self.names[i], self.process_uuids[i], round(float(scores[i]), 4))
+            for i in candidates
+            if scores[i] >= min_score
+        ]
+
+
+def load_match_index(mapping_file: Union[str, Path], version: Optional[str] = None) -> MaterialMatchIndex:
+    """
+    Lädt den Vorschlagsindex zur Mapping-Datei (Sidecar '<Mapping>.xlsx.index.pkl').
+
+    Bei einer Mapping-Datenbank wird der Index aus der angegebenen Version gebaut und je
+    Version in einem eigenen Sidecar ('<Mapping>.sqlite.<Hash der Version>.index.pkl')
+    gespeichert.
+
+    Args:
+        mapping_file: Pfad zur Mapping-Datei bzw. -Datenbank
+        version: Nur bei einer Mapping-Datenbank: Version (None = neueste)
+
+    Returns:
+        MaterialMatchIndex (wird neu gebaut, wenn sich die Mapping-Datei geändert hat)
+    """
+    suffix = MATCH_INDEX_SUFFIX
+    if is_mapping_database(mapping_file):
+        from bom_to_epd_mappingdb import MappingStore
+
+        with MappingStore(mapping_file) as store:
+            version = version or store.latest_version()
+        suffix = f".{hashlib.sha256(str(version).encode('utf-8')).hexdigest()[:16]}{MATCH_INDEX_SUFFIX}"
+
+    def build(path: Path) -> MaterialMatchIndex:
+        return MaterialMatchIndex.from_mapping(load_mapping(path, version=version))
+
+    return load_compiled_sidecar(mapping_file, suffix, build, MATCH_INDEX_VERSION)
+
+
+def suggest_mappings(
+    materials: Iterable[str],
+    mapping_file: Union[str, Path],
+    top_k: int = 5,
+    min_score: float = 0.3,
+    mapping_version: Optional[str] = None
+) -> Dict[str, List[MatchCandidate]]:
+    """
+    Schlägt für Materialien ohne Treffer im Mapping passende Mapping-Einträge vor.
+
+    Args:
+        materials: Materialnamen aus der BoM
+        mapping_file: Pfad zur Mapping-Datei
+        top_k: Maximale Anzahl Vorschläge je Material
+        min_score: Mindest-Score eines Vorschlags (0..1)
+        mapping_version: Nur bei einer Mapping-Datenbank: Version (None = neueste)
+
+    Returns:
+        Dictionary Materialname -> Vorschläge (absteigend nach Score)
+    """
+    index = load_match_index(mapping_file, mapping_version)
+    return {material: index.query(material, top_k, min_score) for material in dict.fromkeys(materials)}
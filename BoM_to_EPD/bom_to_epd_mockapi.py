@@ -0,0 +1,359 @@
+"""
+Lokaler Ersatz für die run-epd-tree API und Lasttest der Übermittlung
+
+Der Mock-Server nimmt Payloads im Format von generate_payload entgegen (auch gzip-komprimiert),
+prüft sie wie validate_payload (ohne Liste zulässiger Einheiten; nur fehlende Einheiten
+sind Fehler) und antwortet mit einstellbarer Latenz, Fehlerquote und
+Antwortgröße. Der Lasttest sendet Payloads über die SubmissionEngine (wie der Batch-Modus mit
+--submit) und meldet Durchsatz sowie p50/p95/p99 der Latenz.
+
+Beispiele:
+    python bom_to_epd_mockapi.py serve --port 8765 --latency 0.2 --error-rate 0.05
+    python bom_to_epd_mockapi.py loadtest --payloads 500 --concurrency 16 --latency 0.05
+    python bom_to_epd_mockapi.py loadtest --payload-dir results --api-url http://127.0.0.1:8765/
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import math
+import random
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Tuple
+
+from bom_to_epd import validate_payload
+
+
+@dataclass
+class MockApiConfig:
+    """
+    Verhalten des Mock-Servers.
+
+    Args:
+        latency: Mittlere Antwortzeit in Sekunden
+        latency_jitter: Zufällige Abweichung der Antwortzeit (+/- Sekunden)
+        error_rate: Anteil der Anfragen, die mit error_status beantwortet werden (0..1)
+        error_status: HTTP-Status simulierter Fehler (z.B. 503 oder 429)
+        retry_after: Optionaler Retry-After-Header (Sekunden) bei simulierten Fehlern
+        response_bytes: Ungefähre Größe der Antwort bei Erfolg
+        seed: Startwert des Zufallsgenerators (reproduzierbare Fehler)
+        impact_results: Wenn True, enthält die Antwort Ergebnisse je Prozess-Komponente
+            (synthetische, je Prozess-UUID feste Faktoren; siehe bom_to_epd_lcia)
+    """
+    latency: float = 0.0
+    latency_jitter: float = 0.0
+    error_rate: float = 0.0
+    error_status: int = 503
+    retry_after: Optional[float] = None
+    response_bytes: int = 256
+    seed: Optional[int] = None
+    impact_results: bool = False
+
+
+# Indikatoren der synthetischen Ergebnisse (impact_results)
+MOCK_INDICATORS = ("GWP-total", "AP", "EP-freshwater")
+
+
+def mock_impact_factors(process_uuid: str) -> Dict[str, float]:
+    """Synthetische, für eine Prozess-UUID immer gleiche Wirkungsfaktoren je Einheit."""
+    digest = hashlib.sha256(str(process_uuid).encode("utf-8")).digest()
+    return {indicator: int.from_bytes(digest[4 * i:4 * i + 4], "big") / 2 ** 32 * 10
+            for i, indicator in enumerate(MOCK_INDICATORS)}
+
+
+def _impact_results(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Ergebnisse je Prozess-Komponente für ihre Gesamtmenge im Payload."""
+    from bom_to_epd_lcia import component_amounts
+
+    amounts = component_amounts(payload)
+    return {"components": [
+        {"id": component["id"],
+         "results": [{"indicator": indicator, "module": "A1-A3", "value": factor * amounts[component["id"]][0]}
+                     for indicator, factor in mock_impact_factors(component["epd"]).items()]}
+        for component in payload["components"] if "epd" in component and component["id"] in amounts
+    ]}
+
+
+class _MockApiHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "MockApiServer"
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length)
+        if self.headers.get("Content-Encoding") == "gzip":
+            body = gzip.decompress(body)
+        config = self.server.config
+        self.server.count("requests")
+
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            self._reply(400, {"errors": ["Body ist kein gültiges JSON"]})
+            return
+        # Ohne known_units: die echte API kennt die Einheiten ihrer Datenbanken, der Mock nicht
+        errors = validate_payload(payload)
+        if errors:
+            self.server.count("invalid")
+            self._reply(400, {"errors": errors})
+            return
+
+        with self.server.lock:
+            fail = self.server.rng.random() < config.error_rate
+            delay = max(0.0, config.latency + self.server.rng.uniform(-config.latency_jitter, config.latency_jitter))
+        time.sleep(delay)
+        if fail:
+            self.server.count("errors")
+            headers = {"Retry-After": str(config.retry_after)} if config.retry_after is not None else {}
+            self._reply(config.error_status, {"error": "simulierter Fehler"}, headers)
+            return
+
+        self.server.count("ok")
+        result = {"root": payload["root"]["component"], "components": len(payload["components"]), "results": ""}
+        if config.impact_results:
+            result["results"] = _impact_results(payload)
+        else:
+            result["results"] = "x" * max(0, config.response_bytes - len(json.dumps(result)))
+        self._reply(200, result)
+
+    def _reply(self, status: int, data: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> None:
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+class MockApiServer(ThreadingHTTPServer):
+    """
+    Mock der run-epd-tree API (ein Thread pro Verbindung).
+
+    Args:
+        config: Verhalten (Latenz, Fehlerquote, Antwortgröße)
+        host: Adresse
+        port: Port (0 = freien Port wählen)
+    """
+
+    daemon_threads = True
+
+    def __init__(self, config: Optional[MockApiConfig] = None, host: str = "127.0.0.1", port: int = 0):
+        super().__init__((host, port), _MockApiHandler)
+        self.config = config or MockApiConfig()
+        self.rng = random.Random(self.config.seed)
+        self.lock = threading.Lock()
+        self.stats = {"requests": 0, "ok": 0, "errors": 0, "invalid": 0}
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def count(self, key: str) -> None:
+        with self.lock:
+            self.stats[key] += 1
+
+    def start(self) -> "MockApiServer":
+        """Startet den Server in einem Hintergrund-Thread."""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self) -> "MockApiServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+
+def synthetic_payloads(count: int, components: int = 100, seed: int = 0) -> List[Dict[str, Any]]:
+    """Erzeugt count gültige Payloads mit je components Ecoinvent-Komponenten."""
+    from bom_to_epd import generate_payload, new_local_ids, DEFAULT_ROOT_REPOSITORY, DEFAULT_TARGET_REPOSITORY
+
+    rng = random.Random(seed)
+    payloads = []
+    for n in range(count):
+        ids = new_local_ids(components)
+        component_list = [{"id": local_id, "name": f"Material {i} (A1)", "epd": local_id,
+                           "repository": DEFAULT_ROOT_REPOSITORY} for i, local_id in enumerate(ids)]
+        inputs = [{"component": local_id, "amount": rng.uniform(0.01, 10.0), "unit": "kg"} for local_id in ids]
+        payloads.append(generate_payload(f"Lasttest {n}", inputs, component_list, "kg",
+                                         DEFAULT_TARGET_REPOSITORY, [], {}))
+    return payloads
+
+
+def load_payload_dir(directory: Path) -> List[Tuple[Dict[str, Any], bytes]]:
+    """
+    Lädt alle Payloads (*.json, *.json.gz) eines Ausgabeverzeichnisses.
+
+    Übersprungen werden die übrigen JSON-Dateien des Verzeichnisses (Lauf-Protokoll,
+    *.trace.json, *.changes.json) und alle Dokumente, die keine Payloads sind (kein
+    JSON-Objekt mit 'root' und einer Liste 'components').
+    """
+    from bom_to_epd import load_json, RUN_MANIFEST_FILENAME
+
+    files = sorted(list(directory.glob("*.json")) + list(directory.glob("*.json.gz")))
+    payloads = []
+    for path in files:
+        if path.name == RUN_MANIFEST_FILENAME or ".trace." in path.name or ".changes." in path.name:
+            continue
+        payload, body = load_json(path)
+        if isinstance(payload, dict) and "root" in payload and isinstance(payload.get("components"), list):
+            payloads.append((payload, body))
+    return payloads
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """Perzentil (Nearest-Rank) der Werte; q in Prozent."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    # Rang = ceil(q/100 * n); q * n zuerst, damit z.B. 7 % von 100 nicht zu 7.000000000000001 wird
+    index = min(len(ordered) - 1, max(0, math.ceil(q * len(ordered) / 100.0) - 1))
+    return ordered[index]
+
+
+def run_load_test(
+    payloads: List[Tuple[Dict[str, Any], Optional[bytes]]],
+    url_api: str,
+    api_key: str = "loadtest",
+    concurrency: int = 8,
+    rate_limit: Optional[float] = None,
+    max_retries: int = 5,
+    backoff_base: float = 0.1,
+    compress: bool = False
+) -> Dict[str, Any]:
+    """
+    Sendet alle Payloads über die SubmissionEngine und misst Durchsatz und Latenz.
+
+    Args:
+        payloads: Liste von (Payload, kodierter Body oder None)
+        url_api: URL der (Mock-)API
+        Übrige Argumente wie bei SubmissionEngine
+
+    Returns:
+        Kennzahlen: Anzahl, Erfolge, Fehler, Versuche, Sekunden, Payloads/s und
+        Latenz-Perzentile p50/p95/p99 (Sekunden je Payload inkl. Wiederholungen)
+    """
+    from bom_to_epd_api import SubmissionEngine
+
+    started = time.perf_counter()
+    with SubmissionEngine(url_api, api_key, max_concurrency=concurrency, rate_limit=rate_limit,
+                          max_retries=max_retries, backoff_base=backoff_base, compress=compress) as engine:
+        results = list(engine.submit_many((i, payload, body) if body is not None else (i, payload)
+                                          for i, (payload, body) in enumerate(payloads)))
+    elapsed = max(time.perf_counter() - started, 1e-9)
+
+    latencies = [r.seconds for r in results]
+    return {
+        "payloads": len(results),
+        "ok": sum(1 for r in results if r.ok),
+        "failed": sum(1 for r in results if not r.ok),
+        "attempts": sum(r.attempts for r in results),
+        "seconds": round(elapsed, 4),
+        "payloads_per_second": round(len(results) / elapsed, 2),
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+    }
+
+
+def _add_config_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--latency", type=float, default=0.0, help="Antwortzeit in Sekunden")
+    parser.add_argument("--latency-jitter", type=float, default=0.0, help="Abweichung der Antwortzeit (+/- s)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Anteil simulierter Fehler (0..1)")
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--retry-after", type=float, default=None)
+    parser.add_argument("--response-bytes", type=int, default=256)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--impact-results", action="store_true",
+                        help="Synthetische Ergebnisse je Prozess-Komponente zurückgeben")
+
+
+def _config_from_args(args: argparse.Namespace) -> MockApiConfig:
+    return MockApiConfig(latency=args.latency, latency_jitter=args.latency_jitter, error_rate=args.error_rate,
+                         error_status=args.error_status, retry_after=args.retry_after,
+                         response_bytes=args.response_bytes, seed=args.seed,
+                         impact_results=args.impact_results)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Mock der run-epd-tree API und Lasttest der Übermittlung.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve = commands.add_parser("serve", help="Mock-Server starten")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8765)
+    _add_config_arguments(serve)
+
+    loadtest = commands.add_parser("loadtest", help="Lasttest gegen den Mock (oder --api-url)")
+    loadtest.add_argument("--api-url", default=None, help="Vorhandener Server; sonst wird ein Mock gestartet")
+    loadtest.add_argument("--payload-dir", type=Path, default=None,
+                          help="Verzeichnis mit Payloads (z.B. Batch-Ausgabe); sonst synthetische Payloads")
+    loadtest.add_argument("--payloads", type=int, default=200, help="Anzahl synthetischer Payloads")
+    loadtest.add_argument("--components", type=int, default=100, help="Komponenten je synthetischem Payload")
+    loadtest.add_argument("--concurrency", type=int, default=8)
+    loadtest.add_argument("--rate-limit", type=float, default=None)
+    loadtest.add_argument("--max-retries", type=int, default=5)
+    loadtest.add_argument("--gzip-request", action="store_true")
+    loadtest.add_argument("-o", "--output", type=Path, default=None, help="Kennzahlen als JSON speichern")
+    _add_config_arguments(loadtest)
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        server = MockApiServer(_config_from_args(args), args.host, args.port)
+        print(f"Mock-API läuft unter {server.url} (Strg+C beendet)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+        return 0
+
+    if args.payload_dir is not None:
+        payloads = load_payload_dir(args.payload_dir)
+    else:
+        payloads = [(payload, None) for payload in synthetic_payloads(args.payloads, args.components)]
+    if not payloads:
+        print("Keine Payloads gefunden.")
+        return 1
+
+    server = None if args.api_url else MockApiServer(_config_from_args(args)).start()
+    try:
+        report = run_load_test(payloads, args.api_url or server.url, concurrency=args.concurrency,
+                               rate_limit=args.rate_limit, max_retries=args.max_retries,
+                               compress=args.gzip_request)
+        if server is not None:
+            report["server"] = dict(server.stats)
+    finally:
+        if server is not None:
+            server.stop()
+
+    print(f"{report['payloads']} Payloads ({report['failed']} fehlgeschlagen, {report['attempts']} Versuche) "
+          f"in {report['seconds']:.2f} s: {report['payloads_per_second']:.1f} Payloads/s, "
+          f"p50 {report['p50'] * 1000:.0f} ms, p95 {report['p95'] * 1000:.0f} ms, p99 {report['p99'] * 1000:.0f} ms")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return 1 if report["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
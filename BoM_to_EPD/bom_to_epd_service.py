@@ -0,0 +1,431 @@
+"""
+Konvertierungsdienst mit lokaler Job-API
+
+Ein langlebiger Prozess, der pandas, das Mapping (inkl. Vorschlagsindex) und je Worker eine
+HTTP-Session zur API einmal lädt und warm hält. Konvertierungsaufträge (BoM-Pfad und Einstellungen wie bei
+process_epd) werden über eine lokale HTTP-API (TCP oder Unix-Socket) angenommen, in einer
+begrenzten Warteschlange gehalten und von einer festen Anzahl Worker-Threads abgearbeitet.
+
+Endpunkte:
+    POST   /jobs        Auftrag einreichen (application/json, Eingabe-Parameter von process_epd)
+                        -> 202 {"id", "status"}
+    GET    /jobs        Alle Aufträge (ohne Ergebnisse)
+    GET    /jobs/<id>   Status, Meldungen, Stufen-Zeiten und Ergebnis eines Auftrags
+    DELETE /jobs/<id>   Wartenden Auftrag abbrechen
+    GET    /health      Zustand des Dienstes (Warteschlange, Worker)
+
+Beispiel:
+    python bom_to_epd_service.py --port 8766 --workers 2 -o results
+    curl -X POST localhost:8766/jobs -H "Content-Type: application/json" -d '{"main_file_path": "bom.xlsx", "sheet_name": "BoM", "full_name": "EPD 1"}'
+"""
+
+import argparse
+import inspect
+import itertools
+import json
+import os
+import queue
+import socket
+import sys
+import threading
+import time
+from dataclasses import dataclass, field, asdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Optional, List, Dict, Tuple, Any
+
+from bom_to_epd import (
+    process_epd, warm_up, column_letter_to_index, is_mapping_database, PipelineSession,
+    DEFAULT_ROOT_REPOSITORY, DEFAULT_TARGET_REPOSITORY, DEFAULT_AUTH_URL,
+    DEFAULT_METHOD_URL, DEFAULT_METHOD_NAME, DEFAULT_API_URL, DEFAULT_API_KEY
+)
+from bom_to_epd_events import Instrumentation, MemorySink, JsonlTraceSink, TRACE_ENV_VARIABLE
+
+
+# Parameter von process_epd, die ein Auftrag setzen darf (Eingabe, Spalten, Name, Einheit, Schalter).
+# API-URL, Zugangsdaten, Repositories, Method Library, Mapping und Output-Verzeichnis legt
+# ausschließlich der Dienst fest.
+_JOB_PARAMETERS = {
+    "main_file_path", "sheet_name", "full_name", "epd_unit", "start_row_index",
+    "material_column_index", "amount_column_index", "level_column_index", "engine",
+    "material_overrides", "mapping_version", "skip_missing_materials", "deterministic", "aggregate",
+    "pretty_json", "compress_output", "compress_request", "incremental", "cache_impacts", "journal",
+    "validate",
+}
+_COLUMN_PARAMETERS = ("material_column_index", "amount_column_index", "level_column_index")
+
+# Wie viele abgeschlossene Aufträge (mit Ergebnis) gehalten werden
+DEFAULT_KEEP_FINISHED = 1000
+
+
+class QueueFull(Exception):
+    """Die Warteschlange des Dienstes ist voll."""
+
+
+@dataclass
+class ConversionJob:
+    """Ein Konvertierungsauftrag und sein Zustand."""
+    id: str
+    params: Dict[str, Any]
+    status: str = "queued"  # queued, running, done, failed, cancelled
+    created: float = field(default_factory=time.time)
+    started: Optional[float] = None
+    finished: Optional[float] = None
+    messages: List[str] = field(default_factory=list)
+    stages: Dict[str, float] = field(default_factory=dict)
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+    def summary(self) -> Dict[str, Any]:
+        """Zustand ohne Meldungen und Ergebnis (für Listen)."""
+        return {"id": self.id, "status": self.status, "full_name": self.params.get("full_name"),
+                "created": self.created, "started": self.started, "finished": self.finished}
+
+
+def _safe_name(name: Any) -> str:
+    """EPD-Name als einzelne Pfadkomponente (Dateien landen immer im Output-Verzeichnis)."""
+    if not isinstance(name, str):
+        raise ValueError("Parameter 'full_name' muss ein String sein")
+    safe = name.replace("/", "_").replace("\\", "_").replace("\0", "").strip()
+    if safe in ("", ".", ".."):
+        raise ValueError(f"Ungültiger EPD-Name: {name!r}")
+    return safe
+
+
+class ConversionService:
+    """
+    Nimmt Konvertierungsaufträge an und führt sie mit process_epd aus.
+
+    Args:
+        defaults: Voreinstellungen für Parameter von process_epd, die ein Auftrag nicht angibt
+            (z.B. mapping_file_path, output_dir, url_api, auth_list)
+        workers: Anzahl Worker-Threads (gleichzeitig laufende Aufträge)
+        max_queue: Maximale Anzahl wartender Aufträge; darüber wird QueueFull ausgelöst
+        keep_finished: Anzahl abgeschlossener Aufträge, die abrufbar bleiben
+    """
+
+    def __init__(self, defaults: Dict[str, Any], workers: int = 2, max_queue: int = 100,
+                 keep_finished: int = DEFAULT_KEEP_FINISHED):
+        self.defaults = dict(defaults)
+        self.keep_finished = keep_finished
+        self.jobs: Dict[str, ConversionJob] = {}
+        self._queue: "queue.Queue[Optional[Tuple[ConversionJob, Dict[str, Any]]]]" = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._parameters = set(inspect.signature(process_epd).parameters)
+        self._workers = [threading.Thread(target=self._work, name=f"bom-to-epd-worker-{i}", daemon=True)
+                         for i in range(max(1, workers))]
+
+    def start(self) -> "ConversionService":
+        """Lädt Abhängigkeiten und Mapping vor und startet die Worker."""
+        mapping_file = self.defaults.get("mapping_file_path")
+        warm_up(mapping_file)
+        if mapping_file and Path(mapping_file).exists():
+            from bom_to_epd_match import load_match_index
+
+            load_match_index(mapping_file, self.defaults.get("mapping_version"))
+            if is_mapping_database(mapping_file):
+                from bom_to_epd_mappingdb import MappingStore
+
+                with MappingStore(mapping_file) as store:
+                    store.latest_version()
+        for worker in self._workers:
+            worker.start()
+        return self
+
+    def stop(self, wait: bool = True) -> None:
+        """Beendet die Worker, nachdem die wartenden Aufträge abgearbeitet sind."""
+        for _ in self._workers:
+            self._queue.put(None)
+        if wait:
+            for worker in self._workers:
+                worker.join()
+
+    def _job_params(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Prüft die Parameter eines Auftrags und ergänzt die Voreinstellungen."""
+        unknown = set(params) - self._parameters
+        if unknown:
+            raise ValueError(f"Unbekannte Parameter: {', '.join(sorted(unknown))}")
+        forbidden = set(params) - _JOB_PARAMETERS
+        if forbidden:
+            raise ValueError(f"Parameter dürfen nur beim Start des Dienstes gesetzt werden: "
+                             f"{', '.join(sorted(forbidden))}")
+        merged = {**self.defaults, **params}
+        for name in ("main_file_path", "full_name"):
+            if not merged.get(name):
+                raise ValueError(f"Parameter '{name}' fehlt")
+        merged["full_name"] = _safe_name(merged["full_name"])
+        for name in _COLUMN_PARAMETERS:
+            if isinstance(merged.get(name), str):
+                merged[name] = column_letter_to_index(merged[name])
+        merged["output_dir"] = Path(merged["output_dir"])
+        return merged
+
+    def submit(self, params: Dict[str, Any]) -> ConversionJob:
+        """
+        Reiht einen Auftrag ein.
+
+        Raises:
+            ValueError: bei unbekannten oder fehlenden Parametern
+            QueueFull: wenn die Warteschlange voll ist
+        """
+        merged = self._job_params(params)
+        job = ConversionJob(id=str(next(self._ids)), params={**params, "full_name": merged["full_name"]})
+        with self._lock:
+            self.jobs[job.id] = job
+        try:
+            self._queue.put_nowait((job, merged))
+        except queue.Full:
+            with self._lock:
+                del self.jobs[job.id]
+            raise QueueFull(f"Warteschlange voll ({self._queue.maxsize} Aufträge)")
+        return job
+
+    def get(self, job_id: str) -> Optional[ConversionJob]:
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> bool:
+        """Bricht einen wartenden Auftrag ab; laufende Aufträge werden zu Ende geführt."""
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if job is None or job.status != "queued":
+                return False
+            job.status = "cancelled"
+            job.finished = time.time()
+            return True
+
+    def health(self) -> Dict[str, Any]:
+        with self._lock:
+            counts: Dict[str, int] = {}
+            for job in self.jobs.values():
+                counts[job.status] = counts.get(job.status, 0) + 1
+        return {"status": "ok", "workers": len(self._workers), "queue": self._queue.qsize(),
+                "max_queue": self._queue.maxsize, "jobs": counts}
+
+    def _work(self) -> None:
+        # Eigene Session je Worker: die Stufen-Caches halten nur das jeweils letzte Ergebnis;
+        # send_to_api verwendet ebenso eine HTTP-Session je Thread (get_api_session)
+        session = PipelineSession()
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            job, params = item
+            with self._lock:
+                if job.status == "cancelled":
+                    continue
+                job.status = "running"
+                job.started = time.time()
+            self._run(job, params, session)
+            self._prune()
+
+    def _run(self, job: ConversionJob, params: Dict[str, Any], session: PipelineSession) -> None:
+        sink = MemorySink()
+        # Meldungen in den Auftrag statt auf die Konsole; Trace-Datei wie bei default_instrumentation
+        sinks: List[Any] = [sink]
+        trace_path = os.environ.get(TRACE_ENV_VARIABLE)
+        if trace_path:
+            sinks.append(JsonlTraceSink(trace_path))
+        events = Instrumentation(sinks, run=params["full_name"])
+        try:
+            params["output_dir"].mkdir(parents=True, exist_ok=True)
+            resp = process_epd(**params, session=session, events=events)
+            result: Dict[str, Any] = {"output": str(params["output_dir"] / f"{params['full_name']}.json")}
+            if resp is not None:
+                result["status_code"] = resp.status_code
+                try:
+                    result["response"] = resp.json()
+                except ValueError:
+                    result["response"] = resp.text
+            status = "done" if resp is not None and resp.ok else "failed"
+            error = None if status == "done" else f"HTTP {result.get('status_code')}"
+        except Exception as e:
+            result, status, error = None, "failed", f"{type(e).__name__}: {e}"
+        with self._lock:
+            job.messages = sink.messages()
+            job.stages = sink.stages()
+            job.result = result
+            job.error = error
+            job.status = status
+            job.finished = time.time()
+
+    def _prune(self) -> None:
+        """Verwirft die ältesten abgeschlossenen Aufträge über keep_finished hinaus."""
+        with self._lock:
+            finished = [job for job in self.jobs.values() if job.finished is not None]
+            for job in sorted(finished, key=lambda j: j.finished)[:max(0, len(finished) - self.keep_finished)]:
+                del self.jobs[job.id]
+
+
+class _ServiceHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "ServiceServer"
+
+    def do_GET(self) -> None:
+        service = self.server.service
+        if self.path == "/health":
+            self._reply(200, service.health())
+        elif self.path == "/jobs":
+            with service._lock:
+                jobs = [job.summary() for job in service.jobs.values()]
+            self._reply(200, {"jobs": jobs})
+        elif self.path.startswith("/jobs/"):
+            job = service.get(self.path[len("/jobs/"):])
+            if job is None:
+                self._reply(404, {"error": "Auftrag nicht gefunden"})
+            else:
+                with service._lock:
+                    data = asdict(job)
+                self._reply(200, data)
+        else:
+            self._reply(404, {"error": "Unbekannter Pfad"})
+
+    def do_POST(self) -> None:
+        if self.path != "/jobs":
+            self._reply(404, {"error": "Unbekannter Pfad"})
+            return
+        # Nur JSON: verhindert einfache Cross-Site-POSTs (text/plain) von Webseiten auf den Port
+        content_type = self.headers.get("Content-Type", "").split(";")[0].strip().lower()
+        if content_type != "application/json":
+            self._reply(415, {"error": "Content-Type muss application/json sein"})
+            return
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            params = json.loads(self.rfile.read(length) or b"{}")
+            if not isinstance(params, dict):
+                raise ValueError("Auftrag ist kein JSON-Objekt")
+            job = self.server.service.submit(params)
+        except QueueFull as e:
+            self._reply(503, {"error": str(e)}, {"Retry-After": "1"})
+            return
+        except ValueError as e:
+            self._reply(400, {"error": str(e)})
+            return
+        self._reply(202, {"id": job.id, "status": job.status}, {"Location": f"/jobs/{job.id}"})
+
+    def do_DELETE(self) -> None:
+        job_id = self.path[len("/jobs/"):] if self.path.startswith("/jobs/") else None
+        if job_id is None or self.server.service.get(job_id) is None:
+            self._reply(404, {"error": "Auftrag nicht gefunden"})
+        elif self.server.service.cancel(job_id):
+            self._reply(200, {"id": job_id, "status": "cancelled"})
+        else:
+            self._reply(409, {"error": "Auftrag läuft bereits oder ist abgeschlossen"})
+
+    def _reply(self, status: int, data: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> None:
+        body = json.dumps(data, ensure_ascii=False, default=str).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def address_string(self) -> str:
+        # Bei Unix-Sockets ist client_address leer
+        return str(self.client_address[0]) if self.client_address else "unix"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+class ServiceServer(ThreadingHTTPServer):
+    """
+    HTTP-Server der Job-API (ein Thread pro Verbindung).
+
+    Args:
+        service: Gestarteter ConversionService
+        host: Adresse
+        port: Port (0 = freien Port wählen)
+        unix_socket: Wenn angegeben, wird statt TCP dieser Unix-Socket verwendet
+    """
+
+    daemon_threads = True
+
+    def __init__(self, service: ConversionService, host: str = "127.0.0.1", port: int = 0,
+                 unix_socket: Optional[str] = None):
+        self.service = service
+        self.unix_socket = unix_socket
+        if unix_socket is not None:
+            self.address_family = socket.AF_UNIX
+            if os.path.exists(unix_socket):
+                os.unlink(unix_socket)
+            super().__init__(unix_socket, _ServiceHandler)
+        else:
+            super().__init__((host, port), _ServiceHandler)
+
+    def server_bind(self) -> None:
+        if self.unix_socket is not None:
+            # HTTPServer.server_bind erwartet (host, port)
+            self.socket.bind(self.unix_socket)
+            self.server_name, self.server_port = "localhost", 0
+        else:
+            super().server_bind()
+
+    @property
+    def url(self) -> str:
+        if self.unix_socket is not None:
+            return f"unix://{self.unix_socket}"
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def server_close(self) -> None:
+        super().server_close()
+        if self.unix_socket is not None and os.path.exists(self.unix_socket):
+            os.unlink(self.unix_socket)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Konvertierungsdienst mit lokaler Job-API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--socket", default=None, help="Unix-Socket statt TCP")
+    parser.add_argument("-w", "--workers", type=int, default=2, help="Gleichzeitig laufende Aufträge")
+    parser.add_argument("--queue", type=int, default=100, help="Maximale Anzahl wartender Aufträge")
+    parser.add_argument("-o", "--output-dir", type=Path, default=Path(__file__).parent / "results")
+    parser.add_argument("-m", "--mapping", type=Path,
+                        default=Path(__file__).parent / "Mapping_Materials_to_Processes.xlsx")
+    parser.add_argument("--root-repository", default=DEFAULT_ROOT_REPOSITORY)
+    parser.add_argument("--target-repository", default=DEFAULT_TARGET_REPOSITORY)
+    parser.add_argument("--auth-url", default=DEFAULT_AUTH_URL)
+    parser.add_argument("--auth-user", default=os.environ.get("BOM_TO_EPD_AUTH_USER", ""))
+    parser.add_argument("--auth-password", default=os.environ.get("BOM_TO_EPD_AUTH_PASSWORD", ""))
+    parser.add_argument("--method-url", default=DEFAULT_METHOD_URL)
+    parser.add_argument("--method-name", default=DEFAULT_METHOD_NAME)
+    parser.add_argument("--api-url", default=DEFAULT_API_URL)
+    parser.add_argument("--api-key", default=os.environ.get("BOM_TO_EPD_API_KEY", DEFAULT_API_KEY))
+    args = parser.parse_args(argv)
+
+    defaults = {
+        "sheet_name": 0,
+        "mapping_file_path": str(args.mapping),
+        "epd_unit": "kg",
+        "root_repository": args.root_repository,
+        "target_repository": args.target_repository,
+        "start_row_index": 0,
+        "material_column_index": 2,
+        "amount_column_index": 4,
+        "auth_list": [{"url": args.auth_url, "user": args.auth_user, "password": args.auth_password}],
+        "method_lib": {"url": args.method_url, "name": args.method_name},
+        "url_api": args.api_url,
+        "api_key": args.api_key,
+        "output_dir": str(args.output_dir),
+        "skip_missing_materials": True,
+    }
+    service = ConversionService(defaults, args.workers, args.queue).start()
+    server = ServiceServer(service, args.host, args.port, args.socket)
+    print(f"Dienst läuft unter {server.url} ({args.workers} Worker, Strg+C beendet)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.stop(wait=False)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
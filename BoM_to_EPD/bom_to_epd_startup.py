@@ -0,0 +1,73 @@
+"""
+Startzeit-Prüfung für die GUI
+
+Misst in einem frischen Python-Prozess, wie lange der Import von bom_to_epd_gui dauert, und
+prüft, dass dabei keine schweren Abhängigkeiten (pandas, numpy, requests, openpyxl) geladen
+werden. Beendet sich mit Exit-Code 1, wenn das Zeitbudget überschritten wird oder eine
+dieser Abhängigkeiten beim Start importiert wird (z.B. als CI-Smoke-Test).
+
+Beispiel:
+    python bom_to_epd_startup.py --budget 0.5
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+from pathlib import Path
+from typing import Optional, List, Dict, Any
+
+
+STARTUP_BUDGET_SECONDS = 0.5
+HEAVY_MODULES = ("pandas", "numpy", "requests", "openpyxl")
+
+_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started
+print(json.dumps({{"seconds": elapsed, "loaded": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def measure_startup(module: str = "bom_to_epd_gui", runs: int = 3) -> Dict[str, Any]:
+    """
+    Misst die Importzeit eines Moduls in jeweils neuen Interpreter-Prozessen.
+
+    Args:
+        module: Zu importierendes Modul (muss neben diesem Skript liegen)
+        runs: Anzahl Messungen; gemeldet wird die schnellste
+
+    Returns:
+        Dictionary mit 'seconds' (schnellste Importzeit) und 'loaded' (geladene schwere Module)
+    """
+    code = _PROBE.format(module=module, heavy=HEAVY_MODULES)
+    measurements = []
+    for _ in range(max(1, runs)):
+        out = subprocess.run([sys.executable, "-c", code], cwd=Path(__file__).parent,
+                             capture_output=True, text=True, check=True)
+        measurements.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    return min(measurements, key=lambda m: m["seconds"])
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Prüft die Startzeit der GUI gegen ein Zeitbudget.")
+    parser.add_argument("--budget", type=float, default=STARTUP_BUDGET_SECONDS, help="Budget in Sekunden")
+    parser.add_argument("--module", default="bom_to_epd_gui")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    result = measure_startup(args.module, args.runs)
+    print(f"Import {args.module}: {result['seconds'] * 1000:.0f} ms (Budget {args.budget * 1000:.0f} ms)")
+    failed = False
+    if result["loaded"]:
+        print(f"FEHLER: beim Start geladen: {', '.join(result['loaded'])}")
+        failed = True
+    if result["seconds"] > args.budget:
+        print("FEHLER: Startzeit-Budget überschritten")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,53 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# Die Module liegen flach in BoM_to_EPD/ (wie beim Start der Skripte aus diesem Verzeichnis)
+PACKAGE_DIR = Path(__file__).resolve().parent.parent / "BoM_to_EPD"
+sys.path.insert(0, str(PACKAGE_DIR))
+
+MAPPING_HEADER = ("Material_name", "Process_uuid_A1", "Process_unit_A1", "Conversion_factor_A1",
+                  "Process_uuid_A3", "Process_unit_A3", "Conversion_factor_A3")
+MAPPING = [
+    ("Steel", "11111111-0000-0000-0000-000000000001", "kg", 1.0, None, None, None),
+    ("Aluminium", "11111111-0000-0000-0000-000000000002", "kg", 1.0,
+     "11111111-0000-0000-0000-0000000000a3", "kg", 0.1),
+    ("Cable", "11111111-0000-0000-0000-000000000003", "m", 2.5, None, None, None),
+]
+BOM = [("Steel", 2.0), ("Aluminium", 1.5), ("Cable", 4)]
+
+
+def write_workbook(path, header, rows, sheet="BoM"):
+    """Schreibt eine Arbeitsmappe mit einer Kopfzeile und den Zeilen (Testdaten)."""
+    import openpyxl
+
+    workbook = openpyxl.Workbook()
+    worksheet = workbook.active
+    worksheet.title = sheet
+    worksheet.append(header)
+    for row in rows:
+        worksheet.append(row)
+    workbook.save(path)
+    return path
+
+
+@pytest.fixture
+def files(tmp_path):
+    """(BoM, Mapping, Output-Verzeichnis) mit den Testdaten BOM und MAPPING."""
+    pytest.importorskip("openpyxl")
+    bom = write_workbook(tmp_path / "bom.xlsx", ("Material", "Menge"), BOM)
+    mapping = write_workbook(tmp_path / "mapping.xlsx", MAPPING_HEADER, MAPPING, sheet="Mapping")
+    output_dir = tmp_path / "out"
+    output_dir.mkdir()
+    return bom, mapping, output_dir
+
+
+@pytest.fixture
+def mock_api():
+    """Laufender Mock der API (siehe bom_to_epd_mockapi)."""
+    from bom_to_epd_mockapi import MockApiConfig, MockApiServer
+
+    server = MockApiServer(MockApiConfig()).start()
+    yield server
+    server.stop()
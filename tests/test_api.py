@@ -0,0 +1,39 @@
+"""SubmissionEngine gegen den Mock der API."""
+
+import pytest
+
+requests = pytest.importorskip("requests")
+
+from bom_to_epd import generate_payload
+from bom_to_epd_api import SubmissionEngine
+
+LEAF = {"id": "leaf", "name": "Steel (A1)", "epd": "11111111-0000-0000-0000-000000000001",
+        "repository": "https://root"}
+PAYLOAD = generate_payload("EPD", [{"component": "leaf", "amount": 2.0, "unit": "kg"}], [LEAF],
+                           "kg", "https://target", [], {})
+
+
+def test_caller_session_is_not_modified(mock_api):
+    session = requests.Session()
+    headers = dict(session.headers)
+    adapters = dict(session.adapters)
+
+    # Ohne content-encoding je Anfrage könnte der Mock den gzip-Body nicht lesen
+    with SubmissionEngine(mock_api.url, "key", max_concurrency=2, max_retries=0,
+                          session=session, compress=True) as engine:
+        results = list(engine.submit_many([(i, PAYLOAD) for i in range(3)]))
+
+    assert [result.response.status_code for result in results] == [200] * 3
+    assert mock_api.stats["ok"] == 3
+    assert dict(session.headers) == headers
+    assert dict(session.adapters) == adapters
+    # Die Session des Aufrufers bleibt offen und nutzbar
+    assert session.get(mock_api.url).status_code in (404, 405, 501)
+    session.close()
+
+
+def test_own_session_uses_a_pool_per_concurrency(mock_api):
+    with SubmissionEngine(mock_api.url, "key", max_concurrency=4, max_retries=0) as engine:
+        assert engine.session.get_adapter(mock_api.url)._pool_maxsize == 4
+        assert engine.submit(PAYLOAD).response.status_code == 200
+    assert mock_api.stats["ok"] == 1
@@ -0,0 +1,67 @@
+"""Batch-Konvertierung: eindeutige EPD-Namen und Fortsetzen über das Job-Journal."""
+
+import json
+
+import pytest
+
+pytest.importorskip("openpyxl")
+pytest.importorskip("pandas")
+pytest.importorskip("requests")
+
+from bom_to_epd import JobJournal
+from bom_to_epd_batch import main
+from conftest import BOM, write_workbook
+
+
+def _batch(source, mapping, output_dir, mock_api, *options):
+    """Ruft die Batch-Kommandozeile im selben Prozess auf (ohne Prozess-Pool)."""
+    return main([str(source), "-m", str(mapping), "-o", str(output_dir), "-j", "1",
+                 "--material-column", "A", "--amount-column", "B", "--start-row", "1",
+                 "--api-url", mock_api.url, "--api-key", "key", *options])
+
+
+def test_resume_does_not_resend_finished_jobs(files, mock_api, tmp_path, capsys):
+    _, mapping, output_dir = files
+    boms = tmp_path / "boms"
+    boms.mkdir()
+    write_workbook(boms / "a.xlsx", ("Material", "Menge"), BOM)
+    (boms / "b.xlsx").write_bytes(b"keine Arbeitsmappe")
+
+    assert _batch(boms, mapping, output_dir, mock_api, "--submit", "--journal") == 1
+    assert "FEHLER" in capsys.readouterr().out
+    assert mock_api.stats["requests"] == 1
+    sent = json.loads((output_dir / "a.json").read_text(encoding="utf-8"))
+    journal = JobJournal(output_dir)
+    assert journal.states["a"]["stage"] == "response_stored"
+    assert "b" not in journal.states
+
+    # b reparieren und fortsetzen: nur b wird konvertiert und gesendet
+    write_workbook(boms / "b.xlsx", ("Material", "Menge"), BOM[:2])
+    assert _batch(boms, mapping, output_dir, mock_api, "--submit", "--resume") == 0
+    out = capsys.readouterr().out
+    assert "Job-Journal: 1 EPDs abgeschlossen, 0 nur noch zu senden, 1 zu konvertieren" in out
+    assert mock_api.stats["requests"] == 2
+    assert json.loads((output_dir / "a.json").read_text(encoding="utf-8")) == sent
+    assert JobJournal(output_dir).states["b"]["stage"] == "response_stored"
+
+    # Alles abgeschlossen: nichts wird erneut gesendet
+    assert _batch(boms, mapping, output_dir, mock_api, "--submit", "--resume") == 0
+    assert mock_api.stats["requests"] == 2
+
+
+def test_duplicate_epd_names_are_rejected(files, mock_api, tmp_path, capsys):
+    _, mapping, output_dir = files
+    boms = tmp_path / "boms"
+    boms.mkdir()
+    write_workbook(boms / "a.xlsx", ("Material", "Menge"), BOM)
+    (boms / "a.csv").write_text("Material;Menge\nSteel;2\n", encoding="utf-8")
+    manifest = tmp_path / "manifest.csv"
+    manifest.write_text("file,epd_name\nboms/a.xlsx,X\nboms/a.csv,X\n", encoding="utf-8")
+
+    for source, name in ((boms, "a"), (manifest, "X")):
+        with pytest.raises(SystemExit) as raised:
+            _batch(source, mapping, output_dir, mock_api, "--submit")
+        assert raised.value.code == 2
+        assert f"EPD-Namen sind mehrfach vergeben (epd_name angeben): {name}:" in capsys.readouterr().err
+    assert mock_api.stats["requests"] == 0
+    assert not list(output_dir.iterdir())
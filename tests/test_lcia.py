@@ -0,0 +1,147 @@
+"""Wirkungsfaktoren aus API-Antworten, Cache und lokale A1-A3-Rechnung."""
+
+import sqlite3
+
+import pytest
+
+pytest.importorskip("pandas")
+
+from bom_to_epd_lcia import ImpactFactorCache, impact_factors_from_response, record_impact_factors
+
+METHOD = {"url": "https://method", "name": "EF"}
+ROOT = "https://root"
+
+
+def _payload(inputs, components):
+    """Payload mit einer Wurzel-Baugruppe über die angegebenen Prozess-Komponenten."""
+    return {"auth": [], "methodLib": METHOD,
+            "root": {"component": "root", "amount": 1, "unit": "kg"},
+            "components": [*components, {"id": "root", "name": "EPD", "inputs": inputs}]}
+
+
+def test_factors_are_keyed_by_process_repository_and_unit():
+    payload = _payload(
+        [{"component": "a1", "amount": 2.0, "unit": "kg"},
+         {"component": "a3", "amount": 0.5, "unit": "kg"},
+         {"component": "len", "amount": 4.0, "unit": "m"}],
+        [{"id": "a1", "name": "Steel (A1)", "epd": "P", "repository": ROOT},
+         {"id": "a3", "name": "Steel (A3 process)", "epd": "P", "repository": ROOT},
+         {"id": "len", "name": "Cable (A1)", "epd": "P", "repository": ROOT}])
+    response = {"components": {"a1": {"GWP": 4.0}, "a3": {"GWP": 1.0}, "len": {"GWP": 2.0}}}
+
+    factors = impact_factors_from_response(payload, response)
+    # A1 und A3 mit derselben Einheit werden zusammengefasst: (4 + 1) / (2 + 0.5)
+    assert factors == {("P", ROOT, "kg"): {"GWP": 2.0}, ("P", ROOT, "m"): {"GWP": 0.5}}
+
+
+def test_cache_keeps_units_apart(tmp_path):
+    payload = _payload(
+        [{"component": "a", "amount": 2.0, "unit": "kg"}, {"component": "b", "amount": 4.0, "unit": "m"}],
+        [{"id": "a", "name": "A", "epd": "P", "repository": ROOT},
+         {"id": "b", "name": "B", "epd": "P", "repository": ROOT}])
+    with ImpactFactorCache(tmp_path / "cache.sqlite") as cache:
+        assert record_impact_factors(cache, payload, {"components": {"a": {"GWP": 4.0}, "b": {"GWP": 2.0}}}) == 2
+        assert len(cache) == 2
+        assert cache.get_many(["P"], ROOT, METHOD) == {("P", "kg"): {"GWP": 2.0}, ("P", "m"): {"GWP": 0.5}}
+
+
+def test_cache_without_unit_in_key_is_migrated(tmp_path):
+    path = tmp_path / "old.sqlite"
+    with sqlite3.connect(str(path)) as conn:
+        conn.execute("CREATE TABLE impact_factors (process_uuid TEXT NOT NULL, repository TEXT NOT NULL, "
+                     "method TEXT NOT NULL, indicator TEXT NOT NULL, unit TEXT, value REAL NOT NULL, "
+                     "updated REAL NOT NULL, PRIMARY KEY (process_uuid, repository, method, indicator))")
+        conn.execute("INSERT INTO impact_factors VALUES ('P', ?, 'https://method|EF', 'GWP', 'kg', 2.0, 0)", (ROOT,))
+    with ImpactFactorCache(path) as cache:
+        cache.put_many({("P", ROOT, "m"): {"GWP": 0.5}}, METHOD)
+        assert cache.get_many(["P"], ROOT, METHOD) == {("P", "kg"): {"GWP": 2.0}, ("P", "m"): {"GWP": 0.5}}
+
+
+def _mapped_frame():
+    """Gemappter Frame wie von map_materials: Steel mit A1 und A3, Cable in m, Glass ohne Faktor."""
+    import pandas as pd
+
+    return pd.DataFrame({
+        "Material": ["Steel", "Cable", "Glass"],
+        "Amount": [2.0, 4.0, 1.0],
+        "Final_Amount_A1": [2.0, 10.0, 1.0],
+        "Final_Unit_A1": ["kg", "m", "kg"],
+        "Process_uuid_A1": ["P1", "P2", "P9"],
+        "Final_Amount_A3": [0.2, None, None],
+        "Final_Unit_A3": ["kg", None, None],
+        "Process_uuid_A3": ["P3", None, None],
+    })
+
+
+@pytest.fixture
+def model(tmp_path):
+    from bom_to_epd_lcia import ImpactModel
+
+    with ImpactFactorCache(tmp_path / "cache.sqlite") as cache:
+        cache.put_many({("P1", ROOT, "kg"): {"GWP": 2.0, "AP": 0.1},
+                        ("P3", ROOT, "kg"): {"GWP": 5.0},
+                        ("P2", ROOT, "m"): {"GWP": 0.5},
+                        # Gleicher Prozess, andere Einheit: darf für Cable (m) nicht verwendet werden
+                        ("P2", ROOT, "kg"): {"GWP": 100.0}}, METHOD)
+        yield ImpactModel.from_frame(_mapped_frame(), cache, ROOT, METHOD)
+
+
+def test_model_totals_by_hand(model):
+    # GWP: Steel 2 kg x 2 + 0.2 kg x 5 (A3), Cable 10 m x 0.5; AP: 2 kg x 0.1
+    assert model.totals().to_dict() == pytest.approx({"AP": 0.2, "GWP": 10.0})
+    assert model.missing == [("P9", "kg")]
+    contributions = model.contributions()
+    assert contributions.loc["Steel"].to_dict() == pytest.approx({"AP": 0.2, "GWP": 5.0})
+    assert contributions.loc["Glass"].to_dict() == pytest.approx({"AP": 0.0, "GWP": 0.0})
+
+
+def test_cache_miss_and_method(tmp_path):
+    from bom_to_epd_lcia import ImpactModel
+
+    with ImpactFactorCache(tmp_path / "cache.sqlite") as cache:
+        cache.put_many({("P1", ROOT, "kg"): {"GWP": 2.0}}, METHOD)
+        hit = ImpactModel.from_frame(_mapped_frame(), cache, ROOT, METHOD)
+        other_method = ImpactModel.from_frame(_mapped_frame(), cache, ROOT, {"url": "x", "name": "y"})
+        other_repository = ImpactModel.from_frame(_mapped_frame(), cache, "https://other", METHOD)
+    assert hit.totals().to_dict() == pytest.approx({"GWP": 4.0})
+    assert hit.missing == [("P2", "m"), ("P3", "kg"), ("P9", "kg")]
+    for missed in (other_method, other_repository):
+        assert missed.indicators == [] and len(missed.missing) == 4
+
+
+def test_what_if_by_hand(model):
+    variants = model.what_if([{"Steel": 1.5}, {"Cable": 0.0}, {"Steel": 2.0, "Cable": 2.0}, {}])
+    assert variants["GWP"].tolist() == pytest.approx([12.5, 5.0, 20.0, 10.0])
+    assert variants["AP"].tolist() == pytest.approx([0.3, 0.2, 0.4, 0.2])
+    # Gleiche Ergebnisse über die volle Mengenrechnung
+    full = model.variant_totals([[3.0, 4.0, 1.0], [2.0, 0.0, 1.0]])
+    assert full["GWP"].tolist() == pytest.approx([12.5, 5.0])
+    with pytest.raises(KeyError):
+        model.what_if([{"Wood": 2.0}])
+
+
+def test_factors_from_mock_response_reproduce_totals(files, tmp_path):
+    pytest.importorskip("requests")
+    from bom_to_epd import process_epd, read_materials_and_map
+    from bom_to_epd_lcia import IMPACT_CACHE_FILENAME, ImpactModel
+    from bom_to_epd_mockapi import MockApiConfig, MockApiServer
+    from bom_to_epd_events import Instrumentation
+
+    bom, mapping, output_dir = files
+    server = MockApiServer(MockApiConfig(impact_results=True)).start()
+    try:
+        response = process_epd(bom, "BoM", mapping, "EPD", "kg", ROOT, "https://target", 1, 0, 1, [], METHOD,
+                               server.url, "key", output_dir, events=Instrumentation(), cache_impacts=True)
+    finally:
+        server.stop()
+    expected = {}
+    for component in response.json()["results"]["components"]:
+        for result in component["results"]:
+            expected[result["indicator"]] = expected.get(result["indicator"], 0.0) + result["value"]
+
+    with ImpactFactorCache(output_dir / IMPACT_CACHE_FILENAME) as cache:
+        # Steel, Aluminium (A1 und A3) und Cable
+        assert len(cache) == 4
+        model = ImpactModel.from_frame(read_materials_and_map(bom, "BoM", mapping, 1, 0, 1), cache, ROOT, METHOD)
+    assert model.missing == []
+    assert model.totals().to_dict() == pytest.approx(expected)
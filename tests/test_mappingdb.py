@@ -0,0 +1,78 @@
+"""Mapping-Datenbank: Import, Versionen und dieselben Ergebnisse wie die Mapping-Excel-Datei."""
+
+import pytest
+
+pytest.importorskip("openpyxl")
+pd = pytest.importorskip("pandas")
+
+import bom_to_epd_mappingdb
+from bom_to_epd import load_mapping, read_materials_and_map
+from bom_to_epd_mappingdb import MappingStore, main
+from conftest import BOM, MAPPING, MAPPING_HEADER, write_workbook
+
+STEEL_V2 = "22222222-0000-0000-0000-000000000001"
+
+
+@pytest.fixture
+def mapping(tmp_path):
+    # Zusatzspalte und ein doppelter Materialname (Reihenfolge wie in der Datei muss erhalten bleiben)
+    rows = [(*row, f"Kommentar {i}") for i, row in enumerate(MAPPING)]
+    rows.append((" steel ", "99999999-0000-0000-0000-000000000001", "kg", 1.0, None, None, None, None))
+    return write_workbook(tmp_path / "mapping.xlsx", (*MAPPING_HEADER, "Kommentar"), rows, sheet="Mapping")
+
+
+@pytest.fixture
+def store(mapping, tmp_path):
+    with MappingStore(tmp_path / "mapping.sqlite") as store:
+        store.import_excel(mapping, "v1")
+        yield store
+
+
+def test_import(store, mapping):
+    assert [(v["version"], v["source"], v["entries"]) for v in store.versions()] == [("v1", str(mapping), 4)]
+    with pytest.raises(ValueError, match="existiert bereits"):
+        store.import_excel(mapping, "v1")
+    assert store.import_excel(mapping, "v1", replace=True) == 4
+
+    pd.testing.assert_frame_equal(store.to_frame(), load_mapping(mapping), check_dtype=False)
+
+
+def test_versioned_lookup(store):
+    store.copy_version("v1", "v2")
+    store.upsert("STEEL", "v2", Process_uuid_A1=STEEL_V2)
+    store.upsert("Copper", "v2", Process_uuid_A1="33333333-0000-0000-0000-000000000001",
+                 Process_unit_A1="kg", Conversion_factor_A1=1.0)
+
+    assert store.latest_version() == "v2"
+    assert store.lookup(["steel", "copper"], "v1")["Process_uuid_A1"].tolist() == [
+        MAPPING[0][1], "99999999-0000-0000-0000-000000000001"]
+    latest = store.lookup(["steel", "copper"])
+    assert latest["Material_name"].tolist() == ["Steel", " steel ", "Copper"]
+    assert latest["Process_uuid_A1"].tolist()[0] == STEEL_V2
+    with pytest.raises(ValueError, match="'v3' nicht"):
+        store.lookup(["steel"], "v3")
+
+
+def test_batched_lookup_matches_load_mapping(store, mapping, monkeypatch):
+    monkeypatch.setattr(bom_to_epd_mappingdb, "LOOKUP_BATCH_SIZE", 2)
+    df_map = load_mapping(mapping)
+    names = ["cable", "unbekannt", "steel", "aluminium", "steel"]
+
+    found = store.lookup(names)
+    expected = df_map[df_map["Material_name_norm"].isin(names)].drop(columns="Kommentar").reset_index(drop=True)
+    pd.testing.assert_frame_equal(found, expected, check_dtype=False)
+
+
+def test_mapping_is_the_same_for_both_backends(mapping, tmp_path):
+    bom = write_workbook(tmp_path / "bom.xlsx", ("Material", "Menge"), [*BOM, ("Unbekannt", 1)])
+    database = tmp_path / "mapping.db"
+    assert main(["import", str(mapping), str(database), "--version", "v1"]) == 0
+
+    def mapped(mapping_file):
+        return read_materials_and_map(bom, "BoM", mapping_file, start_row_index=1,
+                                      material_column_index=0, amount_column_index=1)
+
+    from_excel = mapped(mapping)
+    assert from_excel["Process_uuid_A1"].tolist()[:2] == [MAPPING[0][1], "99999999-0000-0000-0000-000000000001"]
+    assert from_excel["Process_uuid_A1"].isna().tolist()[-1]
+    pd.testing.assert_frame_equal(mapped(database), from_excel, check_dtype=False)
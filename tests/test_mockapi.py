@@ -0,0 +1,36 @@
+"""Auswertung des Lasttests und Laden der Payloads eines Ausgabeverzeichnisses."""
+
+import pytest
+
+from bom_to_epd_mockapi import load_payload_dir, percentile
+
+
+@pytest.mark.parametrize("q, expected", [(0, 1), (1, 1), (7, 7), (50, 50), (95, 95), (99, 99), (100, 100)])
+def test_percentile_nearest_rank(q, expected):
+    assert percentile(list(range(1, 101)), q) == expected
+
+
+def test_percentile_small_samples():
+    values = [0.4, 0.1, 0.3, 0.2]
+    assert percentile(values, 50) == 0.2
+    assert percentile(values, 75) == 0.3
+    assert percentile(values, 95) == 0.4
+    assert percentile([], 95) is None
+
+
+def test_load_payload_dir_skips_other_json_files(tmp_path):
+    from bom_to_epd import RUN_MANIFEST_FILENAME, encode_json, save_json
+
+    payload = {"auth": [], "methodLib": {}, "root": {"component": "r", "amount": 1, "unit": "kg"},
+               "components": [{"id": "r", "name": "EPD", "inputs": []}]}
+    save_json(payload, tmp_path / "EPD.json")
+    save_json(payload, tmp_path / "Gz.json", compress=True)
+    save_json({"EPD": {"source": "x"}}, tmp_path / RUN_MANIFEST_FILENAME)
+    save_json({"added": [], "removed": [], "changed": []}, tmp_path / "EPD.changes.json")
+    save_json({"c1": [{"line": 0}]}, tmp_path / "EPD.trace.json")
+    save_json([1, 2, 3], tmp_path / "list.json")
+    save_json({"components": "keine Liste", "root": {}}, tmp_path / "other.json")
+
+    loaded = load_payload_dir(tmp_path)
+    assert [data for data, _ in loaded] == [payload, payload]
+    assert all(body == encode_json(payload) for _, body in loaded)
@@ -0,0 +1,195 @@
+"""process_epd gegen den Mock der API: Stufen-Zeiten, Trace-Datei und die Wege ohne erneutes Senden."""
+
+import json
+
+import pytest
+
+pytest.importorskip("openpyxl")
+pytest.importorskip("pandas")
+pytest.importorskip("requests")
+
+import bom_to_epd
+from bom_to_epd import (
+    JobJournal, PayloadValidationError, allowed_units, generate_payload, load_allowed_units, load_mapping,
+    process_epd, validate_payload,
+)
+from bom_to_epd_events import Event, Instrumentation, JsonlTraceSink, MemorySink
+from conftest import MAPPING, MAPPING_HEADER, write_workbook
+
+# Stufen eines vollständigen Laufs (ohne Vorschläge, da alle Materialien gemappt sind)
+STAGES = ("read_and_map", "build_components", "generate_payload", "validate_payload",
+          "encode_json", "save_json", "send_to_api")
+
+
+def run(files, mock_api, sinks=None, epd_unit="kg", **options):
+    """Ein Lauf von process_epd; liefert (Antwort, MemorySink)."""
+    bom, mapping, output_dir = files
+    memory = MemorySink()
+    events = Instrumentation([memory, *(sinks or [])], run="EPD")
+    response = process_epd(bom, "BoM", mapping, "EPD", epd_unit, "https://root", "https://target",
+                           1, 0, 1, [], {"url": "https://method", "name": "EF"},
+                           mock_api.url, "key", output_dir, events=events, **options)
+    return response, memory
+
+
+def test_stage_timings(files, mock_api):
+    response, memory = run(files, mock_api)
+
+    assert response.status_code == 200
+    assert mock_api.stats["ok"] == 1
+    stages = memory.stages()
+    assert set(STAGES) <= set(stages)
+    assert all(seconds >= 0 for seconds in stages.values())
+    # Jede Stufe beginnt und endet genau einmal, Kennzahlen kommen mit dem Stop-Ereignis
+    for kind in ("start", "stop"):
+        assert sorted(e.stage for e in memory.events if e.kind == kind) == sorted(stages)
+    stops = {e.stage: e.fields for e in memory.events if e.kind == "stop"}
+    assert stops["read_and_map"]["sheet"] == "BoM"
+    assert stops["validate_payload"]["errors"] == 0
+    assert stops["save_json"]["bytes"] > 0
+    assert all(e.run == "EPD" for e in memory.events)
+
+
+def test_jsonl_trace_format(files, mock_api, tmp_path):
+    trace_path = tmp_path / "trace.jsonl"
+    run(files, mock_api, sinks=[JsonlTraceSink(trace_path)])
+
+    lines = trace_path.read_text(encoding="utf-8").splitlines()
+    records = [json.loads(line) for line in lines]
+    assert records and all(set(record) == set(Event.__dataclass_fields__) for record in records)
+    assert {record["kind"] for record in records} == {"start", "stop", "message"}
+    assert all(record["run"] == "EPD" for record in records)
+    stops = [record for record in records if record["kind"] == "stop"]
+    assert {record["stage"] for record in stops} >= set(STAGES)
+    assert all(isinstance(record["seconds"], float) for record in stops)
+    messages = [record for record in records if record["kind"] == "message"]
+    assert all(record["stage"] is None and record["level"] in ("info", "warning") for record in messages)
+    # Ein weiterer Lauf hängt an dieselbe Datei an
+    run(files, mock_api, sinks=[JsonlTraceSink(trace_path)])
+    assert len(trace_path.read_text(encoding="utf-8").splitlines()) == 2 * len(lines)
+
+
+def test_incremental_skips_unchanged_run(files, mock_api):
+    first, _ = run(files, mock_api, incremental=True)
+    second, memory = run(files, mock_api, incremental=True)
+
+    assert mock_api.stats["requests"] == 1
+    assert second.status_code == first.status_code == 200
+    assert second.json() == first.json()
+    assert any("unverändert seit dem letzten Lauf" in message for message in memory.messages())
+    assert memory.stages() == {}
+
+
+def test_incremental_resends_changed_settings(files, mock_api):
+    run(files, mock_api, incremental=True)
+    _, memory = run(files, mock_api, incremental=True, aggregate=True)
+
+    assert mock_api.stats["requests"] == 2
+    assert "send_to_api" in memory.stages()
+
+
+def test_journal_resumes_after_failed_send(files, mock_api, monkeypatch):
+    def connection_lost(*args, **kwargs):
+        raise ConnectionError("Verbindung unterbrochen")
+
+    monkeypatch.setattr(bom_to_epd, "send_to_api", connection_lost)
+    with pytest.raises(ConnectionError):
+        run(files, mock_api, journal=True)
+    # "submitted" wird vor dem Senden protokolliert, eine Antwort fehlt
+    assert JobJournal(files[2]).states["EPD"]["stage"] == "submitted"
+    monkeypatch.undo()
+
+    resumed, memory = run(files, mock_api, journal=True)
+    assert resumed.status_code == 200
+    assert mock_api.stats["requests"] == 1
+    assert any("Setze laut Job-Journal" in message for message in memory.messages())
+    # Der gespeicherte Payload wird gesendet, ohne BoM und Mapping erneut zu lesen
+    assert "read_and_map" not in memory.stages()
+    assert "send_to_api" in memory.stages()
+
+    done, memory = run(files, mock_api, journal=True)
+    assert done.status_code == 200
+    assert mock_api.stats["requests"] == 1
+    assert any("bereits übermittelt" in message for message in memory.messages())
+
+
+def test_deterministic_run_reuses_ledger(files, mock_api):
+    first, _ = run(files, mock_api, deterministic=True)
+    payload = (files[2] / "EPD.json").read_bytes()
+    second, memory = run(files, mock_api, deterministic=True)
+
+    assert mock_api.stats["requests"] == 1
+    assert (files[2] / "EPD.json").read_bytes() == payload
+    assert second.json() == first.json()
+    assert any("bereits berechnet" in message for message in memory.messages())
+    assert "send_to_api" not in memory.stages()
+
+
+def test_random_ids_are_sent_again(files, mock_api):
+    run(files, mock_api)
+    run(files, mock_api)
+
+    assert mock_api.stats["requests"] == 2
+
+
+def test_invalid_payload_is_not_sent(files, mock_api):
+    bom, mapping, output_dir = files
+    rows = [row[:6] + (0,) if row[4] else row for row in MAPPING]
+    write_workbook(mapping, MAPPING_HEADER, rows)
+
+    with pytest.raises(PayloadValidationError) as raised:
+        run(files, mock_api)
+    assert any("Mengen" in error for error in raised.value.errors)
+    assert mock_api.stats["requests"] == 0
+    assert (output_dir / "EPD.json").exists()
+
+
+def test_allowed_units_come_from_the_mapping(files):
+    _, mapping, _ = files
+    units = load_allowed_units(mapping)
+    assert units == allowed_units(load_mapping(mapping))
+    assert {"kg", "m", "Item(s)"} <= units
+    assert "nan" not in units and "kg*a" not in units
+
+    leaf = {"id": "leaf", "name": "Steel (A1)", "epd": MAPPING[0][1], "repository": "https://root"}
+    payload = generate_payload("EPD", [{"component": "leaf", "amount": 1.0, "unit": "kg*a"}], [leaf],
+                               "kg", "https://target", [], {})
+    errors = validate_payload(payload, units)
+    assert len(errors) == 1 and "'kg*a'" in errors[0]
+    # Ohne Liste zulässiger Einheiten (wie im Mock) sind nur fehlende Einheiten Fehler
+    assert validate_payload(payload) == []
+    assert validate_payload(payload, units | {"kg*a"}) == []
+
+
+def test_unknown_epd_unit_is_not_sent(files, mock_api):
+    with pytest.raises(PayloadValidationError) as raised:
+        run(files, mock_api, epd_unit="kgg")
+    assert any("'kgg'" in error for error in raised.value.errors)
+    assert mock_api.stats["requests"] == 0
+
+
+def test_aggregation_keeps_modules_apart():
+    import pandas as pd
+    from bom_to_epd import build_aggregated_inputs_and_components
+
+    df = pd.DataFrame({
+        "Material": ["Steel", "Scrap", "Steel"],
+        "Amount": [2.0, 1.0, 3.0],
+        "Final_Amount_A1": [2.0, 1.0, 3.0],
+        "Final_Unit_A1": ["kg", "kg", "kg"],
+        "Process_uuid_A1": ["P", "Q", "P"],
+        # Scrap verweist als A3 auf denselben Prozess P wie Steel als A1
+        "Final_Amount_A3": [None, 0.5, None],
+        "Final_Unit_A3": [None, "kg", None],
+        "Process_uuid_A3": [None, "P", None],
+    })
+    inputs, components, trace = build_aggregated_inputs_and_components(df, "https://root")
+
+    assert [(c["name"], c["epd"]) for c in components] == [
+        ("Steel (A1)", "P"), ("Scrap (A1)", "Q"), ("Scrap (A3 process)", "P")]
+    assert [i["amount"] for i in inputs] == [5.0, 1.0, 0.5]
+    by_name = {c["name"]: trace[c["id"]] for c in components}
+    assert by_name["Steel (A1)"] == [{"line": 0, "material": "Steel", "module": "A1", "amount": 2.0},
+                                     {"line": 2, "material": "Steel", "module": "A1", "amount": 3.0}]
+    assert by_name["Scrap (A3 process)"] == [{"line": 1, "material": "Scrap", "module": "A3", "amount": 0.5}]
+    assert sum(len(lines) for lines in trace.values()) == 4
@@ -0,0 +1,52 @@
+"""Lese-Backends der BoM: dieselbe BoM als Excel, CSV und Parquet ergibt dasselbe Mapping."""
+
+import pytest
+
+pytest.importorskip("openpyxl")
+pd = pytest.importorskip("pandas")
+
+from bom_to_epd import read_materials_and_map
+from conftest import MAPPING, MAPPING_HEADER, write_workbook
+
+HEADER = ("Pos", "Material", "Menge")
+ROWS = [(1, "Steel", 2.5), (2, "Aluminium", 1.25), (3, "Cable", 4), (4, "Unbekannt", 3),
+        (5, None, None), (6, "Steel", 0.5)]
+
+
+def _xlsx(path):
+    return write_workbook(path.with_suffix(".xlsx"), HEADER, ROWS)
+
+
+def _csv(path):
+    # Export einer deutschen Excel-Version: Semikolon und Dezimalkomma
+    lines = [";".join(HEADER)]
+    lines += [";".join("" if cell is None else str(cell).replace(".", ",") for cell in row) for row in ROWS]
+    path = path.with_suffix(".csv")
+    path.write_text("\r\n".join(lines) + "\r\n", encoding="utf-8-sig")
+    return path
+
+
+def _parquet(path):
+    pytest.importorskip("pyarrow")
+    path = path.with_suffix(".parquet")
+    pd.DataFrame(ROWS, columns=HEADER).to_parquet(path, index=False)
+    return path
+
+
+@pytest.fixture
+def mapping(tmp_path):
+    return write_workbook(tmp_path / "mapping.xlsx", MAPPING_HEADER, MAPPING, sheet="Mapping")
+
+
+def _mapped(path, mapping):
+    return read_materials_and_map(path, "BoM", mapping, start_row_index=1,
+                                  material_column_index=1, amount_column_index=2)
+
+
+@pytest.mark.parametrize("write", [_csv, _parquet], ids=["csv", "parquet"])
+def test_readers_map_like_excel(write, mapping, tmp_path):
+    expected = _mapped(_xlsx(tmp_path / "bom"), mapping)
+    assert expected["Material"].tolist() == ["Steel", "Aluminium", "Cable", "Unbekannt", "Steel"]
+    assert expected["Amount"].tolist() == [2.5, 1.25, 4.0, 3.0, 0.5]
+
+    pd.testing.assert_frame_equal(_mapped(write(tmp_path / "bom"), mapping), expected)
@@ -0,0 +1,67 @@
+"""Konvertierungsdienst mit mehreren Workern gegen den Mock der API."""
+
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("openpyxl")
+pytest.importorskip("pandas")
+pytest.importorskip("requests")
+
+import bom_to_epd
+from bom_to_epd import get_api_session
+from bom_to_epd_mockapi import MockApiConfig, MockApiServer
+from bom_to_epd_service import ConversionService
+
+WORKERS = 3
+JOBS = 6
+
+
+def test_api_session_per_thread():
+    sessions = []
+    threads = [threading.Thread(target=lambda: sessions.append(get_api_session())) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+        thread.join()
+    assert get_api_session() is get_api_session()
+    assert len({id(session) for session in [get_api_session(), *sessions]}) == 3
+
+
+def test_workers_send_with_their_own_sessions(files, monkeypatch):
+    bom, mapping, output_dir = files
+    used = []
+
+    def recording_session():
+        session = get_api_session()
+        used.append((threading.current_thread().name, session))
+        return session
+
+    monkeypatch.setattr(bom_to_epd, "get_api_session", recording_session)
+    # Mit Antwortzeit überlappen sich die Aufträge der Worker
+    server = MockApiServer(MockApiConfig(latency=0.05)).start()
+    service = ConversionService({
+        "mapping_file_path": str(mapping), "output_dir": str(output_dir), "sheet_name": "BoM",
+        "epd_unit": "kg", "root_repository": "https://root", "target_repository": "https://target",
+        "start_row_index": 1, "material_column_index": 0, "amount_column_index": 1, "auth_list": [],
+        "method_lib": {"url": "https://method", "name": "EF"}, "url_api": server.url, "api_key": "key",
+    }, workers=WORKERS).start()
+    try:
+        jobs = [service.submit({"main_file_path": str(bom), "full_name": f"EPD {i}"}) for i in range(JOBS)]
+        deadline = time.time() + 30
+        while any(job.finished is None for job in jobs) and time.time() < deadline:
+            time.sleep(0.02)
+    finally:
+        service.stop()
+        server.stop()
+
+    assert [(job.status, job.error) for job in jobs] == [("done", None)] * JOBS
+    assert all(job.result["status_code"] == 200 for job in jobs)
+    assert server.stats["ok"] == JOBS
+    assert len(used) == JOBS
+    threads = {name for name, _ in used}
+    assert len(threads) > 1 and all(name.startswith("bom-to-epd-worker-") for name in threads)
+    # Genau eine Session je Worker-Thread
+    by_thread = {name: {id(session) for n, session in used if n == name} for name in threads}
+    assert all(len(ids) == 1 for ids in by_thread.values())
+    assert len(set.union(*by_thread.values())) == len(threads)
@@ -0,0 +1,46 @@
+"""Startzeit der GUI: kein Import schwerer Abhängigkeiten, Importzeit innerhalb eines Budgets."""
+
+import subprocess
+import sys
+
+import pytest
+
+from conftest import PACKAGE_DIR
+from bom_to_epd_startup import HEAVY_MODULES, measure_startup
+
+pytest.importorskip("tkinter")
+
+# Großzügig gegenüber STARTUP_BUDGET_SECONDS, damit langsame CI-Rechner nicht scheitern
+BUDGET_SECONDS = 2.0
+
+
+def _import_times(module: str) -> dict:
+    """Kumulierte Importzeiten (Sekunden) je Modul aus 'python -X importtime'."""
+    out = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                         cwd=PACKAGE_DIR, capture_output=True, text=True, check=True)
+    times = {}
+    for line in out.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative) / 1e6
+    return times
+
+
+def test_gui_import_loads_no_heavy_modules():
+    times = _import_times("bom_to_epd_gui")
+    assert "bom_to_epd_gui" in times
+    loaded = sorted({name.split(".")[0] for name in times} & set(HEAVY_MODULES))
+    assert loaded == []
+
+
+def test_gui_import_within_budget():
+    times = _import_times("bom_to_epd_gui")
+    assert times["bom_to_epd_gui"] < BUDGET_SECONDS
+
+
+def test_measure_startup_reports_fastest_run():
+    result = measure_startup("bom_to_epd_gui", runs=2)
+    assert result["loaded"] == []
+    assert 0 < result["seconds"] < BUDGET_SECONDS
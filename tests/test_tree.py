@@ -0,0 +1,92 @@
+"""Mehrstufige BoM: Ebenen, Baugruppen und gemeinsame Unter-Baugruppen."""
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+from bom_to_epd import ASSEMBLY_UNIT, build_tree_inputs_and_components, map_materials, parse_bom_materials
+from conftest import MAPPING, MAPPING_HEADER
+
+ROOT = "https://root"
+TARGET = "https://target"
+
+
+def _tree(rows, **options):
+    """Payload-Teile einer BoM aus (Ebene, Material, Menge)-Zeilen (Spalten 0, 1, 2)."""
+    df_map = pd.DataFrame(MAPPING, columns=list(MAPPING_HEADER))
+    df_map["Material_name_norm"] = df_map["Material_name"].str.strip().str.lower()
+    df_mapped = map_materials(parse_bom_materials(pd.DataFrame(rows), 1, 2, 0), df_map)
+    inputs, components, _ = build_tree_inputs_and_components(df_mapped, ROOT, TARGET, **options)
+    return inputs, {component["id"]: component for component in components}
+
+
+def _describe(inputs, by_id):
+    """Baum als verschachtelte Liste (Name, Menge, Einheit, Unterbaum) zum Vergleichen."""
+    return [(by_id[entry["component"]]["name"], entry["amount"], entry["unit"],
+             _describe(by_id[entry["component"]].get("inputs", []), by_id))
+            for entry in inputs]
+
+
+def test_nesting():
+    inputs, by_id = _tree([
+        (1, "Frame", 2),
+        (2, "Steel", 3.0),
+        (2, "Drive", 1),
+        (3, "Cable", 4),
+        (1, "Aluminium", 1.5),
+    ])
+    assert _describe(inputs, by_id) == [
+        ("Aluminium (A1)", 1.5, "kg", []),
+        ("Aluminium (A3 process)", pytest.approx(0.15), "kg", []),
+        ("Frame", 2.0, ASSEMBLY_UNIT, [
+            ("Steel (A1)", 3.0, "kg", []),
+            ("Drive", 1.0, ASSEMBLY_UNIT, [("Cable (A1)", 10.0, "m", [])]),
+        ]),
+    ]
+    assemblies = [c for c in by_id.values() if "inputs" in c]
+    assert all(c["repository"] == TARGET for c in assemblies)
+
+
+def test_assembly_without_amount_keeps_its_children():
+    inputs, by_id = _tree([
+        (1, "Frame", None),
+        (2, "Steel", 3.0),
+        (1, "Drive", ""),
+        (2, "Cable", 4),
+        (1, "Spare", None),  # kein Einzelteil darunter: keine Baugruppe, wird verworfen
+    ])
+    assert _describe(inputs, by_id) == [
+        ("Frame", 1.0, ASSEMBLY_UNIT, [("Steel (A1)", 3.0, "kg", [])]),
+        ("Drive", 1.0, ASSEMBLY_UNIT, [("Cable (A1)", 10.0, "m", [])]),
+    ]
+
+
+def test_assembly_with_invalid_amount_is_rejected():
+    with pytest.raises(ValueError, match="Baugruppen mit ungültiger Menge: 'Frame'"):
+        _tree([(1, "Frame", "abc"), (2, "Steel", 3.0)])
+
+
+@pytest.mark.parametrize("parent_id", [None, "4f1c2d9e-0000-4000-8000-000000000001"])
+def test_identical_sub_assemblies_are_emitted_once(parent_id):
+    inputs, by_id = _tree([
+        (1, "Left door", 1),
+        (2, "Hinge set", 2),
+        (3, "Steel", 0.5),
+        (1, "Right door", 1),
+        (2, "Hinge set", 2),
+        (3, "Steel", 0.5),
+        (1, "Gate", 1),
+        (2, "Hinge set", 2),
+        (3, "Steel", 0.7),  # gleicher Name, anderer Inhalt: eigene Komponente
+    ], parent_id=parent_id)
+
+    hinge_sets = [c for c in by_id.values() if c["name"] == "Hinge set"]
+    assert len(hinge_sets) == 2
+    doors = {name: by_id[next(e["component"] for e in inputs if by_id[e["component"]]["name"] == name)]
+             for name in ("Left door", "Right door", "Gate")}
+    left, right, gate = (doors[name]["inputs"][0]["component"] for name in ("Left door", "Right door", "Gate"))
+    assert left == right != gate
+    assert by_id[left]["inputs"][0]["amount"] == 0.5 and by_id[gate]["inputs"][0]["amount"] == 0.7
+    # Jede Referenz zeigt auf eine vorhandene Komponente
+    referenced = {e["component"] for c in by_id.values() for e in c.get("inputs", [])}
+    assert referenced <= set(by_id)